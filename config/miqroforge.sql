@@ -240,6 +240,36 @@ CREATE TABLE `task_node_relation`  (
   INDEX `idx_vo_ids`(`source_vo_id` ASC, `target_vo_id` ASC) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 1555 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_bin COMMENT = '任务节点关系表' ROW_FORMAT = DYNAMIC;
 
+-- ----------------------------
+-- Table structure for activity_rollup_hourly
+-- ----------------------------
+DROP TABLE IF EXISTS `activity_rollup_hourly`;
+CREATE TABLE `activity_rollup_hourly`  (
+  `source` varchar(16) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL COMMENT '来源: task / job',
+  `bucket` datetime NOT NULL COMMENT '小时桶起始时间',
+  `node_type` varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL DEFAULT '' COMMENT '节点类型（task 为空字符串）',
+  `submitted` int NOT NULL DEFAULT 0 COMMENT '创建数量（按 created_time 计入）',
+  `started` int NOT NULL DEFAULT 0 COMMENT '开始数量（按 start_time 计入，job 无开始时间为0）',
+  `succeeded` int NOT NULL DEFAULT 0 COMMENT '成功数量（按结束时间计入）',
+  `failed` int NOT NULL DEFAULT 0 COMMENT '失败数量（按结束时间计入）',
+  `cost_time` bigint NOT NULL DEFAULT 0 COMMENT '已结束的耗时之和(秒)',
+  `cpu` bigint NOT NULL DEFAULT 0 COMMENT '已结束作业的 cpu 之和',
+  `memory` bigint NOT NULL DEFAULT 0 COMMENT '已结束作业的内存之和 G',
+  PRIMARY KEY (`source`, `bucket`, `node_type`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_bin COMMENT = '任务与作业活动小时汇总表' ROW_FORMAT = DYNAMIC;
+
+-- ----------------------------
+-- Table structure for rollup_state
+-- ----------------------------
+DROP TABLE IF EXISTS `rollup_state`;
+CREATE TABLE `rollup_state`  (
+  `name` varchar(32) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL COMMENT '汇总名称',
+  `watermark` datetime NOT NULL COMMENT '已汇总到的时间水位',
+  `open_min_id` bigint NULL DEFAULT NULL COMMENT '上次汇总时最小的未结束作业ID',
+  `updated_time` datetime NOT NULL DEFAULT current_timestamp ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+  PRIMARY KEY (`name`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_bin COMMENT = '汇总增量刷新状态表' ROW_FORMAT = DYNAMIC;
+
 SET FOREIGN_KEY_CHECKS = 1;
 
 
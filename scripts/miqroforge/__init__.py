@@ -1,14 +1,19 @@
 """MiqroForge 命令行工具包"""
 
+import importlib
+
 __version__ = "0.1.0"
 __author__ = "MiqroForge Team"
 __description__ = "MiqroForge 计算集群管理命令行工具"
 
-# 导入主要模块
-from . import managers
-from . import config
-
+# 主要模块在首次访问时才导入
 __all__ = [
     "managers",
     "config",
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,133 @@
+"""MiqroForge 本地缓存
+
+在 ~/.miqroforge/cache 目录下以 JSON 文件保存可重建的缓存数据。
+缓存损坏或不可读时视为不存在，由调用方重新生成。
+另提供进程内的短期 TTL 缓存。
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .config import CONFIG_DIR
+
+logger = logging.getLogger(__name__)
+
+# 缓存目录
+CACHE_DIR = CONFIG_DIR / "cache"
+
+
+def cache_path(name: str) -> Path:
+    """获取缓存文件路径
+
+    Args:
+        name: 缓存文件名（可包含子目录）
+
+    Returns:
+        缓存文件的完整路径
+    """
+    return CACHE_DIR / name
+
+
+def load_json_cache(name: str) -> Optional[Any]:
+    """读取 JSON 缓存
+
+    Args:
+        name: 缓存文件名
+
+    Returns:
+        缓存内容，不存在或读取失败时返回None
+    """
+    path = cache_path(name)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取缓存失败，将重新生成: {path}, 错误: {e}")
+        return None
+
+
+def save_json_cache(name: str, data: Any) -> None:
+    """原子地写入 JSON 缓存，写入失败只记录日志
+
+    Args:
+        name: 缓存文件名
+        data: 可序列化为 JSON 的缓存内容
+    """
+    path = cache_path(name)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"写入缓存失败: {path}, 错误: {e}")
+
+
+def remove_json_cache(name: str) -> None:
+    """删除 JSON 缓存文件，文件不存在时忽略
+
+    Args:
+        name: 缓存文件名
+    """
+    path = cache_path(name)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"删除缓存失败: {path}, 错误: {e}")
+
+
+class TTLCache:
+    """进程内带过期时间的缓存，线程安全
+
+    用于批量操作中短时间内重复查询的结果（例如镜像是否存在）。
+    """
+
+    def __init__(self, ttl: float = 5.0):
+        """初始化缓存
+
+        Args:
+            ttl: 缓存项的有效秒数
+        """
+        self.ttl = ttl
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """获取未过期的缓存项"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if time.monotonic() >= expires_at:
+                del self._items[key]
+                return default
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """写入缓存项"""
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Any = None) -> None:
+        """删除指定缓存项，key 为None时清空缓存"""
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
@@ -1,15 +1,30 @@
 #!/usr/bin/env python3
 
 import argparse
+import importlib
 import sys
 from textwrap import dedent
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 
-# 导入 handle 函数
-from miqroforge.handle import (
-    handle_show,
-    handle_node,
-)
+from miqroforge import profiling
+
+# 与 miqroforge.handle.output.OUTPUT_FORMATS 保持一致（此处不导入以保持快速启动）
+OUTPUT_FORMATS = ["table", "jsonl", "csv", "tsv", "parquet"]
+
+
+def lazy_handler(module: str, name: str) -> Callable[[Any], Any]:
+    """延迟加载命令处理函数
+
+    只有真正执行某个子命令时才导入对应的 handle 模块及其依赖的客户端库
+    （tabulate、mysql.connector、docker 等），使 --help 等操作保持快速启动。
+    """
+    def handler(args):
+        with profiling.span(f"import {module}", "import"):
+            func = getattr(importlib.import_module(module), name)
+        return func(args)
+
+    handler.__name__ = name
+    return handler
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -18,6 +33,18 @@ def build_parser() -> argparse.ArgumentParser:
         description="MiqroForge 命令行工具",
     )
 
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"记录各阶段和每条 SQL 的耗时，退出时写出 Chrome trace JSON（默认 {profiling.DEFAULT_TRACE_PATH}）"
+             f"并打印汇总；也可以通过环境变量 {profiling.TRACE_ENV}=路径 启用",
+    )
+    parser.add_argument(
+        "--profile-file",
+        metavar="TRACE_FILE",
+        help="启用性能剖析并将 trace JSON 写入指定文件",
+    )
+
     subparsers = parser.add_subparsers(dest="command", metavar="<command>")
 
     # miqroforge show
@@ -33,19 +60,313 @@ def build_parser() -> argparse.ArgumentParser:
         default=10,
         help="查看指定数量的计算任务",
     )
+    show_parser.add_argument(
+        "--all",
+        action="store_true",
+        help="流式查看全部计算任务（忽略 --limit）",
+    )
+    show_parser.add_argument(
+        "--before-id",
+        type=int,
+        help="只查看ID小于指定值的计算任务（键集分页，按ID降序）",
+    )
+    show_parser.add_argument(
+        "--after-id",
+        type=int,
+        help="只查看ID大于指定值的计算任务（键集分页，按ID升序）",
+    )
+    show_parser.add_argument(
+        "--page-size",
+        type=int,
+        default=500,
+        help="流式读取和显示时每页的任务数量",
+    )
     # 参数 --id 参数
     show_parser.add_argument("--id", type=int, help="查看指定ID的计算任务节点信息")
+    show_parser.add_argument(
+        "--tree",
+        action="store_true",
+        help="与 --id 一起使用，以拓扑结构查看任务的节点、参数和连线",
+    )
+    show_parser.add_argument(
+        "--critical-path",
+        action="store_true",
+        help="与 --id 一起使用，分析任务的关键路径、节点松弛时间以及理想与实际完工时间",
+    )
     # 添加 --node-id 参数
     show_parser.add_argument("--node-id", type=int, help="查看指定ID的计算节点参数信息")
+    show_parser.add_argument(
+        "--params",
+        action="store_true",
+        help="查看参数：与 --id 一起使用时为该任务全部节点的参数，否则导出整张参数表（需指定 --format）",
+    )
+    show_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="实时监视最新的 --limit 个任务，只增量查询状态发生变化的任务",
+    )
+    show_parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="--watch 模式下的轮询间隔（秒）",
+    )
+    show_parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="table",
+        help="输出格式：table 为表格显示，其余格式直接从数据库游标流式输出",
+    )
+    show_parser.add_argument(
+        "--output",
+        "--out",
+        "-o",
+        metavar="FILE",
+        help="输出文件（默认标准输出，parquet 格式必须指定）",
+    )
+    show_parser.add_argument(
+        "--param",
+        metavar="CODE",
+        help="与 --node-id 一起使用，将该节点指定参数代码的完整参数值分块写入 --out 指定的文件",
+    )
+    show_parser.add_argument(
+        "--param-type",
+        choices=["input", "output"],
+        help="--param 对应的参数同时存在输入和输出参数时，指定参数类型",
+    )
 
-    show_parser.set_defaults(func=handle_show)
+    show_parser.set_defaults(func=lazy_handler("miqroforge.handle.show", "handle_show"))
+
+    task_subparsers = show_parser.add_subparsers(dest="task_command", metavar="<subcommand>")
+    task_compare_parser = task_subparsers.add_parser(
+        "compare",
+        help="对比多个任务的节点参数",
+        description="在数据库端按 MD5(value) 对比多个任务的节点参数，只读取并显示不一致的参数",
+    )
+    task_compare_parser.add_argument("task_ids", nargs="+", type=int, metavar="ID", help="要对比的任务ID")
+    task_compare_parser.add_argument(
+        "--width",
+        type=int,
+        default=60,
+        help="差异取值片段的显示宽度（字符）",
+    )
+    task_compare_parser.set_defaults(
+        func=lazy_handler("miqroforge.handle.task_compare", "handle_task_compare"))
 
     node_parser = subparsers.add_parser("node", help="查看节点模板信息")
     
     node_parser.add_argument("--add", nargs=2, metavar=('IMAGE', 'APP_PATH'), 
                         help="添加自定义节点，格式: --add <镜像名称> <项目路径>")
+    node_parser.add_argument("--add-batch", metavar="MANIFEST",
+                        help="按清单（YAML/JSON，每项包含 image 和 app_path）批量添加节点")
+    node_parser.add_argument("--yes", "-y", action="store_true",
+                        help="添加节点时节点已存在且内容有变化则直接更新，不再交互确认")
+    node_parser.add_argument("--no-update", action="store_true",
+                        help="添加节点时已存在的节点不更新，只插入新节点")
+    node_parser.add_argument("--force", action="store_true",
+                        help="--add 时不比较内容哈希和镜像摘要，总是写入节点行、重新导入 k3s 并重启 miqroforge-web")
+    node_parser.add_argument("--workers", type=int, default=4,
+                        help="批量添加时拉取、读取元数据和导入 k3s 的并发数")
+    node_parser.add_argument("--id", help="只查看指定ID的节点模板")
+    node_parser.add_argument("--tag", help="只查看指定标签的节点模板")
+    node_parser.add_argument("--type", help="只查看指定类型的节点模板（I/C/T/D）")
+    node_parser.add_argument("--image", help="只查看镜像地址包含指定字符串的节点模板")
+    node_parser.add_argument("--refresh", action="store_true",
+                        help="丢弃本地节点目录缓存，从数据库全量重新加载")
+    node_parser.add_argument("--format", choices=OUTPUT_FORMATS, default="table",
+                        help="节点模板列表的输出格式")
+    node_parser.add_argument("--output", "-o", metavar="FILE",
+                        help="输出文件（默认标准输出，parquet 格式必须指定）")
     
-    node_parser.set_defaults(func=handle_node)
+    node_parser.set_defaults(func=lazy_handler("miqroforge.handle.node", "handle_node"))
+
+    node_subparsers = node_parser.add_subparsers(dest="node_command", metavar="<subcommand>")
+    node_prefetch_parser = node_subparsers.add_parser(
+        "prefetch",
+        help="预先拉取节点镜像并导入 k3s",
+        description="并发拉取 node 表引用的全部镜像到 Docker 并导入 k3s，已存在（摘要一致）的镜像跳过",
+    )
+    node_prefetch_parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="并发拉取和导入的镜像数",
+    )
+    node_prefetch_parser.add_argument(
+        "--max-concurrent-bandwidth",
+        metavar="RATE",
+        help="开始新拉取的带宽阈值（每秒字节数，例如 50M、1.5G）：总下载速率达到该值时推迟开始新的拉取；"
+             "只做准入控制，已开始的拉取不限速，实际速率可能超过该值",
+    )
+    node_prefetch_parser.add_argument(
+        "--no-k3s",
+        action="store_true",
+        help="只拉取到 Docker，不导入 k3s",
+    )
+    node_prefetch_parser.set_defaults(
+        func=lazy_handler("miqroforge.handle.node_prefetch", "handle_node_prefetch"))
+
+    resources_parser = subparsers.add_parser(
+        "resources",
+        help="查看集群资源使用情况",
+        description="查看集群节点的 CPU/内存 分配情况和各命名空间运行中的 Pod",
+    )
+    resources_parser.add_argument(
+        "--live",
+        action="store_true",
+        help="基于 Kubernetes watch 事件实时刷新",
+    )
+    resources_parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="实时模式下的最小刷新间隔（秒）",
+    )
+    resources_parser.set_defaults(func=lazy_handler("miqroforge.handle.resources", "handle_resources"))
+
+    job_parser = subparsers.add_parser(
+        "job",
+        help="作业统计分析",
+        description="基于 job / job_history 表的作业统计分析",
+    )
+    job_subparsers = job_parser.add_subparsers(dest="job_command", metavar="<subcommand>")
+    job_stats_parser = job_subparsers.add_parser(
+        "stats",
+        help="统计作业数量、失败率和耗时分位数",
+        description="在数据库端按分组统计时间窗口内作业的数量、失败率和 P50/P90/P99 耗时",
+    )
+    job_stats_parser.add_argument(
+        "--group-by",
+        choices=["node_type", "image", "ns"],
+        default="node_type",
+        help="分组字段",
+    )
+    job_stats_parser.add_argument(
+        "--since",
+        default="7d",
+        help="统计最近多长时间内创建的作业，例如 12h、7d、2w",
+    )
+    job_stats_parser.add_argument(
+        "--source",
+        choices=["job", "history", "all"],
+        default="all",
+        help="统计数据来源：job 表、job_history 表或两者合并",
+    )
+    job_stats_parser.add_argument(
+        "--include-unfinished",
+        action="store_true",
+        help="同时统计未结束（非成功/失败）的作业",
+    )
+    job_stats_parser.add_argument(
+        "--rollup",
+        action="store_true",
+        help="从小时汇总表读取（需先执行 rollup refresh），只支持按 node_type 分组，不含分位数",
+    )
+    job_parser.set_defaults(func=lazy_handler("miqroforge.handle.job", "handle_job"))
+
+    db_parser = subparsers.add_parser(
+        "db",
+        help="数据库维护",
+        description="数据库维护操作",
+    )
+    db_subparsers = db_parser.add_subparsers(dest="db_command", metavar="<subcommand>")
+    db_archive_parser = db_subparsers.add_parser(
+        "archive",
+        help="将已结束的旧作业从 job 迁移到 job_history",
+        description="按主键分块将早于指定时间的已结束作业从 job 迁移到 job_history，"
+                    "每块一个短事务，中断后再次执行相同命令可继续",
+    )
+    db_archive_parser.add_argument(
+        "--older-than",
+        default="30d",
+        help="归档创建时间早于多久之前的作业，例如 30d、12h、2w",
+    )
+    db_archive_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        help="每块（每个事务）迁移的最大行数",
+    )
+    db_archive_parser.add_argument(
+        "--sleep",
+        type=float,
+        default=0.5,
+        help="每块之间的休眠秒数，用于限流",
+    )
+    db_archive_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="只统计待归档的行数和ID范围，不修改数据",
+    )
+    db_archive_parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="忽略已保存的检查点，重新计算截止时间",
+    )
+    db_parser.set_defaults(func=lazy_handler("miqroforge.handle.db", "handle_db"))
+
+    rollup_parser = subparsers.add_parser(
+        "rollup",
+        help="任务与作业活动的小时汇总",
+        description="增量维护任务与作业活动的小时汇总，统计查询只扫描汇总行",
+    )
+    rollup_subparsers = rollup_parser.add_subparsers(dest="rollup_command", metavar="<subcommand>")
+    rollup_refresh_parser = rollup_subparsers.add_parser(
+        "refresh",
+        help="从上次的水位增量刷新汇总",
+        description="将上次水位之后新增的创建、开始、结束事件累加到小时汇总表，首次执行时全量重建",
+    )
+    rollup_refresh_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="清空汇总并从 task、job、job_history 全量重建",
+    )
+    rollup_show_parser = rollup_subparsers.add_parser(
+        "show",
+        help="显示汇总",
+        description="按小时或天显示时间窗口内的活动汇总",
+    )
+    rollup_show_parser.add_argument(
+        "--since",
+        default="7d",
+        help="显示最近多长时间内的汇总，例如 12h、7d、2w",
+    )
+    rollup_show_parser.add_argument(
+        "--source",
+        choices=["task", "job"],
+        default="job",
+        help="汇总来源",
+    )
+    rollup_show_parser.add_argument(
+        "--bucket",
+        choices=["hour", "day"],
+        default="hour",
+        help="时间粒度",
+    )
+    rollup_show_parser.add_argument(
+        "--by-node-type",
+        action="store_true",
+        help="按节点类型分别显示（仅 job）",
+    )
+    rollup_parser.set_defaults(func=lazy_handler("miqroforge.handle.rollup", "handle_rollup"))
+
+    status_parser = subparsers.add_parser(
+        "status",
+        help="查看各后端服务的连接状态和延迟",
+        description="并发连接 Kubernetes、Docker、MySQL、SQLAlchemy，报告连接耗时和往返耗时",
+    )
+    status_parser.add_argument(
+        "--probes",
+        type=int,
+        default=5,
+        help="每个服务的往返探测次数",
+    )
+    status_parser.add_argument(
+        "--timeout",
+        type=float,
+        help="每个服务连接和探测的期限（秒），默认读取配置 services.timeout",
+    )
+    status_parser.set_defaults(func=lazy_handler("miqroforge.handle.status", "handle_status"))
 
     return parser
 
@@ -59,8 +380,14 @@ def main(argv: Optional[List[str]] = None) -> int:
         parser.print_help()
         return 2
 
+    if args.profile or args.profile_file:
+        profiling.enable(args.profile_file)
+    else:
+        profiling.enable_from_env()
+
     try:
-        args.func(args)
+        with profiling.span(f"command {args.command}", "command"):
+            args.func(args)
     except NotImplementedError as exc:
         # 占位实现触发：输出提示并返回特定退出码
         sys.stderr.write(f"{exc}\n")
@@ -30,6 +30,18 @@ DEFAULT_CONFIG = {
         "password": "",
         "database": "miqroforge",
         "charset": "utf8mb4",
+        "pool": False,        # 是否启用连接池
+        "pool_size": 5,       # 连接池大小（上限32）
+        "pool_timeout": 10,   # 连接池耗尽时等待连接的秒数
+    },
+    "rollup": {
+        "lag_seconds": 60,    # 汇总水位滞后于数据库当前时间的秒数，容忍尚未提交的事务
+    },
+    "services": {
+        "timeout": 5,         # 每个服务初始化（含首次往返）的期限（秒）
+    },
+    "cache": {
+        "node_catalog_ttl": 30,  # 节点目录缓存免校验的秒数，0表示每次都与数据库校验
     },
     "logging": {
         "level": "INFO",
@@ -167,5 +179,23 @@ class ConfigManager:
         return self.config.copy()
 
 
-# 全局配置实例
-config = ConfigManager()
+_config: Optional[ConfigManager] = None
+
+
+def get_config() -> ConfigManager:
+    """获取全局配置实例，首次调用时才读取配置文件
+    
+    Returns:
+        全局配置管理器
+    """
+    global _config
+    if _config is None:
+        _config = ConfigManager()
+    return _config
+
+
+def __getattr__(name):
+    # 全局配置实例 config 在首次访问时创建
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,35 @@
 """MiqroForge 命令处理器包
 
-包含所有命令行工具的处理函数。
+包含所有命令行工具的处理函数。处理函数在首次访问时才导入对应模块，
+避免加载包时引入数据库、Docker 等重量级依赖。
 """
 
-from .show import handle_show
-from .resources import handle_resources
-from .node import handle_node
+import importlib
+
+# 处理函数名称到所在模块的映射
+_HANDLER_MODULES = {
+    "handle_show": ".show",
+    "handle_resources": ".resources",
+    "handle_node": ".node",
+    "handle_job": ".job",
+    "handle_db": ".db",
+    "handle_rollup": ".rollup",
+    "handle_status": ".status",
+}
 
 __all__ = [
     "handle_show",
     "handle_resources",
     "handle_node",
+    "handle_job",
+    "handle_db",
+    "handle_rollup",
+    "handle_status",
 ]
+
+
+def __getattr__(name):
+    if name in _HANDLER_MODULES:
+        module = importlib.import_module(_HANDLER_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,191 @@
+"""节点模板目录的本地缓存
+
+节点目录缓存在 ~/.miqroforge/cache/node_catalog.json 中，以节点 id 为键。
+每次使用前先用一条聚合查询（行数、最大 updated_time）判断目录是否变化，
+只有变化时才按 updated_time 增量拉取变更的节点；在 TTL 内则完全不访问数据库。
+
+updated_time 是语句执行时的时间而不是提交时间，较晚提交的事务可能带着比已读到的
+最大 updated_time 更早的时间戳，聚合值不会因此变化。因此增量拉取向前重叠
+CATALOG_SYNC_LAG_SECONDS 秒，最近这段时间内有更新时也不信任聚合值。
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from ..cache import load_json_cache, save_json_cache
+from ..config import config
+from ..managers.mysql_manager import MySQLManager
+
+# 节点目录缓存文件名
+CATALOG_CACHE_NAME = "node_catalog.json"
+
+# 缓存格式版本，格式变化时旧缓存自动失效
+CATALOG_CACHE_VERSION = 1
+
+# 增量拉取向前重叠的秒数，以容忍提交晚于时间戳的事务
+CATALOG_SYNC_LAG_SECONDS = 60
+
+# 缓存中日期时间的格式
+CATALOG_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _to_cache_value(value: Any) -> Any:
+    """将数据库值转换为可写入 JSON 的值，日期时间与 str() 显示一致。"""
+    if isinstance(value, datetime):
+        return value.strftime(CATALOG_DATETIME_FORMAT)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+def _to_cache_row(row: tuple) -> List[Any]:
+    return [_to_cache_value(value) for value in row]
+
+
+def get_catalog_ttl() -> float:
+    """获取目录缓存免校验的秒数（cache.node_catalog_ttl，默认30秒）。"""
+    cache_config = config.get("cache") or {}
+    return float(cache_config.get("node_catalog_ttl", 30))
+
+
+def load_catalog() -> Optional[Dict[str, Any]]:
+    """读取本地节点目录缓存，格式不匹配时返回None。"""
+    catalog = load_json_cache(CATALOG_CACHE_NAME)
+    if not isinstance(catalog, dict) or catalog.get("version") != CATALOG_CACHE_VERSION:
+        return None
+    return catalog
+
+
+def invalidate_catalog() -> None:
+    """使本地目录缓存在下次使用时重新与数据库校验。
+
+    同时标记为未稳定，下次校验时即使聚合值未变化也重新拉取重叠窗口内的节点。
+    """
+    catalog = load_catalog()
+    if catalog is not None:
+        catalog["checked_at"] = 0
+        catalog["settled"] = False
+        save_json_cache(CATALOG_CACHE_NAME, catalog)
+
+
+def _fetch_all(mysql_manager: MySQLManager, where: str = "", params: tuple = ()) -> tuple:
+    """查询节点表，返回 (列名列表, 行列表)。"""
+    mysql_manager.cursor.execute(f"SELECT * FROM node {where} ORDER BY created_time", params)
+    rows = mysql_manager.cursor.fetchall()
+    columns = [desc[0] for desc in mysql_manager.cursor.description]
+    return columns, rows
+
+
+def sync_catalog(mysql_manager: MySQLManager, catalog: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """与数据库同步节点目录缓存，只传输自上次同步后变更的节点。
+
+    Args:
+        mysql_manager: 已连接的MySQL管理器
+        catalog: 现有缓存，为None时全量加载
+
+    Returns:
+        同步后的目录缓存
+    """
+    if mysql_manager.cursor is None:
+        raise RuntimeError("数据库游标创建失败")
+    cursor = mysql_manager.cursor
+
+    cursor.execute("SELECT COUNT(*), MAX(updated_time), NOW() FROM node", ())
+    count, max_updated, db_now = cursor.fetchone()
+    last_sync = _to_cache_value(max_updated)
+
+    if (catalog is not None and catalog.get("settled")
+            and catalog.get("count") == count and catalog.get("last_sync") == last_sync):
+        # 目录未变化
+        catalog["checked_at"] = time.time()
+        return catalog
+
+    if catalog is None or catalog.get("last_sync") is None:
+        columns, rows = _fetch_all(mysql_manager)
+        nodes = {str(row[columns.index("id")]): _to_cache_row(row) for row in rows}
+    else:
+        # 从上次的最大 updated_time 向前重叠一段时间拉取，按 id 去重
+        since = (datetime.strptime(catalog["last_sync"], CATALOG_DATETIME_FORMAT)
+                 - timedelta(seconds=CATALOG_SYNC_LAG_SECONDS))
+        columns, rows = _fetch_all(mysql_manager, "WHERE updated_time >= %s", (since,))
+        if columns != catalog["columns"]:
+            # 表结构发生变化，全量重建
+            return sync_catalog(mysql_manager, None)
+        nodes = catalog["nodes"]
+        id_index = columns.index("id")
+        for row in rows:
+            nodes[str(row[id_index])] = _to_cache_row(row)
+
+        if len(nodes) != count:
+            # 有节点被删除，只查询 id 列进行对账
+            cursor.execute("SELECT id FROM node", ())
+            existing_ids = {str(row[0]) for row in cursor.fetchall()}
+            nodes = {node_id: row for node_id, row in nodes.items() if node_id in existing_ids}
+
+    catalog = {
+        "version": CATALOG_CACHE_VERSION,
+        "columns": columns,
+        "nodes": nodes,
+        "count": count,
+        "last_sync": last_sync,
+        # 最新更新距同步不足滞后时间时，之后提交的更新可能带着更早的时间戳，无法通过聚合值发现
+        "settled": (max_updated is None
+                    or max_updated < db_now - timedelta(seconds=CATALOG_SYNC_LAG_SECONDS)),
+        "checked_at": time.time(),
+    }
+    save_json_cache(CATALOG_CACHE_NAME, catalog)
+    return catalog
+
+
+def get_catalog(mysql_manager: MySQLManager, refresh: bool = False) -> Dict[str, Any]:
+    """获取节点目录，优先使用本地缓存，必要时才连接数据库同步。
+
+    Args:
+        mysql_manager: MySQL管理器，未连接时按需连接
+        refresh: 是否丢弃本地缓存全量重建
+
+    Returns:
+        节点目录缓存
+    """
+    catalog = None if refresh else load_catalog()
+    if catalog is not None and time.time() - catalog.get("checked_at", 0) < get_catalog_ttl():
+        return catalog
+
+    if not mysql_manager.is_connected() and not mysql_manager.connect():
+        raise RuntimeError("无法连接到数据库")
+    return sync_catalog(mysql_manager, catalog)
+
+
+def filter_catalog(catalog: Dict[str, Any], node_id: Optional[str] = None,
+                   tag: Optional[str] = None, node_type: Optional[str] = None,
+                   image: Optional[str] = None) -> List[List[Any]]:
+    """按条件过滤目录中的节点，按创建时间排序返回。
+
+    id 精确匹配，tag 与 type 不区分大小写精确匹配，image 为子串匹配。
+    """
+    columns = catalog["columns"]
+
+    def column_value(row: List[Any], name: str) -> str:
+        if name not in columns:
+            return ""
+        value = row[columns.index(name)]
+        return "" if value is None else str(value)
+
+    if node_id is not None:
+        row = catalog["nodes"].get(node_id)
+        rows = [row] if row is not None else []
+    else:
+        rows = list(catalog["nodes"].values())
+
+    if tag is not None:
+        rows = [row for row in rows if column_value(row, "tag").lower() == tag.lower()]
+    if node_type is not None:
+        rows = [row for row in rows if column_value(row, "type").lower() == node_type.lower()]
+    if image is not None:
+        rows = [row for row in rows if image in column_value(row, "image")]
+
+    if "created_time" in columns:
+        created_index = columns.index("created_time")
+        rows.sort(key=lambda row: row[created_index] or "")
+    return rows
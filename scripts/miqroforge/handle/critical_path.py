@@ -0,0 +1,200 @@
+"""工作流关键路径与完工时间（makespan）分析相关的处理函数"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from tabulate import tabulate
+
+from ..managers.mysql_manager import MySQLManager
+from ..utils import format_seconds
+from .show import safe_int, get_node_status_str
+from .workflow import topological_levels, seconds_between, format_node_label
+
+# 等待时间最长的连线显示数量
+TOP_WAIT_EDGES = 10
+
+
+def fetch_node_job_costs(mysql_manager: MySQLManager, task_id: int) -> Dict[int, int]:
+    """查询任务各节点作业的计算耗时（秒）。
+
+    同一节点内相同 sort 的作业视为并行执行取最大值，不同 sort 依次执行求和。
+    job 与 job_history 合并查询，均走 idx_task_id。
+    """
+    if mysql_manager.cursor is None:
+        raise RuntimeError("数据库游标创建失败")
+
+    mysql_manager.cursor.execute("""
+        SELECT node_id, sort, MAX(cost_time)
+        FROM (
+            SELECT node_id, sort, cost_time FROM miqroforge.job WHERE task_id = %s
+            UNION ALL
+            SELECT node_id, sort, cost_time FROM miqroforge.job_history WHERE task_id = %s
+        ) jobs
+        GROUP BY node_id, sort
+    """, (task_id, task_id))
+
+    costs: Dict[int, int] = defaultdict(int)
+    for node_id, _, cost_time in mysql_manager.cursor.fetchall():
+        if cost_time is not None:
+            costs[node_id] += safe_int(cost_time)
+    return dict(costs)
+
+
+def analyze_critical_path(graph: Dict[str, Any], job_costs: Dict[int, int]) -> Dict[str, Any]:
+    """对任务 DAG 做关键路径分析（CPM）。
+
+    节点耗时取实际运行时间（finished_time - start_time），缺失时取作业计算耗时。
+    正向推算最早开始/完成时间，反向推算最晚开始时间，松弛 = 最晚开始 - 最早开始。
+    理想完工时间为节点之间没有任何等待时的最长路径长度。
+
+    Returns:
+        包含 nodes（节点ID到分析结果）、order、critical_path、edges（放行连线的等待时间）、
+        ideal_makespan、actual_makespan、cyclic（环上的节点ID）的字典
+    """
+    nodes = graph["nodes"]
+    order = topological_levels(graph)
+    acyclic = [node_id for node_id, level in order if level >= 0]
+    cyclic = [node_id for node_id, level in order if level < 0]
+
+    # 同一对节点之间可能有多条参数级连线，只保留一条依赖
+    successors: Dict[int, List[int]] = defaultdict(list)
+    predecessors: Dict[int, List[int]] = defaultdict(list)
+    for node_id in acyclic:
+        for edge in graph["children"].get(node_id, []):
+            target_id = edge["target_id"]
+            if target_id in cyclic or target_id in successors[node_id]:
+                continue
+            successors[node_id].append(target_id)
+            predecessors[target_id].append(node_id)
+
+    result: Dict[int, Dict[str, Any]] = {}
+    for node_id in acyclic:
+        node = nodes[node_id]
+        actual = seconds_between(node["start_time"], node["finished_time"])
+        job_cost = job_costs.get(node_id)
+        duration = actual if actual is not None else float(job_cost or 0)
+        result[node_id] = {
+            "actual": actual,
+            "job_cost": job_cost,
+            "duration": duration,
+            "wait": None,
+        }
+
+    # 正向推算：最早开始 / 最早完成
+    for node_id in acyclic:
+        item = result[node_id]
+        item["es"] = max((result[p]["ef"] for p in predecessors[node_id]), default=0.0)
+        item["ef"] = item["es"] + item["duration"]
+    ideal_makespan = max((item["ef"] for item in result.values()), default=0.0)
+
+    # 反向推算：最晚完成 / 最晚开始
+    for node_id in reversed(acyclic):
+        item = result[node_id]
+        item["lf"] = min((result[s]["ls"] for s in successors[node_id]), default=ideal_makespan)
+        item["ls"] = item["lf"] - item["duration"]
+        item["slack"] = item["ls"] - item["es"]
+        item["critical"] = abs(item["slack"]) < 1e-6
+
+    # 实际执行中的等待：前驱全部完成到后继开始之间的时间
+    starts = [node["start_time"] for node in nodes.values() if isinstance(node["start_time"], datetime)]
+    finishes = [node["finished_time"] for node in nodes.values() if isinstance(node["finished_time"], datetime)]
+    first_start = min(starts) if starts else None
+    actual_makespan = seconds_between(first_start, max(finishes)) if starts and finishes else None
+
+    # edges 只记录每个节点最后完成的前驱（真正放行该节点的依赖）到该节点的等待
+    edges: List[Tuple[int, int, Optional[float]]] = []
+    for node_id in acyclic:
+        start_time = nodes[node_id]["start_time"]
+        parents = predecessors[node_id]
+        if not parents:
+            result[node_id]["wait"] = seconds_between(first_start, start_time)
+            continue
+        if not all(isinstance(nodes[parent_id]["finished_time"], datetime) for parent_id in parents):
+            continue
+        last_parent = max(parents, key=lambda parent_id: nodes[parent_id]["finished_time"])
+        wait = seconds_between(nodes[last_parent]["finished_time"], start_time)
+        result[node_id]["wait"] = wait
+        edges.append((last_parent, node_id, wait))
+
+    # 沿松弛为0且首尾相接的节点追踪一条关键路径
+    critical_path: List[int] = []
+    current = next((node_id for node_id in acyclic
+                    if not predecessors[node_id] and result[node_id]["critical"]), None)
+    while current is not None:
+        critical_path.append(current)
+        current = next((s for s in successors[current]
+                        if result[s]["critical"] and abs(result[s]["es"] - result[current]["ef"]) < 1e-6),
+                       None)
+
+    return {
+        "nodes": result,
+        "order": acyclic,
+        "critical_path": critical_path,
+        "edges": edges,
+        "ideal_makespan": ideal_makespan,
+        "actual_makespan": actual_makespan,
+        "cyclic": cyclic,
+    }
+
+
+def print_critical_path(task_id: int, graph: Dict[str, Any], analysis: Dict[str, Any]) -> None:
+    """打印关键路径、各节点松弛时间、完工时间对比和连线等待时间。"""
+    nodes = graph["nodes"]
+    result = analysis["nodes"]
+
+    table_data = []
+    for node_id in analysis["order"]:
+        item = result[node_id]
+        table_data.append([
+            format_node_label(nodes[node_id]),
+            get_node_status_str(safe_int(nodes[node_id]["status"])),
+            format_seconds(item["actual"]),
+            format_seconds(item["job_cost"]),
+            format_seconds(item["wait"]),
+            format_seconds(item["es"]),
+            format_seconds(item["ls"]),
+            format_seconds(item["slack"]),
+            "*" if item["critical"] else "",
+        ])
+
+    print(f"\n任务ID {task_id} 的关键路径分析 ({len(nodes)} 个节点):\n")
+    print(tabulate(
+        table_data,
+        headers=["节点", "状态", "运行耗时", "作业耗时", "等待", "最早开始", "最晚开始", "松弛", "关键"],
+        tablefmt="grid",
+        numalign="left",
+        stralign="left",
+        disable_numparse=True
+    ))
+
+    critical_path = analysis["critical_path"]
+    print(f"\n关键路径: {' → '.join(format_node_label(nodes[node_id]) for node_id in critical_path) or '-'}")
+
+    ideal = analysis["ideal_makespan"]
+    actual = analysis["actual_makespan"]
+    print(f"理想完工时间（节点间无等待）: {format_seconds(ideal)}")
+    print(f"实际完工时间: {format_seconds(actual)}")
+    if actual is not None:
+        overhead = max(actual - ideal, 0.0)
+        percent = f" ({overhead / actual * 100:.0f}%)" if actual > 0 else ""
+        print(f"等待与调度开销: {format_seconds(overhead)}{percent}")
+    critical_wait = sum(result[node_id]["wait"] or 0.0 for node_id in critical_path)
+    print(f"关键路径上的等待时间: {format_seconds(critical_wait)}")
+
+    edges = sorted((edge for edge in analysis["edges"] if edge[2]), key=lambda edge: edge[2], reverse=True)
+    if edges:
+        print("\n等待时间最长的依赖（最后完成的前驱 → 后继开始）:")
+        print(tabulate(
+            [[format_node_label(nodes[source_id]), format_node_label(nodes[target_id]), format_seconds(wait)]
+             for source_id, target_id, wait in edges[:TOP_WAIT_EDGES]],
+            headers=["前驱", "后继", "等待"],
+            tablefmt="grid",
+            numalign="left",
+            stralign="left",
+            disable_numparse=True
+        ))
+
+    if analysis["cyclic"]:
+        labels = ", ".join(format_node_label(nodes[node_id]) for node_id in analysis["cyclic"])
+        print(f"\n警告: 以下节点处于环上，未参与分析: {labels}")
@@ -0,0 +1,239 @@
+"""数据库维护（db）相关的处理函数
+
+db archive 将已结束的作业从 job 表分块迁移到 job_history 表：
+每块按主键范围 INSERT ... SELECT 后 DELETE，在各自的短事务中提交，
+块之间可以休眠限流；进度保存在检查点中，中断后可以继续。
+rollup refresh 增量汇总时只读取 job 表，因此在汇总水位之后才结束的作业暂不归档，
+等下次 refresh 计入后再归档。
+"""
+
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+from ..cache import load_json_cache, save_json_cache, remove_json_cache
+from ..config import config
+from ..managers.mysql_manager import MySQLManager
+from ..utils import parse_duration, format_seconds
+from .job import JOB_STATUS_SUCCESS, JOB_STATUS_FAILED
+from .rollup import fetch_rollup_watermark
+
+# 归档检查点缓存文件名
+ARCHIVE_CHECKPOINT_NAME = "job_archive_checkpoint.json"
+
+# 默认参数
+DEFAULT_ARCHIVE_OLDER_THAN = "30d"
+DEFAULT_ARCHIVE_CHUNK_SIZE = 1000
+DEFAULT_ARCHIVE_SLEEP = 0.5
+
+# job 与 job_history 共有的列（job_history 另有自增 id 和 job_id）
+JOB_ARCHIVE_COLUMNS = [
+    "task_id", "node_id", "name", "ns", "image", "command", "args", "sort", "data_dir",
+    "status", "created_time", "finished_time", "retry_count", "cost_time", "msg",
+    "node_type", "cpu", "memory",
+]
+
+# job_history 中不允许为空而 job 中可以为空的列
+JOB_ARCHIVE_NOT_NULL = {"name", "args"}
+
+# 只归档已结束的作业
+ARCHIVE_STATUS_CLAUSE = f"status IN ({JOB_STATUS_SUCCESS}, {JOB_STATUS_FAILED})"
+
+# 只归档已计入汇总的作业：结束时间（没有时为创建时间）不晚于汇总水位
+ARCHIVE_ROLLUP_CLAUSE = "COALESCE(finished_time, created_time) <= %s"
+
+# 从未汇总过时的水位上限
+ARCHIVE_UNBOUNDED = datetime(9999, 12, 31)
+
+ARCHIVE_INSERT_SQL = f"""
+    INSERT INTO job_history (job_id, {', '.join(JOB_ARCHIVE_COLUMNS)})
+    SELECT id, {', '.join(f"COALESCE({column}, '')" if column in JOB_ARCHIVE_NOT_NULL else column
+                          for column in JOB_ARCHIVE_COLUMNS)}
+    FROM job
+    WHERE id > %s AND id <= %s AND {ARCHIVE_STATUS_CLAUSE} AND created_time < %s AND {ARCHIVE_ROLLUP_CLAUSE}
+    ORDER BY id
+"""
+
+ARCHIVE_DELETE_SQL = f"""
+    DELETE FROM job
+    WHERE id > %s AND id <= %s AND {ARCHIVE_STATUS_CLAUSE} AND created_time < %s AND {ARCHIVE_ROLLUP_CLAUSE}
+"""
+
+
+def estimate_archive(mysql_manager: MySQLManager, cutoff: datetime,
+                     rolled_up_until: datetime) -> Tuple[int, Optional[int], Optional[int]]:
+    """统计待归档作业的行数和主键范围。
+
+    条件为 status IN (...) AND created_time < ...，只需扫描 idx_status_created_time。
+    """
+    mysql_manager.cursor.execute(f"""
+        SELECT COUNT(*), MIN(id), MAX(id)
+        FROM job
+        WHERE {ARCHIVE_STATUS_CLAUSE} AND created_time < %s AND {ARCHIVE_ROLLUP_CLAUSE}
+    """, (cutoff, rolled_up_until))
+    count, min_id, max_id = mysql_manager.cursor.fetchone()
+    return int(count or 0), min_id, max_id
+
+
+def next_chunk_end(mysql_manager: MySQLManager, last_id: int, max_id: int,
+                   cutoff: datetime, rolled_up_until: datetime, chunk_size: int) -> Optional[int]:
+    """按主键顺序取下一块待归档作业的最大ID，没有剩余作业时返回None。"""
+    mysql_manager.cursor.execute(f"""
+        SELECT MAX(id) FROM (
+            SELECT id FROM job
+            WHERE id > %s AND id <= %s AND {ARCHIVE_STATUS_CLAUSE} AND created_time < %s
+                AND {ARCHIVE_ROLLUP_CLAUSE}
+            ORDER BY id
+            LIMIT %s
+        ) chunk
+    """, (last_id, max_id, cutoff, rolled_up_until, chunk_size))
+    row = mysql_manager.cursor.fetchone()
+    return row[0] if row else None
+
+
+def archive_chunk(mysql_manager: MySQLManager, last_id: int, chunk_end: int,
+                  cutoff: datetime, rolled_up_until: datetime) -> Tuple[int, int]:
+    """在一个短事务中复制并删除 (last_id, chunk_end] 范围内待归档的作业。
+
+    Returns:
+        (复制的行数, 删除的行数)
+    """
+    connection = mysql_manager.connection
+    cursor = mysql_manager.cursor
+    try:
+        connection.start_transaction()
+        cursor.execute(ARCHIVE_INSERT_SQL, (last_id, chunk_end, cutoff, rolled_up_until))
+        inserted = cursor.rowcount
+        cursor.execute(ARCHIVE_DELETE_SQL, (last_id, chunk_end, cutoff, rolled_up_until))
+        deleted = cursor.rowcount
+        if inserted != deleted:
+            raise RuntimeError(f"ID {last_id + 1}-{chunk_end} 复制 {inserted} 行但删除 {deleted} 行，已回滚")
+        connection.commit()
+        return inserted, deleted
+    except BaseException:
+        connection.rollback()
+        raise
+
+
+def load_archive_checkpoint(mysql_manager: MySQLManager, older_than: str) -> Optional[Dict[str, Any]]:
+    """读取同一数据库、同一时间窗口的归档检查点。"""
+    checkpoint = load_json_cache(ARCHIVE_CHECKPOINT_NAME)
+    if not isinstance(checkpoint, dict):
+        return None
+    if (checkpoint.get("database") != f"{mysql_manager.host}:{mysql_manager.port}/{mysql_manager.database}"
+            or checkpoint.get("older_than") != older_than):
+        return None
+    try:
+        checkpoint["cutoff"] = datetime.strptime(checkpoint["cutoff"], "%Y-%m-%d %H:%M:%S")
+    except (KeyError, TypeError, ValueError):
+        return None
+    return checkpoint
+
+
+def save_archive_checkpoint(mysql_manager: MySQLManager, checkpoint: Dict[str, Any]) -> None:
+    """保存归档检查点。"""
+    data = dict(checkpoint)
+    data["database"] = f"{mysql_manager.host}:{mysql_manager.port}/{mysql_manager.database}"
+    data["cutoff"] = checkpoint["cutoff"].strftime("%Y-%m-%d %H:%M:%S")
+    save_json_cache(ARCHIVE_CHECKPOINT_NAME, data)
+
+
+def handle_db_archive(args, mysql_manager: MySQLManager) -> None:
+    """将早于指定时间的已结束作业从 job 分块迁移到 job_history。"""
+    older_than = getattr(args, 'older_than', None) or DEFAULT_ARCHIVE_OLDER_THAN
+    chunk_size = getattr(args, 'chunk_size', None) or DEFAULT_ARCHIVE_CHUNK_SIZE
+    sleep = getattr(args, 'sleep', None)
+    sleep = DEFAULT_ARCHIVE_SLEEP if sleep is None else sleep
+    if chunk_size <= 0:
+        raise ValueError("每块行数必须是正整数")
+    if sleep < 0:
+        raise ValueError("休眠时间不能为负数")
+    seconds = parse_duration(older_than)
+
+    # 每条语句单独成事务，归档块显式开启事务
+    mysql_manager.connection.autocommit = True
+
+    checkpoint = None if getattr(args, 'reset', False) else load_archive_checkpoint(mysql_manager, older_than)
+    if checkpoint is not None:
+        cutoff = checkpoint["cutoff"]
+        print(f"从检查点继续: ID > {checkpoint['last_id']}，已归档 {checkpoint['archived']} 行")
+    else:
+        mysql_manager.cursor.execute("SELECT NOW() - INTERVAL %s SECOND", (seconds,))
+        cutoff = mysql_manager.cursor.fetchone()[0]
+
+    # 汇总水位只会前移，每次执行时重新读取
+    watermark = fetch_rollup_watermark(mysql_manager)
+    rolled_up_until = ARCHIVE_UNBOUNDED if watermark is None else watermark
+
+    count, min_id, max_id = estimate_archive(mysql_manager, cutoff, rolled_up_until)
+    if checkpoint is not None:
+        max_id = checkpoint["max_id"]
+    print(f"截止时间: {cutoff.strftime('%Y-%m-%d %H:%M:%S')}（早于 {older_than} 的已结束作业）")
+    if watermark is not None:
+        print(f"汇总水位: {watermark.strftime('%Y-%m-%d %H:%M:%S')}（之后结束的作业等 rollup refresh 计入后再归档）")
+    print(f"待归档: {count} 行, ID 范围: {min_id if min_id is not None else '-'} - "
+          f"{max_id if max_id is not None else '-'}, 约 {-(-count // chunk_size)} 块")
+
+    if getattr(args, 'dry_run', False) or count == 0 or max_id is None:
+        if count == 0 and checkpoint is not None and not getattr(args, 'dry_run', False):
+            remove_json_cache(ARCHIVE_CHECKPOINT_NAME)
+        return
+
+    if checkpoint is None:
+        checkpoint = {
+            "older_than": older_than,
+            "cutoff": cutoff,
+            "max_id": max_id,
+            "last_id": 0,
+            "archived": 0,
+        }
+        save_archive_checkpoint(mysql_manager, checkpoint)
+
+    start = time.monotonic()
+    chunks = 0
+    try:
+        while True:
+            chunk_end = next_chunk_end(mysql_manager, checkpoint["last_id"], checkpoint["max_id"],
+                                       cutoff, rolled_up_until, chunk_size)
+            if chunk_end is None:
+                break
+            chunk_start = time.monotonic()
+            inserted, _ = archive_chunk(mysql_manager, checkpoint["last_id"], chunk_end, cutoff,
+                                        rolled_up_until)
+            checkpoint["last_id"] = chunk_end
+            checkpoint["archived"] += inserted
+            save_archive_checkpoint(mysql_manager, checkpoint)
+            chunks += 1
+
+            elapsed = time.monotonic() - start
+            print(f"\r  已归档 {checkpoint['archived']} 行 ({chunks} 块, 本块 "
+                  f"{(time.monotonic() - chunk_start) * 1000:.0f}ms, 用时 {format_seconds(elapsed)})",
+                  end="", flush=True)
+            if sleep > 0:
+                time.sleep(sleep)
+    except KeyboardInterrupt:
+        print(f"\n已中断，进度已保存，再次执行相同命令将从 ID > {checkpoint['last_id']} 继续")
+        return
+
+    print(f"\n归档完成: {checkpoint['archived']} 行, 用时 {format_seconds(time.monotonic() - start)}")
+    remove_json_cache(ARCHIVE_CHECKPOINT_NAME)
+
+
+def handle_db(args) -> None:
+    """数据库维护命令的入口。"""
+    mysql_manager = MySQLManager(config_manager=config)
+
+    try:
+        if getattr(args, 'db_command', None) != "archive":
+            raise ValueError("请指定子命令，例如: miqroforge db archive --older-than 30d")
+
+        if not mysql_manager.connect():
+            raise RuntimeError("无法连接到数据库")
+
+        handle_db_archive(args, mysql_manager)
+    except Exception as e:
+        print(f"\n错误：{e}")
+        sys.exit(1)
+    finally:
+        mysql_manager.disconnect()
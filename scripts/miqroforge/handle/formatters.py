@@ -0,0 +1,224 @@
+"""列表显示的列格式化引擎
+
+每个 *_DISPLAY_FIELDS 在导入时编译为按位置排列的列转换器元组，
+不再为每行构造 dict(zip(FIELDS, row)) 再按名称取值。
+
+format_columns 把一批行转置为列后逐列处理，返回按字段顺序排列的显示列，
+由渲染端（tabulate 的按列输入）直接使用，不再转置回行列表。整列已是显示值的列
+（例如全是 int 的 ID 列、全是 str 的名称列）只做一次类型检查，原样返回；
+无时区的日期时间列按日期序数缓存日期前缀、按当天秒数查时刻表。
+输出与逐值调用标量函数完全一致。
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from itertools import repeat
+from operator import add, attrgetter, countOf, sub
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Union
+
+# 类型定义
+RowItemType = Union[int, str, None]
+TableRowType = List[RowItemType]
+TableColumnsType = List[Sequence[RowItemType]]
+
+# 日期时间显示格式
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# DATETIME_FORMAT 的日期部分，与时刻拼接
+DATE_PREFIX_FORMAT = "%Y-%m-%d "
+
+# 错误信息显示的最大长度，超出时截断并以 ... 结尾
+ERROR_MESSAGE_MAX_LENGTH = 30
+
+# 日期时间格式化缓存的最大条目数，写满后整体清空
+DATETIME_CACHE_SIZE = 65536
+
+# 计算当天秒数的基准时间（某天零点）
+_DATETIME_ORIGIN = datetime(2000, 1, 1)
+
+# 无时区的日期时间到显示字符串的缓存
+_datetime_cache: Dict[datetime, str] = {}
+
+
+class _DatePrefixCache(Dict[int, str]):
+    """日期序数（datetime.toordinal()）到日期前缀的缓存，查找时补上缺少的条目。"""
+
+    def __missing__(self, ordinal: int) -> str:
+        prefix = self[ordinal] = datetime.fromordinal(ordinal).strftime(DATE_PREFIX_FORMAT)
+        return prefix
+
+# 日期序数到日期前缀的缓存
+_date_prefix_cache = _DatePrefixCache()
+
+# 当天秒数到 HH:MM:SS 的表（86400 项），第一次使用时生成
+_time_of_day_table: List[str] = []
+
+
+def safe_int(value: Any) -> int:
+    """安全地将值转换为整数。"""
+    if isinstance(value, (int, Decimal)):
+        return int(value)
+    return 0
+
+def format_datetime(dt: Optional[datetime]) -> str:
+    """格式化日期时间。"""
+    if isinstance(dt, datetime):
+        return dt.strftime(DATETIME_FORMAT)
+    return "-"
+
+def format_error_message(error_msg: Optional[str], max_length: int = ERROR_MESSAGE_MAX_LENGTH) -> str:
+    """格式化错误信息。"""
+    if error_msg is None:
+        return "-"
+    if isinstance(error_msg, str) and len(error_msg) > max_length:
+        return error_msg[:max_length-3] + "..."
+    return str(error_msg)
+
+def format_text(value: Any) -> str:
+    """格式化可能为空的文本，空值显示为空字符串。"""
+    return str(value or "")
+
+def format_datetime_cached(value: Any) -> str:
+    """格式化日期时间，无时区的 datetime 按值缓存结果。
+
+    有时区的值相等时显示可能不同（例如不同时区的同一时刻），不缓存。
+    """
+    if type(value) is not datetime or value.tzinfo is not None:
+        return format_datetime(value)
+    text = _datetime_cache.get(value)
+    if text is None:
+        # 年份为四位数时 isoformat 与 strftime 的结果相同，但快得多
+        if value.year >= 1000:
+            text = value.isoformat(" ", "seconds")
+        else:
+            text = format_datetime(value)
+        if len(_datetime_cache) >= DATETIME_CACHE_SIZE:
+            _datetime_cache.clear()
+        _datetime_cache[value] = text
+    return text
+
+
+class ColumnConverter(NamedTuple):
+    """一列的转换器
+
+    scalar 转换单个值；column 转换整列值，返回同样长度的列表；
+    整列的值都恰好是 passthrough 类型时（不含子类，例如 bool 不算 int）已是显示值，不做转换。
+    """
+    scalar: Callable[[Any], Any]
+    column: Callable[[Sequence[Any]], List[Any]]
+    passthrough: Optional[type] = None
+
+
+def _all_of(values: Sequence[Any], kind: type) -> bool:
+    return countOf(map(type, values), kind) == len(values)
+
+
+def _int_column(values: Sequence[Any]) -> List[int]:
+    return list(map(safe_int, values))
+
+INT = ColumnConverter(safe_int, _int_column, int)
+
+
+def _text_column(values: Sequence[Any]) -> List[str]:
+    return [str(value) if value else "" for value in values]
+
+TEXT = ColumnConverter(format_text, _text_column, str)
+
+
+def _message_column(values: Sequence[Any]) -> List[str]:
+    # 最常见的 None 和短字符串不调用 format_error_message
+    return [
+        "-" if value is None
+        else value if type(value) is str and len(value) <= ERROR_MESSAGE_MAX_LENGTH
+        else format_error_message(value)
+        for value in values
+    ]
+
+MESSAGE = ColumnConverter(format_error_message, _message_column)
+
+
+def _time_of_day_texts() -> List[str]:
+    """返回当天秒数到 HH:MM:SS 的表，第一次调用时生成。"""
+    if not _time_of_day_table:
+        _time_of_day_table.extend(
+            f"{hour:02d}:{minute:02d}:{second:02d}"
+            for hour in range(24) for minute in range(60) for second in range(60)
+        )
+    return _time_of_day_table
+
+def _naive_datetime_texts(values: Sequence[datetime]) -> List[str]:
+    """格式化一列无时区的 datetime：日期前缀按日期序数缓存，时刻按当天秒数查表。
+
+    列中有带时区的值时，与无时区的基准时间相减会抛出 TypeError。
+    """
+    if len(_date_prefix_cache) >= DATETIME_CACHE_SIZE:
+        _date_prefix_cache.clear()
+    prefixes = map(_date_prefix_cache.__getitem__, map(datetime.toordinal, values))
+    seconds = map(attrgetter("seconds"), map(sub, values, repeat(_DATETIME_ORIGIN)))
+    return list(map(add, prefixes, map(_time_of_day_texts().__getitem__, seconds)))
+
+def _datetime_column(values: Sequence[Any]) -> List[str]:
+    # datetime 总是真值，假值（None 等）都显示为 -
+    present = list(filter(None, values))
+    if _all_of(present, datetime):
+        try:
+            texts = _naive_datetime_texts(present)
+        except TypeError:
+            pass
+        else:
+            if len(present) == len(values):
+                return texts
+            next_text = iter(texts).__next__
+            return [next_text() if value else "-" for value in values]
+    return list(map(format_datetime_cached, values))
+
+DATETIME = ColumnConverter(format_datetime_cached, _datetime_column)
+
+
+def mapping(codes: Mapping[int, str], default: str) -> ColumnConverter:
+    """状态码、类型码等按整数查表的列：codes.get(safe_int(value), default)。"""
+    get = codes.get
+
+    def scalar(value: Any) -> str:
+        return get(safe_int(value), default)
+
+    def column(values: Sequence[Any]) -> List[str]:
+        if _all_of(values, int):
+            return list(map(get, values, repeat(default)))
+        return list(map(scalar, values))
+
+    return ColumnConverter(scalar, column)
+
+
+class RowFormatter:
+    """编译后的行格式化器：按字段顺序排列的列转换器元组。
+
+    行中超出字段数的列（例如附加的长度列）会被忽略。
+    """
+
+    def __init__(self, fields: Sequence[str], converters: Mapping[str, ColumnConverter]):
+        missing = [field for field in fields if field not in converters]
+        if missing:
+            raise ValueError(f"以下字段没有转换器: {', '.join(missing)}")
+        self.fields = tuple(fields)
+        self._scalars = tuple(converters[field].scalar for field in fields)
+        self._columns = tuple(
+            (index, converters[field].column, converters[field].passthrough)
+            for index, field in enumerate(fields)
+        )
+
+    def format_row(self, row: Sequence[Any]) -> TableRowType:
+        """格式化单行。"""
+        return [convert(value) for convert, value in zip(self._scalars, row)]
+
+    def format_columns(self, rows: Sequence[Sequence[Any]]) -> TableColumnsType:
+        """按列批量格式化一批行（同一查询返回的行，列数相同），返回按字段顺序排列的显示列。"""
+        if not rows:
+            return [() for _ in self.fields]
+        columns: List[Sequence[Any]] = [*zip(*rows)]
+        del columns[len(self.fields):]
+        for index, convert, passthrough in self._columns:
+            column = columns[index]
+            if passthrough is None or not _all_of(column, passthrough):
+                columns[index] = convert(column)
+        return columns
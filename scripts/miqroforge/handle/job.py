@@ -0,0 +1,210 @@
+"""作业（job / job_history）相关的处理函数"""
+
+import sys
+from decimal import Decimal
+from typing import List, Dict, Any, Tuple
+
+from tabulate import tabulate
+
+from ..managers.mysql_manager import MySQLManager
+from ..config import config
+from ..utils import parse_duration, format_seconds
+
+# 作业状态码
+JOB_STATUS_SUCCESS = 2
+JOB_STATUS_FAILED = 3
+
+# 可分组的字段及其显示名称
+JOB_GROUP_FIELDS: Dict[str, str] = {
+    "node_type": "节点类型",
+    "image": "镜像",
+    "ns": "命名空间",
+}
+
+# 统计数据来源到表名的映射
+JOB_STATS_SOURCES: Dict[str, List[str]] = {
+    "job": ["job"],
+    "history": ["job_history"],
+    "all": ["job", "job_history"],
+}
+
+# 统计的耗时分位数
+JOB_STATS_PERCENTILES = (50, 90, 99)
+
+# 默认统计时间窗口
+DEFAULT_JOB_STATS_SINCE = "7d"
+
+
+def build_job_stats_query(group_by: str, tables: List[str], finished_only: bool = True) -> str:
+    """构造作业耗时统计 SQL。
+
+    计数、失败率和分位数全部在 MySQL 中计算：各表按时间窗口过滤后 UNION ALL，
+    再用窗口函数在每个分组内按 cost_time 排序取最近秩分位数，只返回每组一行结果。
+    只统计已结束作业时过滤条件为 status IN (...) AND created_time >= ...，
+    走 idx_status_created_time；否则只按 created_time 过滤，走 idx_created_time。
+    """
+    if group_by not in JOB_GROUP_FIELDS:
+        raise ValueError(f"不支持的分组字段: {group_by}，可选: {', '.join(JOB_GROUP_FIELDS)}")
+
+    where = "created_time >= NOW() - INTERVAL %s SECOND"
+    if finished_only:
+        where = f"status IN ({JOB_STATUS_SUCCESS}, {JOB_STATUS_FAILED}) AND {where}"
+    source = "\n        UNION ALL\n        ".join(
+        f"SELECT {group_by} AS grp, status, cost_time, cpu, memory FROM {table} WHERE {where}"
+        for table in tables
+    )
+    percentiles = ",\n            ".join(
+        f"MAX(CASE WHEN rn = GREATEST(CEIL({p / 100} * n), 1) THEN cost_time END) AS p{p}"
+        for p in JOB_STATS_PERCENTILES
+    )
+    return f"""
+        WITH jobs AS (
+        {source}
+        ),
+        ranked AS (
+            SELECT grp, status, cost_time, cpu, memory,
+                ROW_NUMBER() OVER (PARTITION BY grp ORDER BY cost_time IS NULL, cost_time) AS rn,
+                COUNT(cost_time) OVER (PARTITION BY grp) AS n
+            FROM jobs
+        )
+        SELECT grp,
+            COUNT(*) AS total,
+            SUM(status = {JOB_STATUS_SUCCESS}) AS succeeded,
+            SUM(status = {JOB_STATUS_FAILED}) AS failed,
+            AVG(cost_time) AS avg_cost,
+            {percentiles},
+            MAX(cost_time) AS max_cost,
+            AVG(cpu) AS avg_cpu,
+            AVG(memory) AS avg_memory
+        FROM ranked
+        GROUP BY grp
+        ORDER BY total DESC, grp
+    """
+
+
+def fetch_job_stats(mysql_manager: MySQLManager, group_by: str, since_seconds: int,
+                    source: str = "all", finished_only: bool = True) -> List[Tuple]:
+    """查询指定时间窗口内按分组汇总的作业统计，每组一行。"""
+    if mysql_manager.cursor is None:
+        raise RuntimeError("数据库未连接")
+    if source not in JOB_STATS_SOURCES:
+        raise ValueError(f"不支持的数据来源: {source}，可选: {', '.join(JOB_STATS_SOURCES)}")
+
+    tables = JOB_STATS_SOURCES[source]
+    query = build_job_stats_query(group_by, tables, finished_only)
+    mysql_manager.cursor.execute(query, (since_seconds,) * len(tables))
+    return mysql_manager.cursor.fetchall()
+
+
+def format_rate(part: Any, total: Any) -> str:
+    """格式化比例百分比。"""
+    part = int(part or 0)
+    total = int(total or 0)
+    if total <= 0:
+        return "-"
+    return f"{part / total * 100:.1f}%"
+
+
+def format_number(value: Any, digits: int = 1) -> str:
+    """格式化可能为空的数值。"""
+    if value is None:
+        return "-"
+    if isinstance(value, Decimal):
+        value = float(value)
+    return f"{value:.{digits}f}"
+
+
+def format_job_stats_row(row: Tuple) -> List[Any]:
+    """格式化一行作业统计结果。"""
+    grp, total, succeeded, failed, avg_cost, *rest = row
+    percentiles = rest[:len(JOB_STATS_PERCENTILES)]
+    max_cost, avg_cpu, avg_memory = rest[len(JOB_STATS_PERCENTILES):]
+    finished = int(succeeded or 0) + int(failed or 0)
+    return [
+        grp if grp not in (None, "") else "-",
+        int(total or 0),
+        int(failed or 0),
+        format_rate(failed, finished),
+        format_seconds(avg_cost),
+        *[format_seconds(value) for value in percentiles],
+        format_seconds(max_cost),
+        format_number(avg_cpu),
+        format_number(avg_memory),
+    ]
+
+
+def print_job_stats_table(group_by: str, rows: List[Tuple]) -> None:
+    """打印作业统计表格。"""
+    headers = [
+        JOB_GROUP_FIELDS[group_by],
+        "作业数",
+        "失败数",
+        "失败率",
+        "平均耗时",
+        *[f"P{p}" for p in JOB_STATS_PERCENTILES],
+        "最大耗时",
+        "平均CPU",
+        "平均内存(G)",
+    ]
+    print(tabulate(
+        [format_job_stats_row(row) for row in rows],
+        headers=headers,
+        tablefmt="grid",
+        numalign="left",
+        stralign="left",
+        disable_numparse=True
+    ))
+
+
+def handle_job_stats(args, mysql_manager: MySQLManager) -> None:
+    """统计时间窗口内作业的数量、失败率和耗时分位数。"""
+    group_by = getattr(args, 'group_by', None) or "node_type"
+    since = getattr(args, 'since', None) or DEFAULT_JOB_STATS_SINCE
+    source = getattr(args, 'source', None) or "all"
+    finished_only = not getattr(args, 'include_unfinished', False)
+
+    if getattr(args, 'rollup', False):
+        # 从小时汇总读取，只扫描窗口内的汇总行，与作业表大小无关
+        from .rollup import fetch_rollup_job_stats
+
+        if group_by != "node_type":
+            raise ValueError("--rollup 只支持按 node_type 分组")
+        if not finished_only:
+            raise ValueError("--rollup 只统计已结束的作业，不能与 --include-unfinished 同时使用")
+        rows = fetch_rollup_job_stats(mysql_manager, parse_duration(since))
+        source = "rollup"
+    else:
+        rows = fetch_job_stats(
+            mysql_manager,
+            group_by=group_by,
+            since_seconds=parse_duration(since),
+            source=source,
+            finished_only=finished_only,
+        )
+    if not rows:
+        print(f"最近 {since} 内没有作业记录")
+        return
+
+    print(f"\n最近 {since} 的作业统计（按{JOB_GROUP_FIELDS[group_by]}分组，来源: {source}）:")
+    print_job_stats_table(group_by, rows)
+    total = sum(int(row[1] or 0) for row in rows)
+    print(f"\n总计: {len(rows)} 个分组, {total} 个作业")
+
+
+def handle_job(args) -> None:
+    """作业相关命令的入口。"""
+    mysql_manager = MySQLManager(config_manager=config)
+
+    try:
+        if getattr(args, 'job_command', None) != "stats":
+            raise ValueError("请指定子命令，例如: miqroforge job stats")
+
+        if not mysql_manager.connect():
+            raise RuntimeError("无法连接到数据库")
+
+        handle_job_stats(args, mysql_manager)
+    except Exception as e:
+        print(f"错误：{e}")
+        sys.exit(1)
+    finally:
+        mysql_manager.disconnect()
@@ -1,13 +1,14 @@
-from typing import List
-from ..managers.mysql_manager import MySQLManager
-from ..managers.docker_manager import DockerManager
+from typing import Dict, List, Optional, Tuple
+from ..managers.mysql_manager import MySQLManager, supports_row_alias
+from ..profiling import span
+from .catalog import get_catalog, filter_catalog, invalidate_catalog
+import hashlib
 import json
 import subprocess
 import sys
-import requests
 import time
 
-def handle_node_add(args) -> None:
+def handle_node_add(args, mysql_manager: MySQLManager = None) -> None:
 
     # args.add 现在是一个包含两个元素的列表
     if args.add is None or len(args.add) != 2:
@@ -18,6 +19,8 @@ def handle_node_add(args) -> None:
     
     image, app_path = args.add
 
+    from ..managers.docker_manager import DockerManager
+
     print(f"adding node:")
     print(f"  image: {image}")
     print(f"  app_path: {app_path}")
@@ -27,26 +30,60 @@ def handle_node_add(args) -> None:
         raise RuntimeError("无法连接到Docker")
     
     # 拉取镜像 如果镜像不存在, 则拉取
-    docker_manager.pull(image)
+    with span("node.pull", "node", image=image):
+        docker_manager.pull(image)
 
     # 获取节点JSON
-    node_json = docker_manager.get_node_json(image, app_path)
+    with span("node.metadata", "node"):
+        node_json = docker_manager.get_node_json(image, app_path)
 
     if node_json is None:
         print(f"get node.json failed")
         return
-    # 插入节点
-    insert_node(node_json, image)
+
+    # 与数据库中的节点行、k3s 中的镜像比较，未变化的步骤直接跳过
+    with span("node.compare", "node"):
+        node_id = normalize_node_json(node_json)
+        stored_hash = fetch_node_hashes(mysql_manager, [node_id]).get(node_id)
+        row_changed = stored_hash != node_content_hash(node_values(node_json, image))
+        image_id = docker_manager.get_image_id(image)
+        image_present = image_in_k3s(image, image_id)
+
+    force = getattr(args, 'force', False)
+    update = update_mode(args)
+    if not force and not row_changed and image_present:
+        print(f"Node {node_id} is up to date (image {image_id}), nothing to do.")
+        return
+
+    # 插入或更新节点
+    row_written = False
+    if force or row_changed:
+        with span("node.db_write", "node"):
+            stored_hashes = {node_id: stored_hash} if stored_hash is not None else {}
+            row_written = insert_node(node_json, image, mysql_manager, update,
+                                      stored_hashes, force) in ("inserted", "updated")
+    else:
+        print(f"Node {node_id} unchanged, skip database write.")
 
     # 导入 k3s containerd 中
-    import_node_to_k3s(image)
+    if force or not image_present:
+        with span("node.k3s_import", "node"):
+            import_node_to_k3s(image, force=force)
+    else:
+        print(f"Image {image} ({image_id}) already exists in k3s, skip importing.")
 
-    restart_miqroforge()
+    if force or row_written or not image_present:
+        with span("node.restart", "node"):
+            restart_miqroforge()
 
 def restart_miqroforge() -> None:
     print(f"Restarting miqroforge-web, please wait...")
-    subprocess.run(["docker","restart","miqroforge-web"], check=True)
+    with span("node.restart.docker_restart", "node"):
+        subprocess.run(["docker","restart","miqroforge-web"], check=True)
     
+    import requests
+    from ..managers.docker_manager import DockerManager
+
     docker_manager = DockerManager()
     if not docker_manager.connect():
         raise RuntimeError("无法连接到Docker")
@@ -59,17 +96,19 @@ def restart_miqroforge() -> None:
         print(f"url: {url}")
         max_retry = 30
         retry = 0
-        while True:
-            response = requests.get(url)
-            if response.status_code == 200:
-                print(f"miqroforge-web restarted successfully!")
-                break
-
-            time.sleep(1)
-            retry += 1
-            if retry > max_retry:
-                print(f"Failed to restart miqroforge-web after {max_retry} retries")
-                break
+        with span("node.restart.wait_ready", "node") as wait_span:
+            while True:
+                response = requests.get(url)
+                if response.status_code == 200:
+                    print("miqroforge-web restarted successfully!")
+                    break
+
+                time.sleep(1)
+                retry += 1
+                if retry > max_retry:
+                    print(f"Failed to restart miqroforge-web after {max_retry} retries")
+                    break
+            wait_span.set(retries=retry)
 
     # if result.returncode == 0:
     #     print(f"miqroforge-web restarted successfully!")
@@ -77,42 +116,61 @@ def restart_miqroforge() -> None:
     #     print(f"Failed to restart miqroforge-web")
 
 
-def import_node_to_k3s(image: str) -> None:
-    """导入镜像到 k3s containerd 中，并显示实时进度"""
-    
-    # 检查镜像是否已经在 k3s 中存在
+def image_in_k3s(image: str, image_id: Optional[str]) -> bool:
+    """镜像是否已在 k3s 中，且与 Docker 中的镜像ID（摘要）一致；查询失败时视为不存在"""
+    from ..managers.containerd_manager import ContainerdManager
+
+    if image_id is None:
+        return False
     try:
-        awk = "awk 'NR>1{print $1\":\"$2}'"
-        result = subprocess.run(
-            ["sh", "-c", f"crictl images | {awk} | grep '{image}'"], 
-            capture_output=True, 
-            text=True, 
-            check=False
-        )
-        output = result.stdout.strip()
-        print(f"check image {image} in k3s: {output}, returncode: {result.returncode}")
-        if result.returncode == 0:
-            print(f"Image {image} already exists in k3s, skip importing.")
-            return
+        return ContainerdManager().has_image(image, image_id)
     except Exception as e:
         print(f"Warning: Failed to check existing images: {e}")
+        return False
+
+
+def import_node_to_k3s(image: str, show_progress: bool = True, force: bool = False) -> bool:
+    """导入镜像到 k3s containerd 中，并显示实时进度
+
+    镜像由 Docker API 流式导出，经管道直接写入 ctr images import，不生成临时文件。
+    force 为 True 时不检查镜像是否已在 k3s 中，总是重新导入。
+
+    Returns:
+        镜像是否已在 k3s 中可用
+    """
+    
+    from ..managers.docker_manager import DockerManager
+    from ..managers.containerd_manager import ContainerdManager
+
+    docker_manager = DockerManager()
+    containerd_manager = ContainerdManager()
+
+    # 检查镜像是否已经在 k3s 中存在，且与 Docker 中的镜像摘要一致
+    if not force:
+        try:
+            image_id = docker_manager.get_image_id(image)
+            if containerd_manager.has_image(image, image_id):
+                print(f"Image {image} ({image_id}) already exists in k3s, skip importing.")
+                return True
+        except Exception as e:
+            print(f"Warning: Failed to check existing images: {e}")
     
     print(f"Importing image to k3s: {image}")
     
     try:
-        image_name = image.split("/")[-1].split(":")[0]
-        subprocess.run(["docker","save","-o",f"/tmp/{image_name}.tar",image])
-        subprocess.run(["k3s","ctr","images","import",f"/tmp/{image_name}.tar"],check=True)
-        subprocess.run(["rm","-f",f"/tmp/{image_name}.tar"])
+        chunks, size = docker_manager.export_image(image)
+        containerd_manager.import_image(chunks, size, show_progress=show_progress)
         
         print(f"\nImage {image} imported to k3s successfully!")
+        return True
             
     except subprocess.CalledProcessError as e:
-        print(f"\nFailed to import image {image} to k3s: {e}")
+        print(f"\nFailed to import image {image} to k3s: {e} {e.stderr or ''}")
     except KeyboardInterrupt:
         print("\nImport interrupted by user")
     except Exception as e:
         print(f"\nError during import: {e}")
+    return False
 
 def fix_node_json(node_json: dict, key: str) -> None:
     if key not in node_json:
@@ -130,127 +188,210 @@ def fix_ui(items: dict) -> None:
                 item['ui'] = {}
 
 
-def insert_node(node_json: dict, image: str) -> None:
-    mysql_manager = MySQLManager()
+# node_values() 对应的 node 表列
+NODE_VALUE_COLUMNS = [
+    "type", "name", "description", "version", "color", "tag", "input", "output",
+    "performance_config_path", "example_config_path", "contact", "image", "execution_command",
+]
+
+# 插入或更新节点的SQL，参数为节点ID加 node_values()
+# 影响行数：插入为1，更新为2，内容未变化为0
+UPSERT_NODE_INSERT = f'''
+INSERT INTO node (id, {", ".join(NODE_VALUE_COLUMNS)})
+VALUES ({", ".join(["%s"] * (len(NODE_VALUE_COLUMNS) + 1))})'''
+
+# MySQL 8.0.19 起用行别名引用新值（VALUES() 自 8.0.20 起弃用）
+UPSERT_NODE_SQL = f'''{UPSERT_NODE_INSERT} AS new
+ON DUPLICATE KEY UPDATE
+    {", ".join(f"{column} = new.{column}" for column in NODE_VALUE_COLUMNS)}
+'''
+
+# MariaDB 和 8.0.19 之前的 MySQL 不支持行别名，使用 VALUES()
+UPSERT_NODE_SQL_VALUES = f'''{UPSERT_NODE_INSERT}
+ON DUPLICATE KEY UPDATE
+    {", ".join(f"{column} = VALUES({column})" for column in NODE_VALUE_COLUMNS)}
+'''
+
+# 只插入新节点的SQL（--no-update）：已存在的节点保持不变，影响行数为 0
+INSERT_NEW_NODE_SQL = f'''{UPSERT_NODE_INSERT}
+ON DUPLICATE KEY UPDATE id = id
+'''
+
+# upsert 的影响行数对应的写入结果（连接未设置 CLIENT_FOUND_ROWS）
+NODE_ROWCOUNT_ACTIONS = {1: "inserted", 2: "updated", 0: "unchanged"}
+
+def normalize_node_json(node_json: dict) -> str:
+    """校验并规范化 node.json，返回节点ID"""
+    node_id = node_json.get('id')
+    if not node_id:
+        raise ValueError("Node ID cannot be empty")
+
+    if 'input' not in node_json:
+        raise ValueError("Node input cannot be empty")
+    if 'output' not in node_json:
+        raise ValueError("Node output cannot be empty")
+
+    fix_node_json(node_json['input'],'upstream')
+    fix_node_json(node_json['output'],'downstream')
+    return node_id
+
+
+def node_values(node_json: dict, image: str) -> tuple:
+    """按 node 表列顺序（不含ID）生成写入参数"""
+    return (
+        'C',
+        json.dumps(node_json.get('name', ''), ensure_ascii=False),
+        node_json.get('description', ''),
+        node_json.get('version', ''),
+        node_json.get('color', ''),
+        node_json.get('tag', ''),
+        json.dumps(node_json.get('input', {}), ensure_ascii=False),
+        json.dumps(node_json.get('output', {}), ensure_ascii=False),
+        node_json.get('performance_config_path', ''),
+        node_json.get('example_config_path', ''),
+        json.dumps(node_json.get('contact', {}), ensure_ascii=False),
+        image,
+        node_json.get('execution_command', ''),
+    )
+
+
+# 内容哈希中各列之间的分隔符（ASCII 单元分隔符）
+NODE_HASH_SEPARATOR = "\x1f"
+
+
+def node_content_hash(values: tuple) -> str:
+    """node_values() 的内容哈希，与 fetch_node_hashes() 在数据库端计算的 MD5 一致
+
+    NULL 与空字符串视为相同（数据库端为 COALESCE(列, '')）。
+    """
+    text = NODE_HASH_SEPARATOR.join("" if value is None else str(value) for value in values)
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def fetch_node_hashes(mysql_manager: MySQLManager, node_ids: List[str]) -> Dict[str, str]:
+    """在数据库端计算节点行的内容哈希，只传回 {节点ID: MD5}，不传输 input/output 等大字段"""
+    if not node_ids:
+        return {}
+    columns = ", ".join(f"COALESCE({column}, '')" for column in NODE_VALUE_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(node_ids))
+    mysql_manager.cursor.execute(
+        f"SELECT id, MD5(CONCAT_WS(CHAR(31 USING utf8mb4), {columns})) "
+        f"FROM node WHERE id IN ({placeholders})",
+        tuple(node_ids),
+    )
+    return {row[0]: row[1] for row in mysql_manager.cursor.fetchall()}
+
+
+def upsert_node_sql(mysql_manager: MySQLManager) -> str:
+    """按数据库类型和版本选择 upsert 语句"""
+    if supports_row_alias(mysql_manager.connection):
+        return UPSERT_NODE_SQL
+    return UPSERT_NODE_SQL_VALUES
+
+
+def update_mode(args) -> Optional[bool]:
+    """--yes 为 True，--no-update 为 False，都未指定时为 None（交互确认）"""
+    if getattr(args, 'yes', False) and getattr(args, 'no_update', False):
+        raise ValueError("--yes 和 --no-update 不能同时使用")
+    if getattr(args, 'yes', False):
+        return True
+    if getattr(args, 'no_update', False):
+        return False
+    return None
+
+
+def confirm_update(node_ids: List[str]) -> bool:
+    """交互确认是否更新已存在且内容有变化的节点"""
+    if not sys.stdin.isatty():
+        raise ValueError(f"Node {', '.join(node_ids)} already exists, "
+                         f"use --yes to update or --no-update to keep it")
+    user_input = input(f'Node {", ".join(node_ids)} already exists, would you want to update? (y/n) ')
+    return user_input.strip().lower() == 'y'
+
+
+def upsert_nodes(mysql_manager: MySQLManager, nodes: List[Tuple[str, tuple]],
+                 update: Optional[bool] = True,
+                 stored_hashes: Optional[Dict[str, str]] = None,
+                 force: bool = False) -> Dict[str, str]:
+    """在当前事务中逐个节点执行 INSERT ... ON DUPLICATE KEY UPDATE，不提交事务
+
+    每个节点的写入结果取自该语句的影响行数（1 插入、2 更新、0 未变化），
+    executemany 只报告总数，因此每个节点单独执行一条语句。
+    update 为 False 时已存在的节点不更新，结果为 skipped（内容相同且已知哈希时为 unchanged）。
+    update 为 None 时才预先读取内容哈希，对已存在且内容有变化的节点交互确认一次；
+    force 为 True 时不比较哈希，已存在的节点都需要确认。
+
+    Args:
+        nodes: (节点ID, node_values()) 列表
+        update: 是否更新已存在的节点，None 时交互确认
+        stored_hashes: 调用方已用 fetch_node_hashes() 查询到的 {节点ID: 内容哈希}，
+            不在其中的节点视为不存在；为 None 且需要交互确认时在这里查询
+
+    Returns:
+        {节点ID: 写入结果}，结果为 inserted/updated/unchanged/skipped（已存在但未更新）
+    """
+    if update is None:
+        if stored_hashes is None:
+            stored_hashes = fetch_node_hashes(mysql_manager, [node_id for node_id, _ in nodes])
+        changed_ids = [
+            node_id for node_id, values in nodes
+            if node_id in stored_hashes and (force or stored_hashes[node_id] != node_content_hash(values))
+        ]
+        update = confirm_update(changed_ids) if changed_ids else True
+
+    sql = upsert_node_sql(mysql_manager) if update else INSERT_NEW_NODE_SQL
+    actions = {}
+    for node_id, values in nodes:
+        mysql_manager.cursor.execute(sql, (node_id,) + values)
+        action = NODE_ROWCOUNT_ACTIONS.get(mysql_manager.cursor.rowcount)
+        if action is None:
+            raise RuntimeError(f"unexpected affected row count {mysql_manager.cursor.rowcount} "
+                               f"when writing node {node_id}")
+        if action == "unchanged" and not update:
+            known = stored_hashes is not None and stored_hashes.get(node_id) == node_content_hash(values)
+            action = "unchanged" if known else "skipped"
+        actions[node_id] = action
+    return actions
+
+
+def insert_node(node_json: dict, image: str, mysql_manager: MySQLManager = None,
+                update: Optional[bool] = None, stored_hashes: Optional[Dict[str, str]] = None,
+                force: bool = False) -> str:
+    """插入或更新单个节点
+
+    Args:
+        update: 节点已存在时是否更新，None 时交互确认
+        stored_hashes: 调用方已查询到的内容哈希，见 upsert_nodes()
+        force: 不比较内容哈希，已存在的节点都需要确认，见 upsert_nodes()
+
+    Returns:
+        写入结果：inserted/updated/unchanged/skipped
+    """
+    # 复用调用方已建立的连接，否则单独建立连接并在结束时关闭
+    owns_connection = mysql_manager is None
+    if owns_connection:
+        mysql_manager = MySQLManager()
     try:
-        if not mysql_manager.connect():
+        if owns_connection and not mysql_manager.connect():
             raise RuntimeError("Failed to connect to database")
         
         # 获取节点ID
-        node_id = node_json.get('id')
-        if not node_id:
-            raise ValueError("Node ID cannot be empty")
-
-        if 'input' not in node_json:
-            raise ValueError("Node input cannot be empty")
-        if 'output' not in node_json:
-            raise ValueError("Node output cannot be empty")
-
-        fix_node_json(node_json['input'],'upstream')
-        fix_node_json(node_json['output'],'downstream')
+        node_id = normalize_node_json(node_json)
 
         print(f"node_json: {node_json}")
         print(f"Starting to process node, ID: {node_id}")
-        
-        # 先查询节点是否已存在
-        print("Checking if node already exists...")
-        check_sql = "SELECT id FROM node WHERE id = %s"
-        mysql_manager.cursor.execute(check_sql, (node_id,))
-        existing_node = mysql_manager.cursor.fetchone()
-        
-        if existing_node:
-            user_input = input(f'Node {node_id} already exists, would you want to update? (y/n) ')
-            if user_input.strip().lower() != 'y':
-                print(f"Node {node_id} not updated. exit...")
-                sys.exit(0)
-            
-            # 更新现有节点
-            update_sql = '''
-            UPDATE node SET 
-                type = %s,
-                name = %s,
-                description = %s,
-                version = %s,
-                color = %s,
-                tag = %s,
-                input = %s,
-                output = %s,
-                performance_config_path = %s,
-                example_config_path = %s,
-                contact = %s,
-                image = %s,
-                execution_command = %s
-            WHERE id = %s
-            '''
-            
-            # 准备更新参数
-            update_params = (
-                'C',
-                json.dumps(node_json.get('name', ''), ensure_ascii=False),
-                node_json.get('description', ''),
-                node_json.get('version', ''),
-                node_json.get('color', ''),
-                node_json.get('tag', ''),
-                json.dumps(node_json.get('input', {}), ensure_ascii=False),
-                json.dumps(node_json.get('output', {}), ensure_ascii=False),
-                node_json.get('performance_config_path', ''),
-                node_json.get('example_config_path', ''),
-                json.dumps(node_json.get('contact', {}), ensure_ascii=False),
-                image,
-                node_json.get('execution_command', ''),
-                node_id
-            )
-            
-            mysql_manager.cursor.execute(update_sql, update_params)
+
+        action = upsert_nodes(mysql_manager, [(node_id, node_values(node_json, image))], update,
+                              stored_hashes, force)[node_id]
+        if action in ("inserted", "updated"):
             mysql_manager.connection.commit()
-            print(f"Node updated successfully, ID: {node_id}")
-            
+            invalidate_catalog()
+            print(f"Node {action} successfully, ID: {node_id}")
+        elif action == "unchanged":
+            print(f"Node {node_id} unchanged, skip database write.")
         else:
-            print(f"Node {node_id} does not exist, performing insert operation...")
-            
-            # 插入新节点
-            insert_sql = '''
-            INSERT INTO node (
-                id, 
-                type, 
-                name, 
-                description, 
-                version,
-                color,
-                tag,
-                input,
-                output,
-                performance_config_path,
-                example_config_path,
-                contact,
-                image,
-                execution_command                
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            '''
-            
-            # 准备插入参数
-            insert_params = (
-                node_id,
-                'C',
-                json.dumps(node_json.get('name', ''), ensure_ascii=False),
-                node_json.get('description', ''),
-                node_json.get('version', ''),
-                node_json.get('color', ''),
-                node_json.get('tag', ''),
-                json.dumps(node_json.get('input', {}), ensure_ascii=False),
-                json.dumps(node_json.get('output', {}), ensure_ascii=False),
-                node_json.get('performance_config_path', ''),
-                node_json.get('example_config_path', ''),
-                json.dumps(node_json.get('contact', {}), ensure_ascii=False),
-                image,
-                node_json.get('execution_command', ''),
-            )
-            
-            mysql_manager.cursor.execute(insert_sql, insert_params)
-            mysql_manager.connection.commit()
-            print(f"Node inserted successfully, ID: {node_id}")
-        
-        print(f"Node processing completed, ID: {node_id}")
+            print(f"Node {node_id} already exists, not updated.")
+        return action
         
     except Exception as e:
         print(f"Failed to process node: {e}")
@@ -258,8 +399,8 @@ def insert_node(node_json: dict, image: str) -> None:
             mysql_manager.connection.rollback()
         raise
     finally:
-        if hasattr(mysql_manager, 'connection') and mysql_manager.connection:
-            mysql_manager.connection.close()
+        if owns_connection:
+            mysql_manager.disconnect()
 
 def fetch_node(mysql_manager: MySQLManager) -> List:
     if mysql_manager.cursor is None:
@@ -314,20 +455,36 @@ def handle_node(args) -> None:
     
     mysql_manager = MySQLManager()
     try:
-        if not mysql_manager.connect():
-            raise RuntimeError("无法连接到数据库")
-
         if hasattr(args, 'add') and args.add is not None:
-            handle_node_add(args)
+            if not mysql_manager.connect():
+                raise RuntimeError("无法连接到数据库")
+            handle_node_add(args, mysql_manager)
+        elif getattr(args, 'add_batch', None) is not None:
+            from .node_batch import handle_node_add_batch
+
+            if not mysql_manager.connect():
+                raise RuntimeError("无法连接到数据库")
+            handle_node_add_batch(args, mysql_manager)
         else:
-            nodes = fetch_node(mysql_manager)
-            # 获取列名信息
-            column_names = get_column_names(mysql_manager)
+            # 节点目录优先从本地缓存读取，只在目录变化时访问数据库
+            catalog = get_catalog(mysql_manager, refresh=getattr(args, 'refresh', False))
+            nodes = filter_catalog(
+                catalog,
+                node_id=getattr(args, 'id', None),
+                tag=getattr(args, 'tag', None),
+                node_type=getattr(args, 'type', None),
+                image=getattr(args, 'image', None),
+            )
+            fmt = getattr(args, 'format', None) or "table"
+            if fmt != "table":
+                from .output import write_rows
+
+                write_rows(fmt, catalog["columns"], [nodes], getattr(args, 'output', None))
+                return
             # 垂直打印节点数据，类似于MySQL的\G命令
-            print_node_vertical(nodes, column_names)
+            print_node_vertical(nodes, catalog["columns"])
     except Exception as e:
         print(f"error: {e}")
     finally:
-        if hasattr(mysql_manager, 'connection') and mysql_manager.connection:
-            mysql_manager.connection.close()
+        mysql_manager.disconnect()
 
@@ -0,0 +1,312 @@
+"""批量注册节点（node --add-batch）相关的处理函数
+
+每个镜像在有界线程池中独立走完 拉取 → 读取 node.json → 写入节点行 → 导入 k3s 的流水线，
+同一镜像只拉取和导入一次，一个镜像较慢不会拖住其他镜像的导入。
+需要交互确认时在任何拉取开始之前确认一次，工作线程不打印也不读取标准输入。
+节点行按镜像在各自的事务中逐个执行 upsert 写入（共用一个连接，串行执行），写入结果取自影响行数；
+只导入数据库中节点行已是该镜像的节点，已在 k3s 中的镜像跳过；
+有节点写入或镜像导入时 miqroforge-web 在最后只重启一次。
+"""
+
+import json
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+from tabulate import tabulate
+
+from ..managers.image_ref import normalize_image_ref
+from ..managers.mysql_manager import MySQLManager
+from ..profiling import span
+from .catalog import invalidate_catalog
+from .node import (
+    normalize_node_json,
+    node_values,
+    upsert_nodes,
+    update_mode,
+    confirm_update,
+    image_in_k3s,
+    restart_miqroforge,
+)
+
+# 默认并发数
+DEFAULT_BATCH_WORKERS = 4
+
+# 各阶段在汇总表中的显示顺序
+BATCH_STAGES = ["pull", "metadata", "db_write", "k3s_import", "restart"]
+
+
+class StageTimer:
+    """线程安全地记录各阶段的耗时"""
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            with span(f"node.{name}", "node"):
+                yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.durations[name].append(elapsed)
+
+    def summary_rows(self) -> List[List[Any]]:
+        rows = []
+        for name in BATCH_STAGES + sorted(set(self.durations) - set(BATCH_STAGES)):
+            durations = self.durations.get(name)
+            if not durations:
+                continue
+            rows.append([
+                name,
+                len(durations),
+                f"{sum(durations):.2f}",
+                f"{sum(durations) / len(durations):.2f}",
+                f"{max(durations):.2f}",
+            ])
+        return rows
+
+
+def load_manifest(path: str) -> List[Dict[str, str]]:
+    """读取批量注册清单。
+
+    清单为 YAML 或 JSON 文件，内容是 {image, app_path} 列表，
+    或包含该列表的 {"nodes": [...]}。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(".json"):
+            manifest = json.load(f)
+        else:
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("读取 YAML 清单需要安装pyyaml库: pip install pyyaml")
+            manifest = yaml.safe_load(f)
+
+    if isinstance(manifest, dict):
+        manifest = manifest.get("nodes")
+    if not isinstance(manifest, list) or not manifest:
+        raise ValueError(f"清单 {path} 中没有节点")
+
+    entries = []
+    for index, item in enumerate(manifest):
+        if not isinstance(item, dict) or not item.get("image") or not item.get("app_path"):
+            raise ValueError(f"清单第 {index + 1} 项缺少 image 或 app_path")
+        entries.append({"image": str(item["image"]), "app_path": str(item["app_path"])})
+    return entries
+
+
+def prepare_image(docker_manager, image: str, entries: List[Dict[str, Any]],
+                  timer: StageTimer) -> None:
+    """拉取镜像一次，再读取并规范化使用该镜像的各节点的 node.json。
+
+    拉取失败时抛出异常；单个节点读取失败只记录在该节点的 status 中。
+    在工作线程中运行，静默拉取且不打印各节点的 help.md，避免并发节点的输出交错。
+    """
+    with timer.stage("pull"):
+        pulled = docker_manager.pull(image, quiet=True)
+    if not pulled:
+        raise RuntimeError("pull image failed")
+    image_id = docker_manager.get_image_id(image)
+
+    for entry in entries:
+        entry["image_id"] = image_id
+        with timer.stage("metadata"):
+            node_json = docker_manager.get_node_json(image, entry["app_path"],
+                                                     show_description=False)
+        if node_json is None:
+            entry["status"] = "failed: get node.json failed"
+            continue
+        entry["node_id"] = normalize_node_json(node_json)
+        entry["node_json"] = node_json
+
+
+def import_image(docker_manager, image: str, image_id: Optional[str], timer: StageTimer) -> bool:
+    """导入镜像到 k3s，镜像已存在且摘要一致时跳过，返回是否实际导入。
+
+    摘要只检查一次，随后直接流式导出并导入，不经过 import_node_to_k3s，
+    避免重复检查和在工作线程中打印进度；失败时抛出异常。
+    """
+    from ..managers.containerd_manager import ContainerdManager
+
+    with timer.stage("k3s_import"):
+        if image_in_k3s(image, image_id):
+            return False
+        chunks, size = docker_manager.export_image(image)
+        try:
+            ContainerdManager().import_image(chunks, size, show_progress=False)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"ctr images import failed: {e.stderr or e}")
+    return True
+
+
+def write_nodes(mysql_manager: MySQLManager, entries: List[Dict[str, Any]], update: bool) -> None:
+    """在同一个事务中逐个执行 upsert 写入节点行，写入结果取自各语句的影响行数。
+
+    update 为 False 时已存在的节点不更新。
+    """
+    try:
+        actions = upsert_nodes(
+            mysql_manager,
+            [(entry["node_id"], node_values(entry["node_json"], entry["image"])) for entry in entries],
+            update,
+        )
+        mysql_manager.connection.commit()
+    except Exception:
+        mysql_manager.connection.rollback()
+        raise
+    for entry in entries:
+        entry["action"] = actions[entry["node_id"]]
+    if any(action in ("inserted", "updated") for action in actions.values()):
+        invalidate_catalog()
+
+
+def image_repository(image: str) -> str:
+    """镜像引用去掉标签和摘要后的仓库名，例如 miqroera01/app:v2 为 docker.io/miqroera01/app"""
+    name = normalize_image_ref(image).partition("@")[0]
+    return name[:name.rfind(":")] if name.rfind(":") > name.rfind("/") else name
+
+
+def fetch_registered_nodes(mysql_manager: MySQLManager, images: List[str]) -> List[str]:
+    """查询镜像仓库与清单中任一镜像相同（标签可以不同）的已注册节点ID"""
+    repositories = {image_repository(image) for image in images}
+    mysql_manager.cursor.execute("SELECT id, image FROM node ORDER BY id")
+    return [node_id for node_id, image in mysql_manager.cursor.fetchall()
+            if image and image_repository(image) in repositories]
+
+
+def resolve_update(mysql_manager: MySQLManager, images: List[str], update: Optional[bool]) -> bool:
+    """在任何拉取开始之前决定是否更新已存在的节点
+
+    节点ID要读取镜像中的 node.json 才能知道，拉取之前只能按镜像仓库预先读取可能被更新的节点：
+    有这样的节点时交互确认一次（标准输入不是终端时报错提示使用 --yes 或 --no-update），
+    没有时不更新其他镜像注册的同ID节点。
+    """
+    if update is not None:
+        return update
+    node_ids = fetch_registered_nodes(mysql_manager, images)
+    if not node_ids:
+        return False
+    return confirm_update(node_ids)
+
+
+def process_image(docker_manager, mysql_manager: MySQLManager, db_lock: threading.Lock,
+                  seen_ids: Dict[str, str], image: str, entries: List[Dict[str, Any]],
+                  update: bool, timer: StageTimer) -> bool:
+    """一个镜像的流水线：拉取并读取元数据、写入节点行、导入 k3s，返回是否实际导入了镜像。
+
+    数据库连接由各镜像共用，写入在 db_lock 下串行执行；节点ID与先写入的其他镜像重复时该节点失败。
+    """
+    try:
+        prepare_image(docker_manager, image, entries, timer)
+    except Exception as e:
+        for entry in entries:
+            entry["status"] = f"failed: {e}"
+        return False
+
+    with db_lock:
+        ready = []
+        for entry in entries:
+            if "node_id" not in entry:
+                continue
+            first_image = seen_ids.get(entry["node_id"])
+            if first_image is not None:
+                entry["status"] = f"failed: duplicate node id {entry['node_id']} (also in {first_image})"
+                continue
+            seen_ids[entry["node_id"]] = image
+            ready.append(entry)
+        if not ready:
+            return False
+        try:
+            with timer.stage("db_write"):
+                write_nodes(mysql_manager, ready, update)
+        except Exception as e:
+            for entry in ready:
+                entry["status"] = f"failed: db write: {e}"
+            return False
+    for entry in ready:
+        entry["status"] = entry["action"]
+
+    # 只导入数据库中节点行已是该镜像的节点，未更新的节点不导入
+    in_db = [entry for entry in ready if entry["action"] in ("inserted", "updated", "unchanged")]
+    if not in_db:
+        return False
+    try:
+        return import_image(docker_manager, image, in_db[0]["image_id"], timer)
+    except Exception as e:
+        for entry in in_db:
+            entry["status"] = f"{entry['action']}, {e}"
+        return False
+
+
+def handle_node_add_batch(args, mysql_manager: MySQLManager) -> None:
+    """按清单批量注册节点。"""
+    from ..managers.docker_manager import DockerManager
+
+    entries = load_manifest(args.add_batch)
+    workers = max(1, getattr(args, 'workers', None) or DEFAULT_BATCH_WORKERS)
+
+    images: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for entry in entries:
+        entry["status"] = "pending"
+        images[entry["image"]].append(entry)
+
+    # 工作线程不能交互确认，在拉取之前决定是否更新已存在的节点
+    update = resolve_update(mysql_manager, list(images), update_mode(args))
+    print(f"adding {len(entries)} nodes with {workers} workers")
+
+    docker_manager = DockerManager()
+    if not docker_manager.connect():
+        raise RuntimeError("无法连接到Docker")
+
+    timer = StageTimer()
+    wall_start = time.perf_counter()
+    db_lock = threading.Lock()
+    seen_ids: Dict[str, str] = {}
+    imported_images = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_image, docker_manager, mysql_manager, db_lock, seen_ids,
+                            image, group, update, timer): image
+            for image, group in images.items()
+        }
+        for future in as_completed(futures):
+            if future.result():
+                imported_images.append(futures[future])
+
+    written = [entry for entry in entries if entry.get("action") in ("inserted", "updated")]
+    if written or imported_images:
+        with timer.stage("restart"):
+            restart_miqroforge()
+
+    print("\nBatch result:")
+    print(tabulate(
+        [[entry["image"], entry.get("node_id", "-"), entry["status"]] for entry in entries],
+        headers=["image", "node id", "status"],
+        tablefmt="grid",
+        numalign="left",
+        stralign="left"
+    ))
+    print("\nStage timing (seconds):")
+    print(tabulate(
+        timer.summary_rows(),
+        headers=["stage", "count", "total", "avg", "max"],
+        tablefmt="grid",
+        numalign="left",
+        stralign="left",
+        disable_numparse=True
+    ))
+    counts = defaultdict(int)
+    for entry in entries:
+        counts[entry.get("action", "failed")] += 1
+    print(f"\nwall time: {time.perf_counter() - wall_start:.2f}s, "
+          f"{len(written)}/{len(entries)} nodes written "
+          f"(inserted {counts['inserted']}, updated {counts['updated']}, unchanged {counts['unchanged']}, "
+          f"skipped {counts['skipped']}, failed {counts['failed']}), {len(imported_images)} images imported")
@@ -0,0 +1,316 @@
+"""预热节点镜像（node prefetch）相关的处理函数
+
+读取 node 表中引用的全部镜像，在有界线程池中并发拉取到 Docker，
+各镜像各层的下载进度汇总为一行显示；拉取完成的镜像随即导入 k3s，
+Docker 或 k3s 中已存在（摘要一致）的镜像直接跳过。
+
+Docker 守护进程的下载无法在客户端限速，--max-concurrent-bandwidth 只是准入阈值：
+当前总下载速率达到阈值时，新的拉取等待，已开始的拉取不受影响，实际速率可能超过阈值。
+"""
+
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from tabulate import tabulate
+
+from ..managers.mysql_manager import MySQLManager
+from ..managers.containerd_manager import format_bytes
+from ..config import config
+from ..profiling import span
+from .node import image_in_k3s
+
+# 默认并发数
+DEFAULT_PREFETCH_WORKERS = 4
+
+# 进度刷新的最小间隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+# 计算下载速率的滑动窗口（秒）
+RATE_WINDOW = 3.0
+
+# 带宽准入等待时重新检查速率的间隔（秒）
+ADMISSION_POLL = 0.2
+
+# 带宽单位到字节数的映射
+BANDWIDTH_UNITS: Dict[str, int] = {
+    "": 1,
+    "K": 1024,
+    "M": 1024 ** 2,
+    "G": 1024 ** 3,
+}
+
+# 层下载完成的状态
+LAYER_DONE_STATUSES = ("Download complete", "Pull complete", "Already exists")
+
+
+def parse_bandwidth(text: str) -> int:
+    """解析带宽阈值，例如 50M、1.5G、800K（每秒字节数，单位为 1024 进制）"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*", text, re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"无法解析带宽阈值: {text}，示例: 50M、1.5G")
+    value = int(float(match.group(1)) * BANDWIDTH_UNITS[match.group(2).upper()])
+    if value <= 0:
+        raise ValueError("带宽阈值必须大于0")
+    return value
+
+
+def fetch_node_images(mysql_manager: MySQLManager) -> List[str]:
+    """读取 node 表中引用的全部镜像（去重）"""
+    if mysql_manager.cursor is None:
+        raise RuntimeError("数据库游标创建失败")
+
+    mysql_manager.cursor.execute(
+        "SELECT DISTINCT image FROM node WHERE image IS NOT NULL AND image <> '' ORDER BY image"
+    )
+    return [row[0].strip() for row in mysql_manager.cursor.fetchall() if row[0].strip()]
+
+
+class PullProgress:
+    """线程安全地汇总所有镜像各层的下载进度，并在同一行刷新显示"""
+
+    def __init__(self, image_count: int, stream=None):
+        self.image_count = image_count
+        self.images_done = 0
+        self.stream = stream or sys.stdout
+        # (镜像, 层ID) -> [已下载字节数, 总字节数]
+        self.layers: Dict[Tuple[str, str], List[int]] = {}
+        self.done_layers = set()
+        self.samples = deque()
+        self.last_render = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, image: str, line: dict) -> None:
+        """处理 Docker 拉取流中的一条进度消息"""
+        layer = line.get("id")
+        status = line.get("status", "")
+        # 首条 "Pulling from ..." 消息的 id 是标签而不是层
+        if not layer or status.startswith("Pulling from"):
+            return
+        key = (image, layer)
+        detail = line.get("progressDetail") or {}
+        with self._lock:
+            sizes = self.layers.setdefault(key, [0, 0])
+            if status == "Downloading" and detail.get("total"):
+                sizes[0] = detail.get("current", 0)
+                sizes[1] = detail["total"]
+            elif status in LAYER_DONE_STATUSES:
+                sizes[0] = sizes[1]
+                self.done_layers.add(key)
+        self.render()
+
+    def image_done(self) -> None:
+        with self._lock:
+            self.images_done += 1
+        self.render(force=True)
+
+    def downloaded(self) -> int:
+        with self._lock:
+            return sum(sizes[0] for sizes in self.layers.values())
+
+    def rate(self) -> float:
+        """最近 RATE_WINDOW 秒内的总下载速率（字节/秒）"""
+        now = time.monotonic()
+        downloaded = self.downloaded()
+        with self._lock:
+            self.samples.append((now, downloaded))
+            while len(self.samples) > 1 and now - self.samples[0][0] > RATE_WINDOW:
+                self.samples.popleft()
+            start, start_bytes = self.samples[0]
+        if now - start <= 0:
+            return 0.0
+        return (downloaded - start_bytes) / (now - start)
+
+    def render(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self.last_render < PROGRESS_INTERVAL:
+            return
+        self.last_render = now
+        rate = self.rate()
+        with self._lock:
+            downloaded = sum(sizes[0] for sizes in self.layers.values())
+            total = sum(sizes[1] for sizes in self.layers.values())
+            self.stream.write(f"\r  pulling: {self.images_done}/{self.image_count} images, "
+                              f"{len(self.done_layers)}/{len(self.layers)} layers, "
+                              f"{format_bytes(downloaded)} / {format_bytes(total)}, "
+                              f"{format_bytes(rate)}/s\033[K")
+            self.stream.flush()
+
+    def finish(self) -> None:
+        self.render(force=True)
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+class BandwidthGate:
+    """带宽阈值的准入控制：总下载速率达到阈值时新的拉取等待，至少允许一个拉取进行
+
+    只决定何时开始新的拉取，不限制已开始的拉取的速率。
+
+    新拉取刚开始时还没有速率样本，因此上一次准入后至少等待一个速率窗口再判断。
+    """
+
+    def __init__(self, progress: PullProgress, limit: Optional[int]):
+        self.progress = progress
+        self.limit = limit
+        self.active = 0
+        self.last_admitted = 0.0
+        self._condition = threading.Condition()
+
+    def _must_wait(self) -> bool:
+        if not self.limit or self.active == 0:
+            return False
+        if time.monotonic() - self.last_admitted < RATE_WINDOW:
+            return True
+        return self.progress.rate() >= self.limit
+
+    @contextmanager
+    def admit(self):
+        with self._condition:
+            while self._must_wait():
+                self._condition.wait(ADMISSION_POLL)
+            self.active += 1
+            self.last_admitted = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.active -= 1
+                self._condition.notify_all()
+
+
+def pull_image(docker_manager, image: str, progress: PullProgress, gate: BandwidthGate) -> str:
+    """拉取单个镜像，进度汇总到 progress，返回 present 或 pulled"""
+    if docker_manager.check_image_exists(image):
+        progress.image_done()
+        return "present"
+
+    with gate.admit(), span("prefetch.pull", "node", image=image):
+        try:
+            for line in docker_manager.client.api.pull(image, stream=True, decode=True):
+                if "error" in line:
+                    raise RuntimeError(line["error"])
+                progress.update(image, line)
+        finally:
+            docker_manager.invalidate(image)
+    progress.image_done()
+    return "pulled"
+
+
+def import_image(docker_manager, image: str) -> str:
+    """导入镜像到 k3s，已存在且摘要一致时跳过，返回 present 或 imported
+
+    不显示导入进度，避免打断拉取的汇总进度行；失败时抛出异常。
+    """
+    from ..managers.containerd_manager import ContainerdManager
+
+    image_id = docker_manager.get_image_id(image)
+    if image_id is None:
+        raise RuntimeError("image not found in docker")
+    if image_in_k3s(image, image_id):
+        return "present"
+    with span("prefetch.k3s_import", "node", image=image):
+        chunks, size = docker_manager.export_image(image)
+        try:
+            ContainerdManager().import_image(chunks, size, show_progress=False)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"ctr images import failed: {e.stderr or e}")
+    return "imported"
+
+
+def prefetch_images(docker_manager, images: List[str], workers: int,
+                    admission_bandwidth: Optional[int] = None, k3s: bool = True) -> List[Dict[str, str]]:
+    """并发拉取镜像并导入 k3s，返回每个镜像的结果"""
+    entries = [{"image": image, "docker": "pending", "k3s": "-"} for image in images]
+    progress = PullProgress(len(images))
+    gate = BandwidthGate(progress, admission_bandwidth)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # 拉取完成的镜像立即提交 k3s 导入
+        pull_futures = {
+            executor.submit(pull_image, docker_manager, entry["image"], progress, gate): entry
+            for entry in entries
+        }
+        import_futures = {}
+        for future in as_completed(pull_futures):
+            entry = pull_futures[future]
+            try:
+                entry["docker"] = future.result()
+            except Exception as e:
+                entry["docker"] = f"failed: {e}"
+                progress.image_done()
+                continue
+            if k3s:
+                entry["k3s"] = "pending"
+                import_futures[executor.submit(import_image, docker_manager, entry["image"])] = entry
+        progress.finish()
+
+        for future in as_completed(import_futures):
+            entry = import_futures[future]
+            try:
+                entry["k3s"] = future.result()
+            except Exception as e:
+                entry["k3s"] = f"failed: {e}"
+
+    return entries
+
+
+def handle_node_prefetch(args) -> None:
+    """将 node 表引用的全部镜像预先拉取到 Docker 并导入 k3s。"""
+    from ..managers.docker_manager import DockerManager
+
+    mysql_manager = MySQLManager(config_manager=config)
+
+    try:
+        workers = getattr(args, 'workers', None) or DEFAULT_PREFETCH_WORKERS
+        if workers <= 0:
+            raise ValueError("并发数必须是正整数")
+        admission_bandwidth = getattr(args, 'max_concurrent_bandwidth', None)
+        admission_bandwidth = parse_bandwidth(admission_bandwidth) if admission_bandwidth else None
+
+        if not mysql_manager.connect():
+            raise RuntimeError("无法连接到数据库")
+        images = fetch_node_images(mysql_manager)
+        mysql_manager.disconnect()
+        if not images:
+            print("没有找到引用镜像的节点")
+            return
+
+        docker_manager = DockerManager()
+        if not docker_manager.connect():
+            raise RuntimeError("无法连接到Docker")
+
+        limit = (f", new pulls wait above {format_bytes(admission_bandwidth)}/s"
+                 if admission_bandwidth else "")
+        print(f"prefetching {len(images)} images with {workers} workers{limit}")
+        wall_start = time.perf_counter()
+        entries = prefetch_images(docker_manager, images, workers, admission_bandwidth,
+                                  k3s=not getattr(args, 'no_k3s', False))
+
+        print("\nPrefetch result:")
+        print(tabulate(
+            [[entry["image"], entry["docker"], entry["k3s"]] for entry in entries],
+            headers=["image", "docker", "k3s"],
+            tablefmt="grid",
+            numalign="left",
+            stralign="left"
+        ))
+        failed = [entry for entry in entries
+                  if entry["docker"].startswith("failed") or entry["k3s"].startswith("failed")]
+        pulled = sum(entry["docker"] == "pulled" for entry in entries)
+        imported = sum(entry["k3s"] == "imported" for entry in entries)
+        print(f"\nwall time: {time.perf_counter() - wall_start:.2f}s, "
+              f"{pulled} pulled, {imported} imported, {len(failed)} failed")
+        if failed:
+            sys.exit(1)
+    except Exception as e:
+        print(f"错误：{e}")
+        sys.exit(1)
+    finally:
+        mysql_manager.disconnect()
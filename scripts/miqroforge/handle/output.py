@@ -0,0 +1,186 @@
+"""机器可读输出格式（JSONL、CSV、TSV、Parquet）相关的辅助函数
+
+行数据按批（例如 MySQLManager.stream 返回的批次）逐批写出，
+不在内存中物化完整结果集，也不经过 tabulate。
+"""
+
+import csv
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+# 支持的输出格式，table 为默认的表格显示
+OUTPUT_FORMATS = ["table", "jsonl", "csv", "tsv", "parquet"]
+
+# Parquet 每个行组的最大行数
+PARQUET_ROW_GROUP_SIZE = 65536
+
+
+def to_plain_value(value: Any) -> Any:
+    """将数据库返回的值转换为 JSON 可序列化的值。"""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value) if value % 1 else int(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+@contextmanager
+def open_output(output: Optional[str]):
+    """打开文本输出文件，未指定或为 - 时使用标准输出。
+
+    文件先写入同一目录下的临时文件，成功后再替换为目标文件；
+    写出过程中出错时删除临时文件，不留下不完整的输出。
+    """
+    if output is None or output == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    directory, name = os.path.split(os.path.abspath(output))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        # mkstemp 创建的文件只有属主可读写，改为与 open() 新建文件相同的权限
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        with open(fd, "w", encoding="utf-8", newline="") as f:
+            yield f
+        os.replace(temp_path, output)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_jsonl(stream: TextIO, columns: Sequence[str], batches: Iterable[List[Sequence]]) -> int:
+    """每行一个 JSON 对象。"""
+    count = 0
+    for rows in batches:
+        stream.writelines(
+            json.dumps(dict(zip(columns, map(to_plain_value, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+        count += len(rows)
+    return count
+
+
+def write_delimited(stream: TextIO, columns: Sequence[str], batches: Iterable[List[Sequence]],
+                    delimiter: str = ",") -> int:
+    """带表头的 CSV / TSV。"""
+    writer = csv.writer(stream, delimiter=delimiter)
+    writer.writerow(columns)
+    count = 0
+    for rows in batches:
+        writer.writerows(map(to_plain_value, row) for row in rows)
+        count += len(rows)
+    return count
+
+
+def to_arrow_value(value: Any) -> Any:
+    """将数据库返回的值转换为 Arrow 可以稳定推断类型的值。
+
+    bytes、timedelta 与 JSONL 的转换一致；Decimal 统一为浮点数，
+    避免各行组的小数位数不同时无法按首个行组的 decimal 类型写入。
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray, timedelta)):
+        return to_plain_value(value)
+    return value
+
+
+def _arrow_columns(columns: Sequence[str], rows: List[Sequence], schema=None):
+    import pyarrow as pa
+
+    arrays = []
+    for index, name in enumerate(columns):
+        values = [row[index] for row in rows]
+        field_type = schema.field(name).type if schema is not None else None
+        if field_type is not None and pa.types.is_string(field_type):
+            values = [None if value is None else str(to_plain_value(value)) for value in values]
+        else:
+            values = list(map(to_arrow_value, values))
+        array = pa.array(values, type=field_type)
+        if field_type is None and pa.types.is_null(array.type):
+            # 首个行组中整列为空时无法推断类型，按字符串处理
+            array = pa.array(values, type=pa.string())
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, names=list(columns))
+
+
+def _row_groups(batches: Iterable[List[Sequence]], row_group_size: int) -> Iterator[List[Sequence]]:
+    buffer: List[Sequence] = []
+    for rows in batches:
+        buffer.extend(rows)
+        while len(buffer) >= row_group_size:
+            yield buffer[:row_group_size]
+            buffer = buffer[row_group_size:]
+    if buffer:
+        yield buffer
+
+
+def write_parquet(output: str, columns: Sequence[str], batches: Iterable[List[Sequence]],
+                  row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> int:
+    """按行组写出 Parquet 文件，内存占用只与行组大小有关。"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("parquet 格式需要安装pyarrow库: pip install pyarrow")
+
+    count = 0
+    writer = None
+    try:
+        for rows in _row_groups(batches, row_group_size):
+            table = _arrow_columns(columns, rows, writer.schema if writer is not None else None)
+            if writer is None:
+                writer = pq.ParquetWriter(output, table.schema)
+            writer.write_table(table)
+            count += len(rows)
+        if writer is None:
+            # 没有数据时也写出只含表头的文件
+            writer = pq.ParquetWriter(output, _arrow_columns(columns, []).schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def write_rows(fmt: str, columns: Sequence[str], batches: Iterable[List[Sequence]],
+               output: Optional[str] = None) -> int:
+    """按指定格式流式写出行数据。
+
+    Args:
+        fmt: 输出格式（jsonl/csv/tsv/parquet）
+        columns: 列名
+        batches: 按批返回行的迭代器
+        output: 输出文件路径，None 或 - 表示标准输出（parquet 必须指定文件）
+
+    Returns:
+        写出的行数
+    """
+    if fmt == "parquet":
+        if output is None or output == "-":
+            raise ValueError("parquet 格式需要通过 --output 指定输出文件")
+        count = write_parquet(output, columns, batches)
+    elif fmt in ("jsonl", "csv", "tsv"):
+        with open_output(output) as stream:
+            if fmt == "jsonl":
+                count = write_jsonl(stream, columns, batches)
+            else:
+                count = write_delimited(stream, columns, batches, "\t" if fmt == "tsv" else ",")
+    else:
+        raise ValueError(f"不支持的输出格式: {fmt}，可选: {', '.join(OUTPUT_FORMATS)}")
+
+    if output is not None and output != "-":
+        print(f"已导出 {count} 行到 {output}", file=sys.stderr)
+    return count
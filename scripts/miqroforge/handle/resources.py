@@ -1,8 +1,317 @@
 """集群资源相关的处理函数"""
 
+import queue
 import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Tuple
+
+from tabulate import tabulate
+from kubernetes.client.rest import ApiException
+from kubernetes.utils import parse_quantity
+
+from ..managers.k8s_manager import KubernetesManager
+from .terminal import LiveFrame
+
+# 仍占用节点资源的 Pod 阶段
+ACTIVE_POD_PHASES = ("Pending", "Running", "Unknown")
+
+# 单次 watch 请求的超时时间（秒），超时后从最新的 resourceVersion 继续监听
+WATCH_TIMEOUT_SECONDS = 300
+
+# watch 出错后的重试间隔（秒）
+WATCH_RETRY_SECONDS = 5
+
+
+def parse_cpu(value: Any) -> float:
+    """解析 CPU 数量为核数。"""
+    if value is None:
+        return 0.0
+    return float(parse_quantity(value))
+
+
+def parse_memory(value: Any) -> float:
+    """解析内存数量为字节数。"""
+    if value is None:
+        return 0.0
+    return float(parse_quantity(value))
+
+
+def format_cpu(cores: float) -> str:
+    """格式化 CPU 核数。"""
+    return f"{cores:.2f}"
+
+
+def format_memory(size: float) -> str:
+    """格式化内存为 GiB。"""
+    return f"{size / 1024 ** 3:.1f}Gi"
+
+
+def format_percent(used: float, total: float) -> str:
+    """格式化使用率百分比。"""
+    if total <= 0:
+        return "-"
+    return f"{used / total * 100:.0f}%"
+
+
+def get_pod_requests(pod: Any) -> Tuple[float, float]:
+    """计算 Pod 的 CPU 和内存请求量。
+
+    与调度器一致：取业务容器请求之和与单个初始化容器请求的较大值。
+    """
+    spec = pod.spec
+    cpu = memory = 0.0
+    for container in spec.containers or []:
+        requests = (container.resources and container.resources.requests) or {}
+        cpu += parse_cpu(requests.get("cpu"))
+        memory += parse_memory(requests.get("memory"))
+    for container in spec.init_containers or []:
+        requests = (container.resources and container.resources.requests) or {}
+        cpu = max(cpu, parse_cpu(requests.get("cpu")))
+        memory = max(memory, parse_memory(requests.get("memory")))
+    return cpu, memory
+
+
+def is_node_ready(node: Any) -> bool:
+    """判断节点是否 Ready。"""
+    for condition in (node.status and node.status.conditions) or []:
+        if condition.type == "Ready":
+            return condition.status == "True"
+    return False
+
+
+class ClusterResourceState:
+    """由 list/watch 事件增量维护的集群资源状态。
+
+    节点请求量和命名空间运行中 Pod 数量随每个 Pod 事件增减，
+    无需在每次刷新时遍历全部 Pod。
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.pods: Dict[str, Dict[str, Any]] = {}
+        self.node_requested: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+        self.ns_running: Dict[str, int] = defaultdict(int)
+        self.synced = set()
+
+    @property
+    def ready(self) -> bool:
+        """节点和 Pod 是否都已完成首次全量同步。"""
+        return {"node", "pod"} <= self.synced
+
+    def render_pending(self) -> List[str]:
+        """首次全量同步完成前显示的内容。"""
+        pending = [kind for kind in ("node", "pod") if kind not in self.synced]
+        return [f"集群资源 ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})", "",
+                f"正在同步: {', '.join(pending)}"]
+
+    def _remove_pod(self, key: str) -> None:
+        pod = self.pods.pop(key, None)
+        if pod is None:
+            return
+        if pod["node"] and pod["phase"] in ACTIVE_POD_PHASES:
+            requested = self.node_requested[pod["node"]]
+            requested[0] -= pod["cpu"]
+            requested[1] -= pod["memory"]
+        if pod["phase"] == "Running":
+            self.ns_running[pod["ns"]] -= 1
+            if self.ns_running[pod["ns"]] <= 0:
+                del self.ns_running[pod["ns"]]
+
+    def _add_pod(self, obj: Any) -> None:
+        key = f"{obj.metadata.namespace}/{obj.metadata.name}"
+        cpu, memory = get_pod_requests(obj)
+        pod = {
+            "ns": obj.metadata.namespace,
+            "node": obj.spec.node_name,
+            "phase": obj.status.phase if obj.status else None,
+            "cpu": cpu,
+            "memory": memory,
+        }
+        self.pods[key] = pod
+        if pod["node"] and pod["phase"] in ACTIVE_POD_PHASES:
+            requested = self.node_requested[pod["node"]]
+            requested[0] += cpu
+            requested[1] += memory
+        if pod["phase"] == "Running":
+            self.ns_running[pod["ns"]] += 1
+
+    def _set_node(self, obj: Any) -> None:
+        allocatable = (obj.status and obj.status.allocatable) or {}
+        self.nodes[obj.metadata.name] = {
+            "ready": is_node_ready(obj),
+            "cpu": parse_cpu(allocatable.get("cpu")),
+            "memory": parse_memory(allocatable.get("memory")),
+        }
+
+    def apply(self, kind: str, event_type: str, obj: Any) -> bool:
+        """应用一条事件，返回状态是否发生变化。"""
+        if event_type == "BOOKMARK":
+            return False
+
+        if kind == "node":
+            if event_type == "RESYNC":
+                self.nodes.clear()
+                for item in obj:
+                    self._set_node(item)
+                self.synced.add("node")
+            elif event_type == "DELETED":
+                self.nodes.pop(obj.metadata.name, None)
+            else:
+                self._set_node(obj)
+            return True
+
+        if event_type == "RESYNC":
+            self.pods.clear()
+            self.node_requested.clear()
+            self.ns_running.clear()
+            for item in obj:
+                self._add_pod(item)
+            self.synced.add("pod")
+            return True
+
+        self._remove_pod(f"{obj.metadata.namespace}/{obj.metadata.name}")
+        if event_type != "DELETED":
+            self._add_pod(obj)
+        return True
+
+    def render(self) -> List[str]:
+        """渲染节点资源和命名空间 Pod 表格。"""
+        node_rows = []
+        for name in sorted(self.nodes):
+            node = self.nodes[name]
+            cpu_requested, memory_requested = self.node_requested.get(name, (0.0, 0.0))
+            node_rows.append([
+                name,
+                "Ready" if node["ready"] else "NotReady",
+                f"{format_cpu(cpu_requested)} / {format_cpu(node['cpu'])}",
+                format_percent(cpu_requested, node["cpu"]),
+                f"{format_memory(memory_requested)} / {format_memory(node['memory'])}",
+                format_percent(memory_requested, node["memory"]),
+            ])
+        ns_rows = [[ns, self.ns_running[ns]] for ns in sorted(self.ns_running)]
+
+        lines = [f"集群资源 ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})", ""]
+        lines.extend(tabulate(
+            node_rows,
+            headers=["节点", "状态", "CPU 请求/可分配", "CPU%", "内存 请求/可分配", "内存%"],
+            tablefmt="grid",
+            numalign="left",
+            stralign="left"
+        ).splitlines())
+        lines.append("")
+        lines.extend(tabulate(
+            ns_rows,
+            headers=["命名空间", "运行中 Pod"],
+            tablefmt="grid",
+            numalign="left",
+            stralign="left"
+        ).splitlines())
+        lines.append("")
+        lines.append(f"总计: {len(self.nodes)} 个节点, {sum(self.ns_running.values())} 个运行中 Pod")
+        return lines
+
+
+def watch_loop(k8s_manager: KubernetesManager, kind: str, events: queue.Queue,
+               stop: threading.Event) -> None:
+    """先全量 list 一次，然后持续 watch 增量事件放入队列。
+
+    只有首次启动或 resourceVersion 过期（410）时才重新 list。
+    """
+    resource_version = None
+    while not stop.is_set():
+        try:
+            if resource_version is None:
+                items, resource_version = k8s_manager.list_resources(kind)
+                events.put((kind, "RESYNC", items))
+            for event_type, obj in k8s_manager.watch_resources(
+                    kind, resource_version, timeout_seconds=WATCH_TIMEOUT_SECONDS):
+                if stop.is_set():
+                    return
+                resource_version = obj.metadata.resource_version or resource_version
+                events.put((kind, event_type, obj))
+        except ApiException as e:
+            if e.status == 410:
+                resource_version = None
+                continue
+            events.put((kind, "ERROR", f"{kind} watch 失败: {e.status} {e.reason}"))
+            stop.wait(WATCH_RETRY_SECONDS)
+        except Exception as e:
+            events.put((kind, "ERROR", f"{kind} watch 失败: {e}"))
+            stop.wait(WATCH_RETRY_SECONDS)
+
+
+def run_live(k8s_manager: KubernetesManager, interval: float) -> None:
+    """由 watch 事件驱动的实时资源视图，状态变化时才重绘变化的行。
+
+    首次同步完成前也会显示 list/watch 的错误，同一资源之后的事件成功到达时清除对应的警告。
+    """
+    state = ClusterResourceState()
+    events: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    for kind in ("node", "pod"):
+        threading.Thread(
+            target=watch_loop,
+            args=(k8s_manager, kind, events, stop),
+            name=f"watch-{kind}",
+            daemon=True,
+        ).start()
+
+    frame = LiveFrame()
+    dirty = False
+    errors: Dict[str, str] = {}
+    last_draw = 0.0
+    try:
+        while True:
+            timeout = max(interval - (time.monotonic() - last_draw), 0.05) if dirty else None
+            try:
+                kind, event_type, obj = events.get(timeout=timeout)
+                # 合并积压的事件，一次刷新
+                while True:
+                    if event_type == "ERROR":
+                        errors[kind] = obj
+                        dirty = True
+                    else:
+                        if errors.pop(kind, None) is not None:
+                            dirty = True
+                        dirty = state.apply(kind, event_type, obj) or dirty
+                    kind, event_type, obj = events.get_nowait()
+            except queue.Empty:
+                pass
+
+            if dirty and time.monotonic() - last_draw >= interval:
+                lines = state.render() if state.ready else state.render_pending()
+                for kind in sorted(errors):
+                    lines.append(f"警告: {errors[kind]}")
+                lines.append("按 Ctrl+C 退出")
+                frame.render(lines)
+                dirty = False
+                last_draw = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
 
 
 def handle_resources(args) -> None:
-    """查看集群资源使用情况的占位实现。支持 --live。"""
-    raise NotImplementedError("显示资源使用情况的实现待补充")
+    """查看集群节点资源分配和各命名空间运行中的 Pod，支持 --live。"""
+    try:
+        k8s_manager = KubernetesManager()
+
+        if getattr(args, 'live', False):
+            interval = getattr(args, 'interval', None) or 1.0
+            if interval <= 0:
+                raise ValueError("刷新间隔必须大于0")
+            run_live(k8s_manager, interval)
+            return
+
+        state = ClusterResourceState()
+        for kind in ("node", "pod"):
+            items, _ = k8s_manager.list_resources(kind)
+            state.apply(kind, "RESYNC", items)
+        print("\n".join(state.render()))
+    except Exception as e:
+        print(f"错误：{e}")
+        sys.exit(1)
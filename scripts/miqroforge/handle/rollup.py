@@ -0,0 +1,434 @@
+"""任务与作业活动的小时汇总（rollup）相关的处理函数
+
+汇总保存在 activity_rollup_hourly 表中，每个 (来源, 小时桶, 节点类型) 一行。
+rollup refresh 从上次的时间水位增量累加：
+- 创建数量按 created_time 窗口计入，走 idx_created_time；
+- 任务的开始/结束按 start_time/end_time 窗口计入，候选行由 updated_time 水位
+  在 idx_status_updated_time 上范围扫描得到；
+- job 没有 updated_time，结束的作业由主键下界 open_min_id（上次汇总时最小的
+  未结束作业ID）限定扫描范围，再按 finished_time 窗口计入。
+水位比数据库当前时间滞后 rollup.lag_seconds 秒，以容忍尚未提交的事务。
+汇总表只在 refresh 时创建，只读的查询在表不存在时按没有汇总数据处理。
+增量刷新只读取 job 表，db archive 不会归档在水位之后才结束的作业。
+"""
+
+import sys
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from mysql.connector import Error, errorcode
+from tabulate import tabulate
+
+from ..config import config
+from ..managers.mysql_manager import MySQLManager, supports_row_alias
+from ..utils import parse_duration, format_seconds
+from .job import (
+    JOB_STATUS_SUCCESS,
+    JOB_STATUS_FAILED,
+    JOB_STATS_PERCENTILES,
+    format_rate,
+    format_number,
+)
+
+# 汇总名称（rollup_state 主键）
+ROLLUP_NAME = "activity_hourly"
+
+# 默认水位滞后秒数
+DEFAULT_ROLLUP_LAG_SECONDS = 60
+
+# 任务状态码
+TASK_STATUS_SUCCESS = 4
+TASK_STATUS_FAILED = 5
+TASK_STATUSES = (1, 2, 3, 4, 5, 6)
+
+# 全量重建时的起始水位
+ROLLUP_EPOCH = datetime(1970, 1, 2)
+
+ROLLUP_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS `activity_rollup_hourly`  (
+      `source` varchar(16) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL
+        COMMENT '来源: task / job',
+      `bucket` datetime NOT NULL COMMENT '小时桶起始时间',
+      `node_type` varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin
+        NOT NULL DEFAULT '' COMMENT '节点类型（task 为空字符串）',
+      `submitted` int NOT NULL DEFAULT 0 COMMENT '创建数量（按 created_time 计入）',
+      `started` int NOT NULL DEFAULT 0
+        COMMENT '开始数量（按 start_time 计入，job 无开始时间为0）',
+      `succeeded` int NOT NULL DEFAULT 0 COMMENT '成功数量（按结束时间计入）',
+      `failed` int NOT NULL DEFAULT 0 COMMENT '失败数量（按结束时间计入）',
+      `cost_time` bigint NOT NULL DEFAULT 0 COMMENT '已结束的耗时之和(秒)',
+      `cpu` bigint NOT NULL DEFAULT 0 COMMENT '已结束作业的 cpu 之和',
+      `memory` bigint NOT NULL DEFAULT 0 COMMENT '已结束作业的内存之和 G',
+      PRIMARY KEY (`source`, `bucket`, `node_type`) USING BTREE
+    ) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_bin
+      COMMENT = '任务与作业活动小时汇总表' ROW_FORMAT = DYNAMIC
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS `rollup_state`  (
+      `name` varchar(32) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL
+        COMMENT '汇总名称',
+      `watermark` datetime NOT NULL COMMENT '已汇总到的时间水位',
+      `open_min_id` bigint NULL DEFAULT NULL COMMENT '上次汇总时最小的未结束作业ID',
+      `updated_time` datetime NOT NULL DEFAULT current_timestamp
+        ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+      PRIMARY KEY (`name`) USING BTREE
+    ) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_bin
+      COMMENT = '汇总增量刷新状态表' ROW_FORMAT = DYNAMIC
+    """,
+]
+
+ROLLUP_METRICS = [
+    "submitted", "started", "succeeded", "failed", "cost_time", "cpu", "memory",
+]
+
+
+def hour_bucket(column: str) -> str:
+    """将时间列截断到整点的 SQL 表达式。"""
+    return f"{column} - INTERVAL (MINUTE({column}) * 60 + SECOND({column})) SECOND"
+
+
+def created_event_columns(node_type: str) -> str:
+    """创建事件子查询中小时桶之后的列：节点类型和各指标，只计入 submitted。"""
+    return (f"AS bucket, {node_type} AS node_type, 1 AS submitted, 0 AS started, "
+            "0 AS succeeded, 0 AS failed, 0 AS cost_time, 0 AS cpu, 0 AS memory")
+
+
+def build_rollup_insert(source: str, parts: List[str], row_alias: bool = True) -> str:
+    """将若干子查询的事件按桶汇总后累加到汇总表。
+
+    row_alias 为 True 时按桶汇总的结果作为派生表 new，增量列名为 {指标}_delta，
+    与汇总表的列名不同，ON DUPLICATE KEY UPDATE 中不会有歧义；
+    为 False 时用 VALUES(列名)，供 MariaDB 和 8.0.19 之前的 MySQL 使用。
+    """
+    columns = ", ".join(ROLLUP_METRICS)
+    events = " UNION ALL ".join(parts)
+    if row_alias:
+        deltas = ", ".join(f"{metric}_delta" for metric in ROLLUP_METRICS)
+        sums = ", ".join(f"SUM({metric}) AS {metric}_delta"
+                         for metric in ROLLUP_METRICS)
+        updates = ", ".join(f"{metric} = {metric} + new.{metric}_delta"
+                            for metric in ROLLUP_METRICS)
+        return f"""
+        INSERT INTO activity_rollup_hourly (source, bucket, node_type, {columns})
+        SELECT '{source}', bucket, node_type, {deltas}
+        FROM (
+            SELECT bucket, node_type, {sums}
+            FROM (
+                {events}
+            ) events
+            GROUP BY bucket, node_type
+        ) AS new
+        WHERE bucket IS NOT NULL
+        ON DUPLICATE KEY UPDATE {updates}
+    """
+    sums = ", ".join(f"SUM({metric})" for metric in ROLLUP_METRICS)
+    updates = ", ".join(f"{metric} = {metric} + VALUES({metric})"
+                        for metric in ROLLUP_METRICS)
+    return f"""
+        INSERT INTO activity_rollup_hourly (source, bucket, node_type, {columns})
+        SELECT '{source}', bucket, node_type, {sums}
+        FROM (
+            {events}
+        ) events
+        WHERE bucket IS NOT NULL
+        GROUP BY bucket, node_type
+        ON DUPLICATE KEY UPDATE {updates}
+    """
+
+
+def build_task_rollup_sql(row_alias: bool = True) -> str:
+    """任务事件：创建、开始、结束。
+
+    参数为创建窗口 (起, 止)，开始、结束各为 (updated_time 下界, 起, 止)。
+    """
+    return build_rollup_insert("task", [
+        f"""SELECT {hour_bucket('created_time')} {created_event_columns("''")}
+        FROM task WHERE created_time > %s AND created_time <= %s""",
+        f"""SELECT {hour_bucket('start_time')}, '', 0, 1, 0, 0, 0, 0, 0
+        FROM task
+        WHERE status IN ({', '.join(map(str, TASK_STATUSES))}) AND updated_time > %s
+            AND start_time > %s AND start_time <= %s""",
+        f"""SELECT {hour_bucket('end_time')}, '', 0, 0,
+            status = {TASK_STATUS_SUCCESS}, status = {TASK_STATUS_FAILED},
+            COALESCE(cost_time, 0), 0, 0
+        FROM task
+        WHERE status IN ({TASK_STATUS_SUCCESS}, {TASK_STATUS_FAILED})
+            AND updated_time > %s AND end_time > %s AND end_time <= %s""",
+    ], row_alias)
+
+
+def build_job_rollup_sql(include_history: bool, row_alias: bool = True) -> str:
+    """作业事件：创建与结束。全量重建时同时汇总 job_history。
+
+    参数依次为 job 创建窗口 (起, 止)、结束窗口 (open_min_id, 起, 止)，
+    包含 job_history 时再追加同样的两组参数（open_min_id 取 0）。
+    """
+    tables = ["job", "job_history"] if include_history else ["job"]
+    event_columns = created_event_columns("COALESCE(node_type, '')")
+    parts = []
+    for table in tables:
+        id_column = "job_id" if table == "job_history" else "id"
+        parts.append(f"""SELECT {hour_bucket('created_time')} {event_columns}
+        FROM {table} WHERE created_time > %s AND created_time <= %s""")
+        parts.append(f"""SELECT {hour_bucket('finished_time')},
+            COALESCE(node_type, ''), 0, 0,
+            status = {JOB_STATUS_SUCCESS}, status = {JOB_STATUS_FAILED},
+            COALESCE(cost_time, 0), COALESCE(cpu, 0), COALESCE(memory, 0)
+        FROM {table}
+        WHERE {id_column} >= %s
+            AND status IN ({JOB_STATUS_SUCCESS}, {JOB_STATUS_FAILED})
+            AND finished_time > %s AND finished_time <= %s""")
+    return build_rollup_insert("job", parts, row_alias)
+
+
+# 保存水位的 upsert，参数为 (汇总名称, 水位, open_min_id)
+ROLLUP_STATE_UPSERT_SQL = """
+    INSERT INTO rollup_state (name, watermark, open_min_id) VALUES (%s, %s, %s) AS new
+    ON DUPLICATE KEY UPDATE watermark = new.watermark, open_min_id = new.open_min_id
+"""
+
+# MariaDB 和 8.0.19 之前的 MySQL 不支持行别名，使用 VALUES()
+ROLLUP_STATE_UPSERT_SQL_VALUES = """
+    INSERT INTO rollup_state (name, watermark, open_min_id) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        watermark = VALUES(watermark), open_min_id = VALUES(open_min_id)
+"""
+
+
+def ensure_rollup_tables(mysql_manager: MySQLManager) -> None:
+    """汇总表不存在时创建。"""
+    for ddl in ROLLUP_TABLES_DDL:
+        mysql_manager.cursor.execute(ddl)
+
+
+def fetch_rollup_rows(mysql_manager: MySQLManager, query: str,
+                      params: Tuple) -> List[Tuple]:
+    """执行只读的汇总查询，汇总表尚未创建（从未 refresh）时返回空列表。"""
+    try:
+        mysql_manager.cursor.execute(query, params)
+    except Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return []
+        raise
+    return mysql_manager.cursor.fetchall()
+
+
+def fetch_rollup_watermark(mysql_manager: MySQLManager) -> Optional[datetime]:
+    """读取已汇总到的时间水位，从未 refresh 过时返回None。"""
+    rows = fetch_rollup_rows(
+        mysql_manager, "SELECT watermark FROM rollup_state WHERE name = %s",
+        (ROLLUP_NAME,))
+    return rows[0][0] if rows else None
+
+
+def get_rollup_lag() -> int:
+    """获取水位滞后秒数（rollup.lag_seconds，默认60秒）。"""
+    rollup_config = config.get("rollup") or {}
+    return int(rollup_config.get("lag_seconds", DEFAULT_ROLLUP_LAG_SECONDS))
+
+
+def load_rollup_state(
+        mysql_manager: MySQLManager) -> Optional[Tuple[datetime, Optional[int]]]:
+    """读取 (时间水位, open_min_id)，从未汇总过时返回None。"""
+    mysql_manager.cursor.execute(
+        "SELECT watermark, open_min_id FROM rollup_state WHERE name = %s FOR UPDATE",
+        (ROLLUP_NAME,))
+    row = mysql_manager.cursor.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def next_open_min_id(mysql_manager: MySQLManager, open_min_id: int,
+                     watermark: datetime) -> int:
+    """计算新的 open_min_id：最小的未结束（或在水位之后才结束）的作业ID，
+    没有这样的作业时为最大ID + 1。只在主键上从旧的下界开始范围扫描。"""
+    mysql_manager.cursor.execute(f"""
+        SELECT MIN(id) FROM job
+        WHERE id >= %s
+            AND (status NOT IN ({JOB_STATUS_SUCCESS}, {JOB_STATUS_FAILED})
+                OR finished_time > %s)
+    """, (open_min_id, watermark))
+    row = mysql_manager.cursor.fetchone()
+    if row and row[0] is not None:
+        return int(row[0])
+    mysql_manager.cursor.execute("SELECT MAX(id) FROM job")
+    row = mysql_manager.cursor.fetchone()
+    return max(int(row[0]) + 1 if row and row[0] is not None else 0, open_min_id)
+
+
+def refresh_rollup(mysql_manager: MySQLManager, full: bool = False) -> Dict[str, Any]:
+    """增量刷新汇总表，整个刷新在一个事务中完成。
+
+    Args:
+        full: 清空汇总表并从 job、job_history、task 全量重建
+
+    Returns:
+        包含 previous、watermark、open_min_id、affected_rows 的字典。affected_rows 是
+        INSERT ... ON DUPLICATE KEY UPDATE 报告的受影响行数：新建的小时桶计1，
+        累加到已有的小时桶计2，因此不等于汇总行数
+    """
+    ensure_rollup_tables(mysql_manager)
+    connection = mysql_manager.connection
+    cursor = mysql_manager.cursor
+    row_alias = supports_row_alias(connection)
+    try:
+        connection.start_transaction()
+        state = None if full else load_rollup_state(mysql_manager)
+
+        cursor.execute("SELECT NOW() - INTERVAL %s SECOND", (get_rollup_lag(),))
+        watermark = cursor.fetchone()[0]
+
+        if state is None:
+            cursor.execute("DELETE FROM activity_rollup_hourly")
+            previous, open_min_id = ROLLUP_EPOCH, 0
+        else:
+            previous, open_min_id = state
+            open_min_id = open_min_id or 0
+
+        affected_rows = 0
+        if watermark > previous:
+            cursor.execute(build_task_rollup_sql(row_alias),
+                           (previous, watermark) + (previous, previous, watermark) * 2)
+            affected_rows += max(cursor.rowcount, 0)
+
+            job_params = (previous, watermark, open_min_id, previous, watermark)
+            if state is None:
+                history_params = (previous, watermark, 0, previous, watermark)
+                cursor.execute(build_job_rollup_sql(True, row_alias),
+                               job_params + history_params)
+            else:
+                cursor.execute(build_job_rollup_sql(False, row_alias), job_params)
+            affected_rows += max(cursor.rowcount, 0)
+
+            open_min_id = next_open_min_id(mysql_manager, open_min_id, watermark)
+            if row_alias:
+                state_sql = ROLLUP_STATE_UPSERT_SQL
+            else:
+                state_sql = ROLLUP_STATE_UPSERT_SQL_VALUES
+            cursor.execute(state_sql, (ROLLUP_NAME, watermark, open_min_id))
+        else:
+            watermark = previous
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+    return {
+        "previous": None if state is None else previous,
+        "watermark": watermark,
+        "open_min_id": open_min_id,
+        "affected_rows": affected_rows,
+    }
+
+
+def fetch_rollup(mysql_manager: MySQLManager, source: str, since_seconds: int,
+                 by_day: bool = False, by_node_type: bool = False) -> List[Tuple]:
+    """按时间窗口读取汇总行，只扫描窗口内的小时桶。"""
+    bucket = "DATE(bucket)" if by_day else "bucket"
+    group = f"{bucket}, node_type" if by_node_type else bucket
+    node_type = "node_type" if by_node_type else "''"
+    return fetch_rollup_rows(mysql_manager, f"""
+        SELECT {bucket} AS period, {node_type},
+            {', '.join(f'SUM({metric})' for metric in ROLLUP_METRICS)}
+        FROM activity_rollup_hourly
+        WHERE source = %s AND bucket >= NOW() - INTERVAL %s SECOND
+        GROUP BY {group}
+        ORDER BY period DESC{', node_type' if by_node_type else ''}
+    """, (source, since_seconds))
+
+
+def fetch_rollup_job_stats(mysql_manager: MySQLManager,
+                           since_seconds: int) -> List[Tuple]:
+    """从汇总表按节点类型统计已结束的作业，结果列与 job stats 一致。
+
+    汇总中只有总和，分位数和最大耗时为空；作业按结束时间而不是创建时间计入窗口。
+    """
+    finished = "NULLIF(SUM(succeeded) + SUM(failed), 0)"
+    return fetch_rollup_rows(mysql_manager, f"""
+        SELECT node_type, SUM(succeeded) + SUM(failed), SUM(succeeded), SUM(failed),
+            SUM(cost_time) / {finished},
+            {', '.join(['NULL'] * len(JOB_STATS_PERCENTILES))}, NULL,
+            SUM(cpu) / {finished},
+            SUM(memory) / {finished}
+        FROM activity_rollup_hourly
+        WHERE source = 'job' AND bucket >= NOW() - INTERVAL %s SECOND
+        GROUP BY node_type
+        HAVING SUM(succeeded) + SUM(failed) > 0
+        ORDER BY 2 DESC, node_type
+    """, (since_seconds,))
+
+
+def print_rollup_table(rows: List[Tuple], by_day: bool, by_node_type: bool) -> None:
+    """打印汇总表格。"""
+    table_data = []
+    for row_values in rows:
+        period, node_type, submitted, started, succeeded, failed = row_values[:6]
+        cost_time, cpu, memory = row_values[6:]
+        finished = int(succeeded or 0) + int(failed or 0)
+        row = [period.strftime("%Y-%m-%d" if by_day else "%Y-%m-%d %H:00")]
+        if by_node_type:
+            row.append(node_type or "-")
+        row.extend([
+            int(submitted or 0),
+            int(started or 0),
+            int(succeeded or 0),
+            int(failed or 0),
+            format_rate(failed, finished),
+            format_seconds(cost_time / finished if finished else None),
+            format_number(cpu / finished if finished else None),
+            format_number(memory / finished if finished else None),
+        ])
+        table_data.append(row)
+
+    headers = ["日期" if by_day else "小时"] + (["节点类型"] if by_node_type else []) + [
+        "创建", "开始", "成功", "失败", "失败率", "平均耗时", "平均CPU", "平均内存(G)"]
+    print(tabulate(
+        table_data,
+        headers=headers,
+        tablefmt="grid",
+        numalign="left",
+        stralign="left",
+        disable_numparse=True
+    ))
+
+
+def handle_rollup(args) -> None:
+    """汇总命令的入口。"""
+    mysql_manager = MySQLManager(config_manager=config)
+
+    try:
+        command = getattr(args, 'rollup_command', None)
+        if command not in ("refresh", "show"):
+            raise ValueError("请指定子命令，例如: miqroforge rollup refresh")
+
+        if not mysql_manager.connect():
+            raise RuntimeError("无法连接到数据库")
+
+        # 每条语句单独成事务，刷新时显式开启事务
+        mysql_manager.connection.autocommit = True
+
+        if command == "refresh":
+            result = refresh_rollup(mysql_manager, full=getattr(args, 'full', False))
+            previous = result["previous"]
+            start = previous.strftime('%Y-%m-%d %H:%M:%S') if previous else "全量重建"
+            end = result['watermark'].strftime('%Y-%m-%d %H:%M:%S')
+            print(f"汇总已刷新: {start} → {end}, "
+                  f"受影响行数 {result['affected_rows']}, 未结束作业ID下界 {result['open_min_id']}")
+            return
+
+        source = getattr(args, 'source', None) or "job"
+        since = getattr(args, 'since', None) or "7d"
+        by_day = getattr(args, 'bucket', None) == "day"
+        by_node_type = source == "job" and getattr(args, 'by_node_type', False)
+        rows = fetch_rollup(mysql_manager, source, parse_duration(since), by_day,
+                            by_node_type)
+        if not rows:
+            print(f"最近 {since} 内没有汇总数据，请先执行 miqroforge rollup refresh")
+            return
+        print(f"\n最近 {since} 的{'作业' if source == 'job' else '任务'}活动汇总:")
+        print_rollup_table(rows, by_day, by_node_type)
+    except Exception as e:
+        print(f"错误：{e}")
+        sys.exit(1)
+    finally:
+        mysql_manager.disconnect()
@@ -1,17 +1,29 @@
 """显示任务列表相关的处理函数"""
 
 import sys
-from typing import List, Dict, Any, Union, Optional, Tuple
-from datetime import datetime
-from decimal import Decimal
+from collections import Counter
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple, Iterator, TextIO, Sequence
 from tabulate import tabulate
 
 from ..managers.mysql_manager import MySQLManager
 from ..config import config
+from ..profiling import span
+from .formatters import (
+    TableRowType,
+    TableColumnsType,
+    RowFormatter,
+    INT,
+    TEXT,
+    MESSAGE,
+    DATETIME,
+    mapping,
+    safe_int,
+)
+# 其他模块仍从 show 导入的类型和格式化函数
+from .formatters import RowItemType, format_datetime, format_error_message  # noqa: F401
 
 # 类型定义
-RowItemType = Union[int, str, None]
-TableRowType = List[RowItemType]
 RowDictType = Dict[str, Any]
 
 # 任务状态码到状态名称的映射
@@ -78,25 +90,32 @@ NODE_DISPLAY_FIELDS = ["id", "task_id", "name_cn", "name_en", "status", "data_di
 # 任务节点参数表要显示的字段列表
 NODE_PARAMS_DISPLAY_FIELDS = ["id", "task_id", "node_id", "type", "name_cn", "name_en", "param_code", "value"]
 
-def safe_int(value: Any) -> int:
-    """安全地将值转换为整数。"""
-    if isinstance(value, (int, Decimal)):
-        return int(value)
-    return 0
-
-def format_datetime(dt: Optional[datetime]) -> str:
-    """格式化日期时间。"""
-    if isinstance(dt, datetime):
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
-    return "-"
-
-def format_error_message(error_msg: Optional[str], max_length: int = 30) -> str:
-    """格式化错误信息。"""
-    if error_msg is None:
-        return "-"
-    if isinstance(error_msg, str) and len(error_msg) > max_length:
-        return error_msg[:max_length-3] + "..."
-    return str(error_msg)
+# 任务列表流式读取时每页的行数
+TASK_PAGE_SIZE = 500
+
+# 表格显示参数时 value 只取前缀的字符数
+PARAM_VALUE_PREVIEW_LENGTH = 80
+
+# 无法取得 max_allowed_packet 时导出参数值每次读取的字符数
+PARAM_VALUE_CHUNK_SIZE = 64 * 1024
+
+# utf8mb4 每个字符最多占用的字节数
+UTF8MB4_MAX_BYTES = 4
+
+# 结果行中除参数值以外的协议开销（字节）
+RESULT_ROW_OVERHEAD = 1024
+
+# 参数类型名称到类型码的映射
+PARAM_TYPE_CODES: Dict[str, int] = {
+    "input": 0,
+    "output": 1
+}
+
+# 参数类型码到类型名称的映射
+PARAM_TYPE_MAP: Dict[int, str] = {
+    0: "输入参数",
+    1: "输出参数"
+}
 
 def get_task_status_str(status_code: int) -> str:
     """获取任务状态字符串。"""
@@ -108,25 +127,74 @@ def get_node_status_str(status_code: int) -> str:
 
 def get_param_type_str(type_code: int) -> str:
     """获取参数类型字符串。"""
-    param_type_map = {
-        0: "输入参数",
-        1: "输出参数"
-    }
-    return param_type_map.get(type_code, "未知类型")
-
-def fetch_tasks(mysql_manager: MySQLManager, limit: int) -> List:
-    """从数据库获取任务列表。"""
-    if mysql_manager.cursor is None:
-        raise RuntimeError("数据库游标创建失败")
+    return PARAM_TYPE_MAP.get(type_code, "未知类型")
+
+# 各列表按显示字段编译好的行格式化器
+TASK_ROW_FORMATTER = RowFormatter(TASK_DISPLAY_FIELDS, {
+    "id": INT,
+    "name": TEXT,
+    "status": mapping(TASK_STATUS_MAP, "未知状态"),
+    "start_time": DATETIME,
+    "end_time": DATETIME,
+    "created_time": DATETIME,
+    "error_message": MESSAGE
+})
+
+NODE_ROW_FORMATTER = RowFormatter(NODE_DISPLAY_FIELDS, {
+    "id": INT,
+    "task_id": INT,
+    "name_cn": TEXT,
+    "name_en": TEXT,
+    "status": mapping(NODE_STATUS_MAP, "未知状态"),
+    "data_dir": TEXT,
+    "job_num": TEXT,
+    "created_time": DATETIME
+})
+
+NODE_PARAMS_ROW_FORMATTER = RowFormatter(NODE_PARAMS_DISPLAY_FIELDS, {
+    "id": INT,
+    "task_id": INT,
+    "node_id": INT,
+    "type": mapping(PARAM_TYPE_MAP, "未知类型"),
+    "name_cn": TEXT,
+    "name_en": TEXT,
+    "param_code": TEXT,
+    "value": TEXT
+})
+
+def iter_task_pages(mysql_manager: MySQLManager, limit: Optional[int] = None,
+                    before_id: Optional[int] = None, after_id: Optional[int] = None,
+                    page_size: int = TASK_PAGE_SIZE) -> Iterator[List]:
+    """按键集游标分页流式读取任务列表。
+
+    使用非缓冲游标逐页读取，内存占用与页大小相关而与表大小无关。
+    指定 after_id 时按 id 升序向更新的任务翻页，否则按 id 降序。
+    limit 为 None 时读取全部满足条件的任务。
+    """
+    conditions = []
+    params: List[int] = []
+    if before_id is not None:
+        conditions.append("id < %s")
+        params.append(before_id)
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = "ASC" if after_id is not None and before_id is None else "DESC"
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT %s"
+        params.append(limit)
 
     query = f"""
         SELECT {', '.join(TASK_DISPLAY_FIELDS)}
         FROM miqroforge.task 
-        ORDER BY id DESC 
-        LIMIT %s
+        {where_clause}
+        ORDER BY id {order} 
+        {limit_clause}
     """
-    mysql_manager.cursor.execute(query, (limit,))
-    return mysql_manager.cursor.fetchall()
+    yield from mysql_manager.stream(query, params, batch_size=page_size)
 
 def fetch_task_nodes(mysql_manager: MySQLManager, task_id: int) -> List:
     """从数据库获取指定任务的节点列表。"""
@@ -142,102 +210,287 @@ def fetch_task_nodes(mysql_manager: MySQLManager, task_id: int) -> List:
     mysql_manager.cursor.execute(query, (task_id,))
     return mysql_manager.cursor.fetchall()
 
-def fetch_node_params(mysql_manager: MySQLManager, node_id: int) -> List:
-    """从数据库获取指定节点的参数列表。"""
+def node_params_select(preview_length: Optional[int]) -> str:
+    """参数查询的字段列表。
+
+    指定预览长度时 value 只取前缀（LEFT(value, %s)），并在末尾附加 CHAR_LENGTH(value)，
+    longtext 的完整内容不离开数据库；预览长度作为第一个查询参数。
+    """
+    if preview_length is None:
+        return ', '.join(NODE_PARAMS_DISPLAY_FIELDS)
+    fields = ["LEFT(value, %s)" if field == "value" else field for field in NODE_PARAMS_DISPLAY_FIELDS]
+    return ', '.join(fields + ["CHAR_LENGTH(value)"])
+
+def fetch_node_params(mysql_manager: MySQLManager, node_id: int,
+                      preview_length: Optional[int] = PARAM_VALUE_PREVIEW_LENGTH) -> List:
+    """从数据库获取指定节点的参数列表，value 默认只取前缀。"""
     if mysql_manager.cursor is None:
         raise RuntimeError("数据库游标创建失败")
 
     query = f"""
-        SELECT {', '.join(NODE_PARAMS_DISPLAY_FIELDS)}
+        SELECT {node_params_select(preview_length)}
         FROM miqroforge.task_node_params 
         WHERE node_id = %s
         ORDER BY id ASC
     """
-    mysql_manager.cursor.execute(query, (node_id,))
+    params = (node_id,) if preview_length is None else (preview_length, node_id)
+    mysql_manager.cursor.execute(query, params)
     return mysql_manager.cursor.fetchall()
 
+def find_node_param(mysql_manager: MySQLManager, node_id: int, param_code: str,
+                    param_type: Optional[int] = None) -> Tuple[int, int, int]:
+    """查找节点的指定参数，返回 (参数ID, 参数类型, value 字符数)。"""
+    if mysql_manager.cursor is None:
+        raise RuntimeError("数据库游标创建失败")
+
+    query = """
+        SELECT id, type, CHAR_LENGTH(value)
+        FROM miqroforge.task_node_params
+        WHERE node_id = %s AND param_code = %s
+    """
+    params: List[Any] = [node_id, param_code]
+    if param_type is not None:
+        query += " AND type = %s"
+        params.append(param_type)
+    mysql_manager.cursor.execute(query + " ORDER BY type ASC", tuple(params))
+    rows = mysql_manager.cursor.fetchall()
+
+    if not rows:
+        raise ValueError(f"节点ID {node_id} 没有参数代码为 {param_code} 的参数")
+    if len(rows) > 1:
+        type_counts = Counter(safe_int(row[1]) for row in rows)
+        found = "、".join(f"{get_param_type_str(type_code)} {count} 条"
+                         for type_code, count in type_counts.items())
+        param_ids = ", ".join(str(safe_int(row[0])) for row in rows)
+        message = (f"节点ID {node_id} 的参数 {param_code} 有 {len(rows)} 条记录"
+                   f"（{found}，参数ID {param_ids}）")
+        if len(type_counts) > 1:
+            message += "，请用 --param-type input|output 指定"
+        raise ValueError(message)
+    param_id, type_code, length = rows[0]
+    return safe_int(param_id), safe_int(type_code), safe_int(length)
+
+def param_value_chunk_size(mysql_manager: MySQLManager) -> int:
+    """单次读取参数值的最大字符数：结果行不能超过 max_allowed_packet。
+
+    每次 SUBSTRING 服务端都要重新读取并解码整个 longtext，块越大查询次数越少；
+    参数值写入时同样受 max_allowed_packet 限制，通常一次即可读完。
+    结果超过 max_allowed_packet 时 SUBSTRING 返回 NULL，因此块大小不能超过该限制；
+    无法取得 max_allowed_packet 时使用 PARAM_VALUE_CHUNK_SIZE。
+    """
+    mysql_manager.cursor.execute("SELECT @@max_allowed_packet")
+    row = mysql_manager.cursor.fetchone()
+    packet = safe_int(row[0]) if row else 0
+    if packet <= 0:
+        return PARAM_VALUE_CHUNK_SIZE
+    return max((packet - RESULT_ROW_OVERHEAD) // UTF8MB4_MAX_BYTES, 1)
+
+def write_param_value(mysql_manager: MySQLManager, param_id: int, length: int, stream: TextIO,
+                      chunk_size: Optional[int] = None) -> int:
+    """按 SUBSTRING 分块读取参数值并写入输出流，客户端内存只与块大小有关。
+
+    未指定 chunk_size 时按 max_allowed_packet 取尽量大的块，见 param_value_chunk_size()。
+    读到的字符数与 length 不一致时（例如某块返回 NULL）抛出 RuntimeError，不当作导出成功。
+
+    Returns:
+        写入的字符数
+    """
+    if chunk_size is None and length > 0:
+        chunk_size = param_value_chunk_size(mysql_manager)
+    written = 0
+    while written < length:
+        mysql_manager.cursor.execute("""
+            SELECT SUBSTRING(value, %s, %s)
+            FROM miqroforge.task_node_params
+            WHERE id = %s
+        """, (written + 1, chunk_size, param_id))
+        row = mysql_manager.cursor.fetchone()
+        if row is None or not row[0]:
+            break
+        stream.write(row[0])
+        written += len(row[0])
+    if written != length:
+        raise RuntimeError(f"参数ID {param_id} 的值应有 {length} 个字符，只读取到 {written} 个字符")
+    return written
+
+def iter_task_nodes(mysql_manager: MySQLManager, task_id: int,
+                    page_size: int = TASK_PAGE_SIZE) -> Iterator[List]:
+    """流式分批读取指定任务的节点列表。"""
+    query = f"""
+        SELECT {', '.join(NODE_DISPLAY_FIELDS)}
+        FROM miqroforge.task_node 
+        WHERE task_id = %s
+        ORDER BY id ASC
+    """
+    yield from mysql_manager.stream(query, (task_id,), batch_size=page_size)
+
+def iter_node_params(mysql_manager: MySQLManager, node_id: Optional[int] = None,
+                     task_id: Optional[int] = None,
+                     page_size: int = TASK_PAGE_SIZE,
+                     preview_length: Optional[int] = None) -> Iterator[List]:
+    """流式分批读取节点参数，未指定节点和任务时读取整张 task_node_params 表。
+
+    默认读取完整的 value（用于导出），指定 preview_length 时只取前缀。
+    """
+    conditions = []
+    params: List[int] = [] if preview_length is None else [preview_length]
+    if node_id is not None:
+        conditions.append("node_id = %s")
+        params.append(node_id)
+    if task_id is not None:
+        conditions.append("task_id = %s")
+        params.append(task_id)
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT {node_params_select(preview_length)}
+        FROM miqroforge.task_node_params 
+        {where_clause}
+        ORDER BY id ASC
+    """
+    yield from mysql_manager.stream(query, params, batch_size=page_size)
+
 def format_task_row_data(row: Tuple) -> TableRowType:
     """格式化任务行数据。"""
-    row_dict = dict(zip(TASK_DISPLAY_FIELDS, row))
-    
-    return [
-        safe_int(row_dict["id"]),
-        str(row_dict["name"] or ""),
-        get_task_status_str(safe_int(row_dict["status"])),
-        format_datetime(row_dict["start_time"]),
-        format_datetime(row_dict["end_time"]),
-        format_datetime(row_dict["created_time"]),
-        format_error_message(row_dict["error_message"])
-    ]
+    return TASK_ROW_FORMATTER.format_row(row)
+
+def format_task_columns(rows: Sequence[Tuple]) -> TableColumnsType:
+    """按列批量格式化一页任务行数据，返回显示列。"""
+    return TASK_ROW_FORMATTER.format_columns(rows)
 
 def format_node_row_data(row: Tuple) -> TableRowType:
     """格式化任务节点行数据。"""
-    row_dict = dict(zip(NODE_DISPLAY_FIELDS, row))
-    
-    return [
-        safe_int(row_dict["id"]),
-        safe_int(row_dict["task_id"]),
-        str(row_dict["name_cn"] or ""),
-        str(row_dict["name_en"] or ""),
-        get_node_status_str(safe_int(row_dict["status"])),
-        str(row_dict["data_dir"] or ""),
-        str(row_dict["job_num"] or ""),
-        format_datetime(row_dict["created_time"])
-    ]
+    return NODE_ROW_FORMATTER.format_row(row)
+
+def format_node_columns(rows: Sequence[Tuple]) -> TableColumnsType:
+    """按列批量格式化任务节点行数据，返回显示列。"""
+    return NODE_ROW_FORMATTER.format_columns(rows)
+
+def format_param_value_length(value: str, length: Any) -> str:
+    """value 被截断（完整长度大于预览长度）时附加完整长度。"""
+    length = safe_int(length)
+    if length > len(value):
+        return f"{value}... (共 {length} 字符)"
+    return value
 
 def format_node_params_row_data(row: Tuple) -> TableRowType:
-    """格式化任务节点参数行数据。"""
-    row_dict = dict(zip(NODE_PARAMS_DISPLAY_FIELDS, row))
-    
-    return [
-        safe_int(row_dict["id"]),
-        safe_int(row_dict["task_id"]),
-        safe_int(row_dict["node_id"]),
-        get_param_type_str(safe_int(row_dict["type"])),
-        str(row_dict["name_cn"] or ""),
-        str(row_dict["name_en"] or ""),
-        str(row_dict["param_code"] or ""),
-        str(row_dict["value"] or "")
-    ]
-
-def print_task_table(table_data: List[TableRowType]) -> None:
-    """打印任务表格。"""
-    headers = [TASK_HEADERS_MAP[col] for col in TASK_DISPLAY_FIELDS]
-    
-    print("\n" + tabulate(
-        table_data,
-        headers=headers,
+    """格式化任务节点参数行数据，value 被截断时附加完整长度。"""
+    row_data = NODE_PARAMS_ROW_FORMATTER.format_row(row)
+    if len(row) > len(NODE_PARAMS_DISPLAY_FIELDS):
+        row_data[-1] = format_param_value_length(row_data[-1], row[len(NODE_PARAMS_DISPLAY_FIELDS)])
+    return row_data
+
+def format_node_params_columns(rows: Sequence[Tuple]) -> TableColumnsType:
+    """按列批量格式化任务节点参数行数据，返回显示列，value 被截断时附加完整长度。"""
+    columns = NODE_PARAMS_ROW_FORMATTER.format_columns(rows)
+    if rows and len(rows[0]) > len(NODE_PARAMS_DISPLAY_FIELDS):
+        lengths = map(itemgetter(len(NODE_PARAMS_DISPLAY_FIELDS)), rows)
+        columns[-1] = list(map(format_param_value_length, columns[-1], lengths))
+    return columns
+
+def render_table(headers: List[str], columns: TableColumnsType) -> str:
+    """按列渲染表格，列直接交给 tabulate，不再转置为行列表。"""
+    return tabulate(
+        dict(zip(headers, columns)),
+        headers="keys",
         tablefmt="grid",
         numalign="left",
         stralign="left"
-    ))
-    print(f"\n总计: {len(table_data)} 个任务")
+    )
+
+def print_task_table(columns: TableColumnsType) -> None:
+    """打印任务表格。"""
+    headers = [TASK_HEADERS_MAP[col] for col in TASK_DISPLAY_FIELDS]
+    
+    print("\n" + render_table(headers, columns))
+    print(f"\n总计: {len(columns[0])} 个任务")
+
+def print_task_pages(pages: Iterator[List]) -> Tuple[int, Optional[int]]:
+    """逐页格式化并打印任务表格，返回任务总数和最后一个任务ID。"""
+    headers = [TASK_HEADERS_MAP[col] for col in TASK_DISPLAY_FIELDS]
+    total = 0
+    last_id = None
+
+    for rows in pages:
+        with span("render.task_page", "render", rows=len(rows)):
+            columns = format_task_columns(rows)
+            print("\n" + render_table(headers, columns), flush=True)
+        total += len(rows)
+        last_id = columns[0][-1]
+
+    return total, last_id
 
-def print_node_table(table_data: List[TableRowType]) -> None:
+def print_node_table(columns: TableColumnsType) -> None:
     """打印任务节点表格。"""
     headers = [NODE_HEADERS_MAP[col] for col in NODE_DISPLAY_FIELDS]
     
-    print("\n" + tabulate(
-        table_data,
-        headers=headers,
-        tablefmt="grid",
-        numalign="left",
-        stralign="left"
-    ))
-    print(f"\n总计: {len(table_data)} 个节点")
+    print("\n" + render_table(headers, columns))
+    print(f"\n总计: {len(columns[0])} 个节点")
 
-def print_node_params_table(table_data: List[TableRowType]) -> None:
+def print_node_params_table(columns: TableColumnsType) -> None:
     """打印任务节点参数表格。"""
     headers = [NODE_PARAMS_HEADERS_MAP[col] for col in NODE_PARAMS_DISPLAY_FIELDS]
     
-    print("\n" + tabulate(
-        table_data,
-        headers=headers,
-        tablefmt="grid",
-        numalign="left",
-        stralign="left"
-    ))
-    print(f"\n总计: {len(table_data)} 个参数")
+    print("\n" + render_table(headers, columns))
+    print(f"\n总计: {len(columns[0])} 个参数")
+
+def export_show(args, mysql_manager: MySQLManager, fmt: str) -> None:
+    """以 JSONL/CSV/TSV/Parquet 格式直接从游标流式导出查询结果。"""
+    from .output import write_rows
+
+    if getattr(args, 'tree', False):
+        raise ValueError("--tree 不支持 --format，请使用默认的表格显示")
+
+    output = getattr(args, 'output', None)
+    page_size = getattr(args, 'page_size', None) or TASK_PAGE_SIZE
+    if page_size <= 0:
+        raise ValueError("每页任务数量必须是正整数")
+    task_id = safe_int(args.id) if getattr(args, 'id', None) is not None else None
+
+    if getattr(args, 'node_id', None) is not None:
+        columns = NODE_PARAMS_DISPLAY_FIELDS
+        batches = iter_node_params(mysql_manager, node_id=safe_int(args.node_id), page_size=page_size)
+    elif getattr(args, 'params', False):
+        columns = NODE_PARAMS_DISPLAY_FIELDS
+        batches = iter_node_params(mysql_manager, task_id=task_id, page_size=page_size)
+    elif task_id is not None:
+        columns = NODE_DISPLAY_FIELDS
+        batches = iter_task_nodes(mysql_manager, task_id, page_size=page_size)
+    else:
+        limit = None if getattr(args, 'all', False) else args.limit
+        if limit is not None and limit <= 0:
+            raise ValueError("任务数量必须是正整数")
+        columns = TASK_DISPLAY_FIELDS
+        batches = iter_task_pages(
+            mysql_manager,
+            limit=limit,
+            before_id=getattr(args, 'before_id', None),
+            after_id=getattr(args, 'after_id', None),
+            page_size=page_size,
+        )
+
+    write_rows(fmt, columns, batches, output)
+
+def export_param_value(args, mysql_manager: MySQLManager) -> None:
+    """将节点的一个参数的完整值写入 --output 指定的文件（默认标准输出）。"""
+    from .output import open_output
+
+    node_id = safe_int(args.node_id)
+    if node_id <= 0:
+        raise ValueError("节点ID必须是正整数")
+    param_type = getattr(args, 'param_type', None)
+    param_id, _, length = find_node_param(
+        mysql_manager,
+        node_id,
+        args.param,
+        PARAM_TYPE_CODES[param_type] if param_type is not None else None,
+    )
+
+    output = getattr(args, 'output', None)
+    with open_output(output) as stream:
+        written = write_param_value(mysql_manager, param_id, length, stream)
+    if output is not None and output != "-":
+        print(f"已将参数 {args.param}（参数ID {param_id}）的 {written} 个字符写入 {output}", file=sys.stderr)
 
 def handle_show(args) -> None:
     """查看任务列表、指定任务的节点列表或指定节点的参数列表。"""
@@ -246,6 +499,33 @@ def handle_show(args) -> None:
     try:
         if not mysql_manager.connect():
             raise RuntimeError("无法连接到数据库")
+
+        # 实时监视最新的任务，只增量查询发生变化的行
+        if getattr(args, 'watch', False):
+            if args.id is not None or args.node_id is not None or getattr(args, 'params', False):
+                raise ValueError("--watch 只能用于任务列表")
+            if args.limit <= 0:
+                raise ValueError("任务数量必须是正整数")
+            interval = getattr(args, 'interval', None) or 1.0
+            if interval <= 0:
+                raise ValueError("刷新间隔必须大于0")
+            from .task_watch import run_task_watch
+
+            run_task_watch(mysql_manager, args.limit, interval)
+            return
+
+        # 将单个参数的完整值分块写入文件
+        if getattr(args, 'param', None) is not None:
+            if args.node_id is None:
+                raise ValueError("--param 需要与 --node-id 一起使用")
+            export_param_value(args, mysql_manager)
+            return
+
+        # 机器可读格式直接从游标流式写出，不经过表格渲染
+        fmt = getattr(args, 'format', None) or "table"
+        if fmt != "table":
+            export_show(args, mysql_manager, fmt)
+            return
         
         # 如果指定了节点ID，则显示该节点的参数列表
         if hasattr(args, 'node_id') and args.node_id is not None:
@@ -261,16 +541,53 @@ def handle_show(args) -> None:
                 return
 
             # 格式化数据并显示
-            table_data = [format_node_params_row_data(row) for row in rows]
+            columns = format_node_params_columns(rows)
             print(f"\n节点ID {node_id} 的参数列表:")
-            print_node_params_table(table_data)
+            print_node_params_table(columns)
             
         # 如果指定了任务ID，则显示该任务的节点列表
         elif hasattr(args, 'id') and args.id is not None:
             task_id = safe_int(args.id)
             if task_id <= 0:
                 raise ValueError("任务ID必须是正整数")
+
+            # 显示该任务全部节点的参数列表
+            if getattr(args, 'params', False):
+                rows = [row for page in iter_node_params(mysql_manager, task_id=task_id,
+                                                         preview_length=PARAM_VALUE_PREVIEW_LENGTH)
+                        for row in page]
+                if not rows:
+                    print(f"没有找到任务ID为 {task_id} 的参数")
+                    return
+                columns = format_node_params_columns(rows)
+                print(f"\n任务ID {task_id} 的参数列表:")
+                print_node_params_table(columns)
+                return
             
+            # 关键路径分析：节点耗时、松弛时间和完工时间
+            if getattr(args, 'critical_path', False):
+                from .workflow import fetch_task_graph
+                from .critical_path import fetch_node_job_costs, analyze_critical_path, print_critical_path
+
+                graph = fetch_task_graph(mysql_manager, task_id)
+                if not graph["nodes"]:
+                    print(f"没有找到任务ID为 {task_id} 的节点")
+                    return
+                analysis = analyze_critical_path(graph, fetch_node_job_costs(mysql_manager, task_id))
+                print_critical_path(task_id, graph, analysis)
+                return
+
+            # 拓扑视图：一次性查询节点、参数和连线并按 DAG 打印
+            if getattr(args, 'tree', False):
+                from .workflow import fetch_task_graph, print_task_tree
+
+                graph = fetch_task_graph(mysql_manager, task_id)
+                if not graph["nodes"]:
+                    print(f"没有找到任务ID为 {task_id} 的节点")
+                    return
+                print_task_tree(task_id, graph)
+                return
+
             # 获取任务节点数据
             rows = fetch_task_nodes(mysql_manager, task_id)
             
@@ -279,20 +596,50 @@ def handle_show(args) -> None:
                 return
 
             # 格式化数据并显示
-            table_data = [format_node_row_data(row) for row in rows]
+            columns = format_node_columns(rows)
             print(f"\n任务ID {task_id} 的节点列表:")
-            print_node_table(table_data)
+            print_node_table(columns)
         else:
-            # 获取任务列表数据
-            rows = fetch_tasks(mysql_manager, args.limit)
-            
-            if not rows:
+            if getattr(args, 'tree', False):
+                raise ValueError("--tree 需要与 --id 一起使用")
+            if getattr(args, 'critical_path', False):
+                raise ValueError("--critical-path 需要与 --id 一起使用")
+            if getattr(args, 'params', False):
+                raise ValueError("导出全部参数请使用 --format jsonl|csv|tsv|parquet")
+
+            show_all = getattr(args, 'all', False)
+            before_id = getattr(args, 'before_id', None)
+            after_id = getattr(args, 'after_id', None)
+            limit = None if show_all else args.limit
+            page_size = getattr(args, 'page_size', None) or TASK_PAGE_SIZE
+            if limit is not None and limit <= 0:
+                raise ValueError("任务数量必须是正整数")
+            if page_size <= 0:
+                raise ValueError("每页任务数量必须是正整数")
+
+            # 分页流式读取任务列表数据，边读边显示
+            pages = iter_task_pages(
+                mysql_manager,
+                limit=limit,
+                before_id=before_id,
+                after_id=after_id,
+                page_size=page_size,
+            )
+            total, last_id = print_task_pages(pages)
+
+            if total == 0:
                 print("没有找到任何任务")
                 return
 
-            # 格式化数据并显示
-            table_data = [format_task_row_data(row) for row in rows]
-            print_task_table(table_data)
+            print(f"\n总计: {total} 个任务")
+            # 可能还有更多任务时，提示下一页的键集游标
+            if limit is not None and total == limit:
+                if after_id is not None and before_id is None:
+                    print(f"下一页: miqroforge task --after-id {last_id} --limit {limit}")
+                else:
+                    # 同时指定了 --after-id 时保留下界，不越过请求的范围
+                    lower = f" --after-id {after_id}" if after_id is not None else ""
+                    print(f"下一页: miqroforge task --before-id {last_id}{lower} --limit {limit}")
             
     except Exception as e:
         print(f"错误：{e}")
@@ -0,0 +1,97 @@
+"""服务状态（status）相关的处理函数"""
+
+import sys
+import time
+from typing import List, Dict, Any, Optional
+
+from tabulate import tabulate
+
+from ..config import config
+from ..managers.service_manager import ServiceManager, SERVICE_NAMES
+
+# 默认往返探测次数
+DEFAULT_STATUS_PROBES = 5
+
+
+def format_ms(seconds: Optional[float]) -> str:
+    """格式化耗时为毫秒。"""
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.1f}ms"
+
+
+def format_error(error: Any, max_length: int = 60) -> str:
+    """格式化错误信息为单行。"""
+    if error is None:
+        return ""
+    message = " ".join(str(error).split()) or type(error).__name__
+    if len(message) > max_length:
+        return message[:max_length - 3] + "..."
+    return message
+
+
+def build_status_rows(init_results: Dict[str, Dict[str, Any]],
+                      probe_results: Dict[str, Dict[str, Any]]) -> List[List[Any]]:
+    """合并初始化和往返探测结果为表格行。"""
+    rows = []
+    for name in SERVICE_NAMES:
+        init = init_results.get(name)
+        if init is None:
+            continue
+        probe = probe_results.get(name)
+        latencies = (probe or {}).get("value") or []
+        if not init["ok"]:
+            state = "超时" if init["timed_out"] else "不可用"
+            error = init["error"]
+        elif probe is not None and not probe["ok"]:
+            state = "探测超时" if probe["timed_out"] else "探测失败"
+            error = probe["error"]
+        else:
+            state = "正常"
+            error = None
+        rows.append([
+            name,
+            state,
+            format_ms(init["elapsed"]),
+            format_ms(min(latencies)) if latencies else "-",
+            format_ms(sum(latencies) / len(latencies)) if latencies else "-",
+            format_ms(max(latencies)) if latencies else "-",
+            format_error(error),
+        ])
+    return rows
+
+
+def handle_status(args) -> None:
+    """并发连接各后端服务，报告连接耗时和往返耗时。"""
+    service_manager = ServiceManager(config_manager=config)
+    try:
+        probes = getattr(args, 'probes', None) or DEFAULT_STATUS_PROBES
+        timeout = getattr(args, 'timeout', None)
+        if probes <= 0:
+            raise ValueError("探测次数必须是正整数")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("超时时间必须大于0")
+
+        start = time.perf_counter()
+        init_results = service_manager.init_services(SERVICE_NAMES, timeout)
+        probe_results = service_manager.probe_services(probes, timeout)
+        elapsed = time.perf_counter() - start
+
+        print(tabulate(
+            build_status_rows(init_results, probe_results),
+            headers=["服务", "状态", "连接耗时", "RTT最小", "RTT平均", "RTT最大", "错误"],
+            tablefmt="grid",
+            numalign="left",
+            stralign="left",
+            disable_numparse=True
+        ))
+        healthy = sum(1 for result in init_results.values() if result["ok"])
+        print(f"\n{healthy}/{len(init_results)} 个服务可用, 每个服务 {probes} 次往返探测, "
+              f"总用时 {elapsed:.2f}s")
+        if healthy < len(init_results):
+            sys.exit(1)
+    except Exception as e:
+        print(f"错误：{e}")
+        sys.exit(1)
+    finally:
+        service_manager.disconnect_all()
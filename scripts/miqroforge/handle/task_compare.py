@@ -0,0 +1,263 @@
+"""多个任务之间参数对比（task compare）相关的处理函数
+
+先用一次 IN 查询取得各任务全部参数的 MD5(value) 与 LENGTH(value)，
+参数值在数据库端计算摘要，不传输 longtext；只有摘要不一致的参数，
+才按每种取值各取一行读取完整的参数值。
+"""
+
+import sys
+from collections import defaultdict
+from string import ascii_uppercase
+from typing import List, Dict, Optional, Tuple
+
+from tabulate import tabulate
+
+from ..config import config
+from ..managers.mysql_manager import MySQLManager
+from .show import safe_int, get_param_type_str
+
+# 对比的参数键：(节点编码, 参数编码, 参数类型)
+ParamKey = Tuple[str, str, int]
+
+# 按ID读取完整参数值时每批的数量
+COMPARE_VALUE_BATCH_SIZE = 200
+
+# 差异详情中参数值片段的默认宽度
+DEFAULT_COMPARE_WIDTH = 60
+
+# 片段在第一个差异位置之前保留的字符数
+COMPARE_CONTEXT_CHARS = 10
+
+
+def fetch_param_digests(mysql_manager: MySQLManager, task_ids: List[int]) -> List[Tuple]:
+    """一次查询各任务全部参数的摘要，走 task_node_params 的 idx_task_id。
+
+    Returns:
+        (参数ID, 任务ID, 节点ID, 节点编码, 参数编码, 参数类型, MD5, 长度) 的列表
+    """
+    if mysql_manager.cursor is None:
+        raise RuntimeError("数据库游标创建失败")
+
+    placeholders = ", ".join(["%s"] * len(task_ids))
+    mysql_manager.cursor.execute(f"""
+        SELECT p.id, p.task_id, p.node_id, n.node_code, p.param_code, p.type,
+            MD5(p.value), LENGTH(p.value)
+        FROM miqroforge.task_node_params p
+        JOIN miqroforge.task_node n ON n.id = p.node_id
+        WHERE p.task_id IN ({placeholders})
+        ORDER BY p.task_id, p.node_id, p.id
+    """, tuple(task_ids))
+    return mysql_manager.cursor.fetchall()
+
+
+def fetch_param_values(mysql_manager: MySQLManager, param_ids: List[int]) -> Dict[int, str]:
+    """按参数ID分批读取完整的参数值。"""
+    values: Dict[int, str] = {}
+    for start in range(0, len(param_ids), COMPARE_VALUE_BATCH_SIZE):
+        batch = param_ids[start:start + COMPARE_VALUE_BATCH_SIZE]
+        mysql_manager.cursor.execute(f"""
+            SELECT id, value FROM miqroforge.task_node_params
+            WHERE id IN ({', '.join(['%s'] * len(batch))})
+        """, tuple(batch))
+        for param_id, value in mysql_manager.cursor.fetchall():
+            values[param_id] = value if value is not None else ""
+    return values
+
+
+def group_param_digests(rows: List[Tuple]) -> Dict[ParamKey, Dict[int, Tuple[int, str, int]]]:
+    """按参数键整理摘要：键 -> {任务ID: (参数ID, MD5, 长度)}。
+
+    同一任务中节点编码重复时（同一节点模板使用多次），按节点ID顺序编号为 code#2、code#3……
+    同一节点中参数编码和类型都相同的参数也按参数ID顺序编号，不会互相覆盖。
+    """
+    node_labels: Dict[int, str] = {}
+    code_counts: Dict[Tuple[int, str], int] = defaultdict(int)
+    param_counts: Dict[Tuple[int, str, int], int] = defaultdict(int)
+    digests: Dict[ParamKey, Dict[int, Tuple[int, str, int]]] = defaultdict(dict)
+    for param_id, task_id, node_id, node_code, param_code, param_type, digest, length in rows:
+        if node_id not in node_labels:
+            code = str(node_code or "")
+            code_counts[(task_id, code)] += 1
+            count = code_counts[(task_id, code)]
+            node_labels[node_id] = code if count == 1 else f"{code}#{count}"
+        code = str(param_code or "")
+        type_code = safe_int(param_type)
+        param_counts[(node_id, code, type_code)] += 1
+        count = param_counts[(node_id, code, type_code)]
+        param_label = code if count == 1 else f"{code}#{count}"
+        key = (node_labels[node_id], param_label, type_code)
+        digests[key][task_id] = (param_id, digest, safe_int(length))
+    return digests
+
+
+def find_differences(digests: Dict[ParamKey, Dict[int, Tuple[int, str, int]]],
+                     task_ids: List[int]) -> Dict[ParamKey, Dict[int, Optional[str]]]:
+    """找出各任务之间摘要不一致或缺失的参数，并为每种取值分配字母。
+
+    Returns:
+        参数键 -> {任务ID: 取值字母，缺失时为None}
+    """
+    differences: Dict[ParamKey, Dict[int, Optional[str]]] = {}
+    for key in sorted(digests):
+        by_task = digests[key]
+        variants = {(digest, length) for _, digest, length in by_task.values()}
+        if len(by_task) == len(task_ids) and len(variants) == 1:
+            continue
+        letters: Dict[Tuple[str, int], str] = {}
+        cells: Dict[int, Optional[str]] = {}
+        for task_id in task_ids:
+            item = by_task.get(task_id)
+            if item is None:
+                cells[task_id] = None
+                continue
+            variant = (item[1], item[2])
+            if variant not in letters:
+                letters[variant] = variant_letter(len(letters))
+            cells[task_id] = letters[variant]
+        differences[key] = cells
+    return differences
+
+
+def variant_representatives(by_task: Dict[int, Tuple[int, str, int]],
+                            cells: Dict[int, Optional[str]]) -> Dict[str, int]:
+    """每种取值取第一个任务的参数ID作为代表：取值字母 -> 参数ID。"""
+    representatives: Dict[str, int] = {}
+    for task_id, letter in cells.items():
+        if letter is not None:
+            representatives.setdefault(letter, by_task[task_id][0])
+    return representatives
+
+
+def variant_letter(index: int) -> str:
+    """取值编号：A、B、…、Z、A2、B2……"""
+    letter = ascii_uppercase[index % len(ascii_uppercase)]
+    round_number = index // len(ascii_uppercase)
+    return letter if round_number == 0 else f"{letter}{round_number + 1}"
+
+
+def common_prefix_length(values: List[str]) -> int:
+    """多个字符串的公共前缀长度。"""
+    if not values:
+        return 0
+    shortest = min(len(value) for value in values)
+    for index in range(shortest):
+        char = values[0][index]
+        if any(value[index] != char for value in values[1:]):
+            return index
+    return shortest
+
+
+def format_value_snippet(value: str, offset: int, width: int) -> str:
+    """截取从差异位置附近开始的参数值片段，换行压缩为空格。"""
+    start = max(offset - COMPARE_CONTEXT_CHARS, 0)
+    snippet = " ".join(value[start:start + width].split())
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + width < len(value) else ""
+    return f"{prefix}{snippet}{suffix}"
+
+
+def format_key_label(key: ParamKey) -> List[str]:
+    node_code, param_code, param_type = key
+    return [node_code or "-", param_code or "-", get_param_type_str(param_type)]
+
+
+def print_compare_matrix(task_ids: List[int], differences: Dict[ParamKey, Dict[int, Optional[str]]]) -> None:
+    """打印差异矩阵：每行一个参数，每列一个任务，相同字母表示取值相同。"""
+    table_data = [
+        format_key_label(key) + [cells[task_id] or "-" for task_id in task_ids]
+        for key, cells in differences.items()
+    ]
+    print(tabulate(
+        table_data,
+        headers=["节点", "参数", "类型"] + [str(task_id) for task_id in task_ids],
+        tablefmt="grid",
+        numalign="left",
+        stralign="left",
+        disable_numparse=True
+    ))
+
+
+def print_compare_variants(digests: Dict[ParamKey, Dict[int, Tuple[int, str, int]]],
+                           differences: Dict[ParamKey, Dict[int, Optional[str]]],
+                           values: Dict[int, str], width: int) -> None:
+    """打印每个差异参数各取值的长度、任务数和从第一个差异位置开始的片段。"""
+    table_data = []
+    for key, cells in differences.items():
+        task_counts: Dict[str, int] = defaultdict(int)
+        for letter in cells.values():
+            if letter is not None:
+                task_counts[letter] += 1
+
+        representatives = variant_representatives(digests[key], cells)
+        variant_values = {letter: values.get(param_id, "") for letter, param_id in representatives.items()}
+        offset = common_prefix_length(list(variant_values.values())) if len(variant_values) > 1 else 0
+        for index, (letter, value) in enumerate(variant_values.items()):
+            label = format_key_label(key) if index == 0 else ["", "", ""]
+            table_data.append(label + [
+                letter,
+                task_counts[letter],
+                len(value),
+                format_value_snippet(value, offset, width),
+            ])
+        missing = sum(1 for letter in cells.values() if letter is None)
+        if missing:
+            label = format_key_label(key) if not variant_values else ["", "", ""]
+            table_data.append(label + ["-", missing, "-", "(缺失)"])
+
+    print(tabulate(
+        table_data,
+        headers=["节点", "参数", "类型", "取值", "任务数", "长度", "参数值（自第一个差异处）"],
+        tablefmt="grid",
+        numalign="left",
+        stralign="left",
+        disable_numparse=True
+    ))
+
+
+def handle_task_compare(args) -> None:
+    """对比多个任务的节点参数，只显示不一致的参数。"""
+    mysql_manager = MySQLManager(config_manager=config)
+
+    try:
+        task_ids = list(dict.fromkeys(safe_int(task_id) for task_id in args.task_ids))
+        if any(task_id <= 0 for task_id in task_ids):
+            raise ValueError("任务ID必须是正整数")
+        if len(task_ids) < 2:
+            raise ValueError("请至少指定两个不同的任务ID")
+        width = getattr(args, 'width', None) or DEFAULT_COMPARE_WIDTH
+        if width <= 0:
+            raise ValueError("片段宽度必须是正整数")
+
+        if not mysql_manager.connect():
+            raise RuntimeError("无法连接到数据库")
+
+        rows = fetch_param_digests(mysql_manager, task_ids)
+        found = {row[1] for row in rows}
+        missing_tasks = [task_id for task_id in task_ids if task_id not in found]
+        if missing_tasks:
+            print(f"警告: 以下任务没有参数: {', '.join(map(str, missing_tasks))}")
+
+        digests = group_param_digests(rows)
+        differences = find_differences(digests, task_ids)
+        print(f"\n对比 {len(task_ids)} 个任务的 {len(digests)} 个参数: "
+              f"{len(digests) - len(differences)} 个相同, {len(differences)} 个不同")
+        if not differences:
+            return
+
+        # 每个差异参数的每种取值只读取一行完整参数值
+        param_ids = sorted({
+            param_id
+            for key, cells in differences.items()
+            for param_id in variant_representatives(digests[key], cells).values()
+        })
+        values = fetch_param_values(mysql_manager, param_ids)
+
+        print("\n差异矩阵（相同字母表示取值相同，- 表示缺失）:")
+        print_compare_matrix(task_ids, differences)
+        print("\n差异取值:")
+        print_compare_variants(digests, differences, values, width)
+    except Exception as e:
+        print(f"错误：{e}")
+        sys.exit(1)
+    finally:
+        mysql_manager.disconnect()
@@ -0,0 +1,219 @@
+"""任务列表实时监视（task --watch）相关的处理函数
+
+保持一个数据库连接，每次轮询只查询 updated_time 不早于上次水位的任务行，
+轮询开销与变化量成正比，与任务表大小无关。
+
+updated_time 是语句执行时的时间而不是提交时间，时间戳较早的事务可能在较晚的行
+已被读到之后才提交。因此水位不超过数据库当前时间减去 WATCH_LAG_SECONDS，
+最近这段时间内更新的行每次轮询都会重新查询，同一版本的行只计入一次。
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+from tabulate import tabulate
+
+from ..managers.mysql_manager import MySQLManager
+from .show import (
+    TASK_HEADERS_MAP,
+    TASK_DISPLAY_FIELDS,
+    safe_int,
+    format_task_row_data,
+    get_task_status_str,
+)
+from .terminal import LiveFrame
+
+# 监视时查询的字段：显示字段加上用于增量水位的 updated_time
+WATCH_TASK_FIELDS = TASK_DISPLAY_FIELDS + ["updated_time"]
+
+# 水位比数据库当前时间滞后的秒数，以容忍尚未提交的事务
+WATCH_LAG_SECONDS = 60
+
+# 状态变化高亮保持的秒数
+TRANSITION_HIGHLIGHT_SECONDS = 10
+
+# 各状态的终端颜色
+TASK_STATUS_COLORS: Dict[int, str] = {
+    2: "\033[36m",  # QUEUED
+    3: "\033[33m",  # RUNNING
+    4: "\033[32m",  # SUCCEED
+    5: "\033[31m",  # FAILED
+    6: "\033[90m",  # CANCELLED
+}
+
+ANSI_RESET = "\033[0m"
+ANSI_BOLD = "\033[1m"
+
+
+class TaskWatchState:
+    """最新 N 个任务的视图，按增量行更新并记录状态变化。"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.rows: Dict[int, Tuple] = {}
+        self.transitions: Dict[int, Tuple[int, float]] = {}
+        self.watermark: Optional[datetime] = None
+
+    def load(self, rows: List[Tuple], now: datetime) -> None:
+        """载入初始视图，水位为查询前取得的数据库时间减去滞后时间。"""
+        self.rows = {safe_int(row[0]): row for row in rows}
+        self.watermark = now - timedelta(seconds=WATCH_LAG_SECONDS)
+
+    def apply(self, rows: List[Tuple], now: datetime) -> int:
+        """合并一批增量行，返回实际发生变化的行数。
+
+        水位前移到已读到的最大 updated_time，但不超过 now 减去滞后时间；
+        重叠窗口内重复查询到的同一版本的行直接忽略。
+        """
+        status_index = WATCH_TASK_FIELDS.index("status")
+        updated_index = WATCH_TASK_FIELDS.index("updated_time")
+        oldest_id = min(self.rows) if len(self.rows) >= self.limit else None
+        max_seen = self.watermark
+        changed = 0
+        for row in rows:
+            updated_time = row[updated_index]
+            if isinstance(updated_time, datetime) and (max_seen is None or updated_time > max_seen):
+                max_seen = updated_time
+
+            task_id = safe_int(row[0])
+            previous = self.rows.get(task_id)
+            if previous == row:
+                # 重叠窗口内再次读到的同一版本（ID、updated_time 和内容都相同）
+                continue
+            if previous is None and oldest_id is not None and task_id < oldest_id:
+                # 不在最新 N 个任务范围内的旧任务
+                continue
+
+            if previous is not None and previous[status_index] != row[status_index]:
+                self.transitions[task_id] = (safe_int(previous[status_index]), time.monotonic())
+            self.rows[task_id] = row
+            changed += 1
+
+        if max_seen is not None:
+            watermark = min(max_seen, now - timedelta(seconds=WATCH_LAG_SECONDS))
+            if self.watermark is None or watermark > self.watermark:
+                self.watermark = watermark
+
+        # 新任务加入后只保留最新的 N 个
+        for task_id in sorted(self.rows)[:-self.limit]:
+            del self.rows[task_id]
+            self.transitions.pop(task_id, None)
+        return changed
+
+    def format_status(self, task_id: int, status: int, color: bool) -> str:
+        """格式化状态，最近发生变化的状态显示为 旧状态→新状态。"""
+        text = get_task_status_str(status)
+        highlight = False
+        transition = self.transitions.get(task_id)
+        if transition is not None:
+            previous, changed_at = transition
+            if time.monotonic() - changed_at <= TRANSITION_HIGHLIGHT_SECONDS:
+                text = f"{get_task_status_str(previous)}→{text}"
+                highlight = True
+            else:
+                del self.transitions[task_id]
+        if color:
+            prefix = (ANSI_BOLD if highlight else "") + TASK_STATUS_COLORS.get(status, "")
+            if prefix:
+                text = f"{prefix}{text}{ANSI_RESET}"
+        return text
+
+    def render(self, color: bool, poll_info: str) -> List[str]:
+        """渲染任务表格，按ID降序。"""
+        status_index = TASK_DISPLAY_FIELDS.index("status")
+        table_data = []
+        for task_id in sorted(self.rows, reverse=True):
+            row = self.rows[task_id]
+            formatted = format_task_row_data(row[:len(TASK_DISPLAY_FIELDS)])
+            formatted[status_index] = self.format_status(task_id, safe_int(row[status_index]), color)
+            table_data.append(formatted)
+
+        lines = [f"任务列表 ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')}) {poll_info}", ""]
+        lines.extend(tabulate(
+            table_data,
+            headers=[TASK_HEADERS_MAP[col] for col in TASK_DISPLAY_FIELDS],
+            tablefmt="grid",
+            numalign="left",
+            stralign="left"
+        ).splitlines())
+        lines.append("")
+        lines.append(f"总计: {len(table_data)} 个任务")
+        return lines
+
+
+def fetch_server_time(mysql_manager: MySQLManager) -> datetime:
+    """获取数据库服务器当前时间，用于限定增量水位。"""
+    mysql_manager.cursor.execute("SELECT NOW()")
+    return mysql_manager.cursor.fetchone()[0]
+
+
+def fetch_latest_tasks(mysql_manager: MySQLManager, limit: int) -> List[Tuple]:
+    """查询最新的 N 个任务。"""
+    query = f"""
+        SELECT {', '.join(WATCH_TASK_FIELDS)}
+        FROM miqroforge.task
+        ORDER BY id DESC
+        LIMIT %s
+    """
+    mysql_manager.cursor.execute(query, (limit,))
+    return mysql_manager.cursor.fetchall()
+
+
+def fetch_task_statuses(mysql_manager: MySQLManager) -> List[int]:
+    """查询任务表中出现的全部状态值，包括 TASK_STATUS_MAP 之外的状态码。
+
+    在 idx_status 上做松散索引扫描，只读取每个状态值的第一条索引项，开销与状态值个数成正比。
+    """
+    mysql_manager.cursor.execute("SELECT DISTINCT status FROM miqroforge.task")
+    return [row[0] for row in mysql_manager.cursor.fetchall()]
+
+
+def fetch_changed_tasks(mysql_manager: MySQLManager, since: datetime) -> List[Tuple]:
+    """查询 updated_time 不早于水位的任务行。
+
+    status 取表中实际出现的全部状态值（未知状态码的行同样会被刷新），使查询可以在
+    idx_status_updated_time 上按 (status, updated_time) 做范围扫描，只读取变化的行。
+    """
+    statuses = fetch_task_statuses(mysql_manager)
+    if not statuses:
+        return []
+    query = f"""
+        SELECT {', '.join(WATCH_TASK_FIELDS)}
+        FROM miqroforge.task
+        WHERE status IN ({', '.join(['%s'] * len(statuses))}) AND updated_time >= %s
+        ORDER BY updated_time ASC
+    """
+    mysql_manager.cursor.execute(query, (*statuses, since))
+    return mysql_manager.cursor.fetchall()
+
+
+def run_task_watch(mysql_manager: MySQLManager, limit: int, interval: float) -> None:
+    """在同一个连接上增量轮询任务变化，并原地刷新任务列表。"""
+    # 自动提交使每次轮询都能读到最新提交的数据，而不是同一个事务快照
+    mysql_manager.connection.autocommit = True
+
+    state = TaskWatchState(limit)
+    now = fetch_server_time(mysql_manager)
+    state.load(fetch_latest_tasks(mysql_manager, limit), now)
+
+    frame = LiveFrame()
+    poll_info = ""
+    changed = True
+    try:
+        while True:
+            # 输出不是终端时只在任务发生变化时输出新的一帧
+            if changed or frame.interactive:
+                lines = state.render(frame.interactive, poll_info)
+                lines.append("按 Ctrl+C 退出")
+                frame.render(lines)
+
+            time.sleep(interval)
+            start = time.perf_counter()
+            now = fetch_server_time(mysql_manager)
+            rows = fetch_changed_tasks(mysql_manager, state.watermark)
+            changed = state.apply(rows, now)
+            poll_info = (f"[轮询 {len(rows)} 行, 变化 {changed} 行, "
+                         f"{(time.perf_counter() - start) * 1000:.0f}ms]")
+    except KeyboardInterrupt:
+        pass
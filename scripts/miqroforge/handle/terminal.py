@@ -0,0 +1,43 @@
+"""终端原地刷新相关的辅助函数"""
+
+import sys
+from typing import List, TextIO, Optional
+
+
+class LiveFrame:
+    """在终端中原地刷新一帧多行文本，只重绘与上一帧不同的行。
+
+    输出不是终端时（例如重定向到文件），每次内容变化都完整输出一帧。
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+        self.interactive = self.stream.isatty()
+        self.lines: List[str] = []
+
+    def render(self, lines: List[str]) -> None:
+        """刷新显示内容。"""
+        if lines == self.lines:
+            return
+
+        if not self.interactive:
+            self.stream.write("\n".join(lines) + "\n\n")
+            self.stream.flush()
+            self.lines = list(lines)
+            return
+
+        out = []
+        if not self.lines:
+            # 首帧清屏
+            out.append("\033[2J\033[H")
+        for index, line in enumerate(lines):
+            if index >= len(self.lines) or self.lines[index] != line:
+                out.append(f"\033[{index + 1};1H{line}\033[K")
+        if len(lines) < len(self.lines):
+            # 新帧更短时清除多余的行
+            out.append(f"\033[{len(lines) + 1};1H\033[J")
+        out.append(f"\033[{len(lines) + 1};1H")
+
+        self.stream.write("".join(out))
+        self.stream.flush()
+        self.lines = list(lines)
@@ -0,0 +1,223 @@
+"""工作流（任务节点 DAG）相关的处理函数"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
+
+from ..managers.mysql_manager import MySQLManager
+from ..utils import format_seconds
+from .show import (
+    safe_int,
+    format_error_message,
+    get_node_status_str,
+)
+
+# 拓扑视图中节点要查询的字段列表
+TREE_NODE_FIELDS = ["id", "name_cn", "name_en", "node_code", "status", "job_num", "start_time", "finished_time"]
+
+# 拓扑视图中参数要查询的字段列表（value 只取前缀用于预览）
+TREE_PARAM_FIELDS = ["node_id", "type", "param_code", "value"]
+
+# 拓扑视图中节点关系要查询的字段列表
+TREE_RELATION_FIELDS = ["source_id", "source_param_code", "target_id", "target_param_code"]
+
+# 参数值预览的最大长度
+PARAM_PREVIEW_LENGTH = 40
+
+
+def fetch_task_graph(mysql_manager: MySQLManager, task_id: int) -> Dict[str, Any]:
+    """在同一个连接上批量查询任务的节点、参数和节点关系，并在内存中构建 DAG。
+
+    Returns:
+        包含 nodes（节点ID到节点字典，按ID升序）、params（节点ID到参数列表）、
+        edges（连线列表）、children/parents（节点ID到连线列表）的字典
+    """
+    if mysql_manager.cursor is None:
+        raise RuntimeError("数据库游标创建失败")
+    cursor = mysql_manager.cursor
+
+    cursor.execute(f"""
+        SELECT {', '.join(TREE_NODE_FIELDS)}
+        FROM miqroforge.task_node
+        WHERE task_id = %s
+        ORDER BY id ASC
+    """, (task_id,))
+    nodes = {row[0]: dict(zip(TREE_NODE_FIELDS, row)) for row in cursor.fetchall()}
+
+    params: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    cursor.execute("""
+        SELECT node_id, type, param_code, LEFT(value, %s)
+        FROM miqroforge.task_node_params
+        WHERE task_id = %s
+        ORDER BY node_id ASC, type ASC, id ASC
+    """, (PARAM_PREVIEW_LENGTH + 1, task_id))
+    for row in cursor.fetchall():
+        params[row[0]].append(dict(zip(TREE_PARAM_FIELDS, row)))
+
+    cursor.execute(f"""
+        SELECT {', '.join(TREE_RELATION_FIELDS)}
+        FROM miqroforge.task_node_relation
+        WHERE task_id = %s
+        ORDER BY id ASC
+    """, (task_id,))
+    edges = [dict(zip(TREE_RELATION_FIELDS, row)) for row in cursor.fetchall()]
+
+    children: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    parents: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for edge in edges:
+        # 忽略指向不属于该任务的节点的连线
+        if edge["source_id"] in nodes and edge["target_id"] in nodes:
+            children[edge["source_id"]].append(edge)
+            parents[edge["target_id"]].append(edge)
+
+    return {
+        "nodes": nodes,
+        "params": params,
+        "edges": edges,
+        "children": children,
+        "parents": parents,
+    }
+
+
+def cyclic_nodes(graph: Dict[str, Any]) -> Set[int]:
+    """返回环上的节点：节点数大于1的强连通分量中的节点，以及有自环的节点。
+
+    使用非递归的 Tarjan 算法，大型工作流也不会超出递归深度。
+    """
+    children = graph["children"]
+    index: Dict[int, int] = {}
+    lowlink: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack: Set[int] = set()
+    cyclic: Set[int] = set()
+
+    def visit(node_id: int) -> None:
+        index[node_id] = lowlink[node_id] = len(index)
+        stack.append(node_id)
+        on_stack.add(node_id)
+        work.append((node_id, iter(children.get(node_id, []))))
+
+    for root in graph["nodes"]:
+        if root in index:
+            continue
+        work: List[Tuple[int, Iterator[Dict[str, Any]]]] = []
+        visit(root)
+        while work:
+            node_id, edges = work[-1]
+            for edge in edges:
+                target_id = edge["target_id"]
+                if target_id == node_id:
+                    cyclic.add(node_id)
+                if target_id not in index:
+                    visit(target_id)
+                    break
+                if target_id in on_stack:
+                    lowlink[node_id] = min(lowlink[node_id], index[target_id])
+            else:
+                work.pop()
+                if work:
+                    parent_id = work[-1][0]
+                    lowlink[parent_id] = min(lowlink[parent_id], lowlink[node_id])
+                if lowlink[node_id] == index[node_id]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node_id:
+                            break
+                    if len(component) > 1:
+                        cyclic.update(component)
+    return cyclic
+
+
+def topological_levels(graph: Dict[str, Any]) -> List[Any]:
+    """按拓扑顺序返回 (节点ID, 层级) 列表，层级为从入口节点出发的最长边数。
+
+    环上的节点（见 cyclic_nodes()）追加在末尾，层级记为 -1；
+    环下游的节点忽略来自环的连线，照常计算层级。
+    """
+    nodes = graph["nodes"]
+    children = graph["children"]
+    cyclic = cyclic_nodes(graph)
+    in_degree = {node_id: 0 for node_id in nodes if node_id not in cyclic}
+    for node_id in in_degree:
+        for edge in children.get(node_id, []):
+            if edge["target_id"] in in_degree:
+                in_degree[edge["target_id"]] += 1
+
+    levels = {node_id: 0 for node_id in in_degree}
+    ready = [node_id for node_id in in_degree if in_degree[node_id] == 0]
+    order = []
+    while ready:
+        node_id = ready.pop(0)
+        order.append((node_id, levels[node_id]))
+        for edge in children.get(node_id, []):
+            target_id = edge["target_id"]
+            if target_id in cyclic:
+                continue
+            levels[target_id] = max(levels[target_id], levels[node_id] + 1)
+            in_degree[target_id] -= 1
+            if in_degree[target_id] == 0:
+                ready.append(target_id)
+
+    order.extend((node_id, -1) for node_id in nodes if node_id in cyclic)
+    return order
+
+
+def seconds_between(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    """两个时间点之间的秒数，任一时间缺失时返回 None。"""
+    if not isinstance(start, datetime) or not isinstance(end, datetime):
+        return None
+    return max((end - start).total_seconds(), 0.0)
+
+
+def format_node_label(node: Dict[str, Any]) -> str:
+    """格式化节点的单行标签。"""
+    name = node.get("name_cn") or node.get("name_en") or node.get("node_code") or ""
+    if node.get("name_en") and node.get("name_en") != name:
+        name = f"{name} ({node['name_en']})"
+    return f"#{safe_int(node['id'])} {name}"
+
+
+def format_params_line(params: List[Dict[str, Any]]) -> str:
+    """将同一类型的参数格式化为 code=value 的单行预览。"""
+    return ", ".join(
+        f"{param['param_code'] or '-'}={format_error_message(param['value'], PARAM_PREVIEW_LENGTH)}"
+        for param in params
+    )
+
+
+def print_task_tree(task_id: int, graph: Dict[str, Any]) -> None:
+    """按拓扑顺序一次性打印任务的节点、参数和上下游连线。"""
+    nodes = graph["nodes"]
+    params = graph["params"]
+    children = graph["children"]
+
+    print(f"\n任务ID {task_id} 的工作流 ({len(nodes)} 个节点, {len(graph['edges'])} 条连线):\n")
+
+    for node_id, level in topological_levels(graph):
+        node = nodes[node_id]
+        indent = "    " * max(level, 0)
+        level_str = f"L{level}" if level >= 0 else "环"
+        print(
+            f"{indent}[{level_str}] {format_node_label(node)} "
+            f"[{get_node_status_str(safe_int(node['status']))}] "
+            f"作业: {node['job_num'] if node['job_num'] is not None else '-'} "
+            f"耗时: {format_seconds(seconds_between(node['start_time'], node['finished_time']))}"
+        )
+
+        node_params = params.get(node_id, [])
+        inputs = [param for param in node_params if safe_int(param["type"]) == 0]
+        outputs = [param for param in node_params if safe_int(param["type"]) == 1]
+        if inputs:
+            print(f"{indent}    输入: {format_params_line(inputs)}")
+        if outputs:
+            print(f"{indent}    输出: {format_params_line(outputs)}")
+
+        for edge in children.get(node_id, []):
+            target = nodes[edge["target_id"]]
+            print(
+                f"{indent}    └─> {format_node_label(target)}  "
+                f"{edge['source_param_code'] or '-'} → {edge['target_param_code'] or '-'}"
+            )
@@ -1,17 +1,33 @@
 """MiqroForge 服务管理器包
 
 提供对Kubernetes、Docker、MySQL等服务的统一管理接口。
+各管理器在首次访问时才导入对应模块及其客户端库。
 """
 
-from .k8s_manager import KubernetesManager
-from .docker_manager import DockerManager
-from .mysql_manager import MySQLManager, SQLAlchemyManager
-from .service_manager import ServiceManager
+import importlib
+
+# 管理器名称到所在模块的映射
+_MANAGER_MODULES = {
+    "KubernetesManager": ".k8s_manager",
+    "DockerManager": ".docker_manager",
+    "ContainerdManager": ".containerd_manager",
+    "MySQLManager": ".mysql_manager",
+    "SQLAlchemyManager": ".mysql_manager",
+    "ServiceManager": ".service_manager",
+}
 
 __all__ = [
     "KubernetesManager",
     "DockerManager", 
+    "ContainerdManager",
     "MySQLManager",
     "SQLAlchemyManager",
     "ServiceManager"
 ]
+
+
+def __getattr__(name):
+    if name in _MANAGER_MODULES:
+        module = importlib.import_module(_MANAGER_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
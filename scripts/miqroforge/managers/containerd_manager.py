@@ -0,0 +1,164 @@
+"""k3s containerd 镜像管理器
+
+通过 k3s 内置的 ctr 命令管理 containerd 中的镜像。
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import logging
+from typing import Iterable, List, Optional
+
+from ..cache import TTLCache
+from ..profiling import traced
+from .image_ref import normalize_image_ref
+
+logger = logging.getLogger(__name__)
+
+# 镜像ID的进程内短期缓存，键为规范化的镜像引用，镜像不存在时值为False
+_image_id_cache = TTLCache(ttl=5.0)
+
+# 进度刷新的最小间隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+
+def format_bytes(size: float) -> str:
+    """格式化字节数"""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+class ContainerdManager:
+    """k3s containerd 镜像管理器"""
+
+    def __init__(self, ctr_command: Optional[List[str]] = None,
+                 crictl_command: Optional[List[str]] = None):
+        """初始化 ctr 和 crictl 命令
+
+        Args:
+            ctr_command: ctr 命令前缀，默认为 k3s ctr
+            crictl_command: crictl 命令前缀，默认为 crictl
+        """
+        self.ctr_command = ctr_command or ["k3s", "ctr"]
+        self.crictl_command = crictl_command or ["crictl"]
+
+    @traced("containerd.get_image_id", "containerd")
+    def get_image_id(self, image: str) -> Optional[str]:
+        """通过 CRI 直接查询单个镜像，获取镜像ID（配置摘要）
+
+        Args:
+            image: 镜像引用，支持省略 registry、:latest 和 @sha256 摘要形式
+
+        Returns:
+            镜像ID，例如 sha256:...，镜像不存在时返回None
+        """
+        key = normalize_image_ref(image)
+        image_id = _image_id_cache.get(key)
+        if image_id is None:
+            result = subprocess.run(
+                self.crictl_command + ["inspecti", "-o", "json", key],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            image_id = False
+            if result.returncode == 0:
+                try:
+                    image_id = json.loads(result.stdout)["status"]["id"] or False
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"解析 crictl inspecti 输出失败: {e}")
+            _image_id_cache.set(key, image_id)
+        return image_id or None
+
+    def has_image(self, image: str, image_id: Optional[str] = None) -> bool:
+        """检查镜像是否已在 containerd 中
+
+        Args:
+            image: 镜像引用
+            image_id: 期望的镜像ID（例如 Docker 中的镜像ID），指定时要求摘要一致
+
+        Returns:
+            镜像是否存在（且摘要一致）
+        """
+        containerd_id = self.get_image_id(image)
+        if containerd_id is None:
+            return False
+        return image_id is None or containerd_id == image_id
+
+    def invalidate(self, image: Optional[str] = None) -> None:
+        """清除镜像查询缓存，image 为None时清空全部"""
+        _image_id_cache.invalidate(normalize_image_ref(image) if image else None)
+
+    @traced("containerd.import_image", "containerd")
+    def import_image(self, chunks: Iterable[bytes], total_size: Optional[int] = None,
+                     show_progress: bool = True) -> int:
+        """将镜像 tar 流通过管道直接导入 containerd，不落盘临时文件
+
+        Args:
+            chunks: 镜像 tar 数据块迭代器（例如 docker save 的输出流）
+            total_size: 预计的总字节数，用于显示进度百分比
+            show_progress: 是否显示字节级进度
+
+        Returns:
+            导入的字节数
+        """
+        command = self.ctr_command + ["images", "import", "-"]
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file,
+            )
+            sent = 0
+            start = last_report = time.monotonic()
+            try:
+                for chunk in chunks:
+                    try:
+                        process.stdin.write(chunk)
+                    except BrokenPipeError:
+                        # ctr 提前退出，错误信息见 stderr
+                        break
+                    sent += len(chunk)
+                    now = time.monotonic()
+                    if show_progress and now - last_report >= PROGRESS_INTERVAL:
+                        self._print_progress(sent, total_size, now - start)
+                        last_report = now
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+                returncode = process.wait()
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+
+            if show_progress:
+                self._print_progress(sent, total_size, time.monotonic() - start)
+                print()
+
+            if returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', errors='replace').strip()
+                raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
+
+        self.invalidate()
+        logger.info(f"镜像导入 containerd 成功: {format_bytes(sent)}")
+        return sent
+
+    @staticmethod
+    def _print_progress(sent: int, total_size: Optional[int], elapsed: float) -> None:
+        rate = sent / elapsed if elapsed > 0 else 0
+        if total_size:
+            percent = min(sent / total_size * 100, 100)
+            progress = f"{format_bytes(sent)} / {format_bytes(total_size)} ({percent:.0f}%)"
+        else:
+            progress = format_bytes(sent)
+        sys.stdout.write(f"\r  importing: {progress}, {format_bytes(rate)}/s\033[K")
+        sys.stdout.flush()
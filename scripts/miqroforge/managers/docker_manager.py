@@ -4,14 +4,31 @@
 """
 
 import docker
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 import logging
 import json
+import hashlib
+import io
+import tarfile
 
 from docker.api import container
 
+from ..cache import load_json_cache, save_json_cache, TTLCache
+from ..profiling import traced
+from .image_ref import normalize_image_ref
+
 logger = logging.getLogger(__name__)
 
+# 镜像ID的进程内短期缓存，键为规范化的镜像引用，镜像不存在时值为False
+_image_id_cache = TTLCache(ttl=5.0)
+
+
+def node_metadata_cache_name(image_id: str, app_path: str) -> str:
+    """节点元数据缓存文件名，由镜像摘要和项目路径共同决定"""
+    digest = image_id.split(":", 1)[-1]
+    path_hash = hashlib.sha256(app_path.rstrip("/").encode("utf-8")).hexdigest()[:16]
+    return f"node_metadata/{digest}-{path_hash}.json"
+
 
 class DockerManager:
     """Docker容器管理器"""
@@ -75,6 +92,10 @@ class DockerManager:
             logger.error(f"Docker连接测试失败: {e}")
             return False
 
+    def ping(self) -> None:
+        """向 Docker 守护进程发起一次 /_ping 请求，失败时抛出异常"""
+        self.client.ping()
+
     def list_images(self) -> List[str]:
         """列出所有镜像"""
         images = self.client.images.list()
@@ -86,35 +107,56 @@ class DockerManager:
 
         return image_names
 
+    @traced("docker.get_image_id", "docker")
+    def get_image_id(self, image: str) -> Optional[str]:
+        """直接 inspect 镜像获取镜像ID（配置摘要），不遍历镜像列表
+        
+        Args:
+            image: 镜像引用，支持省略 registry、:latest 和 @sha256 摘要形式
+            
+        Returns:
+            镜像ID，例如 sha256:...，镜像不存在时返回None
+        """
+        key = normalize_image_ref(image)
+        image_id = _image_id_cache.get(key)
+        if image_id is None:
+            try:
+                image_id = self.client.images.get(image).id
+            except docker.errors.ImageNotFound:
+                image_id = False
+            _image_id_cache.set(key, image_id)
+        return image_id or None
+
+    def invalidate(self, image: Optional[str] = None) -> None:
+        """清除镜像查询缓存，image 为None时清空全部"""
+        _image_id_cache.invalidate(normalize_image_ref(image) if image else None)
+
     def check_image_exists(self, image: str) -> bool:
-        if ":" not in image:
-            image = f"{image}:latest"
-        # print(f"image: {image}")
         """检查镜像是否存在"""
-        for image_name in self.list_images():
-            # print(f"image_name: {image_name}")
-            if image == image_name:
-                return True
-        return False
+        return self.get_image_id(image) is not None
     
-    def pull(self, image: str, show_progress: bool = True) -> bool:
+    @traced("docker.pull", "docker")
+    def pull(self, image: str, show_progress: bool = True, quiet: bool = False) -> bool:
         """拉取镜像
         
         Args:
             image: 镜像名称
             show_progress: 是否显示进度条，默认为True
+            quiet: 不打印任何输出（不显示进度），在工作线程中拉取时使用，失败只记录日志
             
         Returns:
             拉取是否成功
         """
         if self.check_image_exists(image):
-            print(f"Image {image} already exists, skip pulling.")
+            if not quiet:
+                print(f"Image {image} already exists, skip pulling.")
             return True
 
-        print(f"Pulling image: {image}")
+        if not quiet:
+            print(f"Pulling image: {image}")
         
         try:
-            if show_progress:
+            if show_progress and not quiet:
                 # 使用带进度显示的拉取方式，实现真正的进度条效果
                 for line in self.client.api.pull(image, stream=True, decode=True):
                     if 'id' in line and 'status' in line:
@@ -137,43 +179,138 @@ class DockerManager:
                 # 静默拉取
                 self.client.images.pull(image)
                 
-            print(f"Pull image success: {image}")
+            _image_id_cache.invalidate(normalize_image_ref(image))
+            if not quiet:
+                print(f"Pull image success: {image}")
             return True
             
         except Exception as e:
-            print(f"Pull image failed: {image}, error: {e}")
+            if not quiet:
+                print(f"Pull image failed: {image}, error: {e}")
             logger.error(f"拉取镜像失败: {image}, 错误: {e}")
             return False
     
+    def export_image(self, image: str, chunk_size: int = 2 * 1024 * 1024):
+        """以流的形式导出镜像（等价于 docker save），保留仓库和标签信息
+        
+        Args:
+            image: 镜像名称
+            chunk_size: 每个数据块的字节数
+            
+        Returns:
+            (tar 数据块迭代器, 镜像大小字节数)
+        """
+        image_obj = self.client.images.get(image)
+        tag = image if ":" in image.rsplit("/", 1)[-1] else f"{image}:latest"
+        named = tag if tag in image_obj.tags else True
+        return image_obj.save(chunk_size=chunk_size, named=named), image_obj.attrs.get("Size")
+    
     def connect(self) -> bool:
         """连接Docker"""
         return self.test_connection()
 
+    def read_container_file(self, container_obj, path: str) -> Optional[bytes]:
+        """通过 get_archive 从容器文件系统读取单个文件，容器无需启动
+        
+        Args:
+            container_obj: 容器对象
+            path: 容器内文件路径
+            
+        Returns:
+            文件内容，文件不存在时返回None
+        """
+        try:
+            bits, _ = container_obj.get_archive(path)
+        except docker.errors.NotFound:
+            return None
+        
+        with tarfile.open(fileobj=io.BytesIO(b"".join(bits))) as tar:
+            for member in tar:
+                if member.isfile():
+                    return tar.extractfile(member).read()
+        return None
+
+    @traced("docker.read_node_metadata", "docker")
+    def read_node_metadata(self, image: str, app_path: str) -> Dict[str, Any]:
+        """一次性读取镜像中的 node.json 和 help.md
+        
+        只创建容器而不启动，用 get_archive 读取文件，镜像中不需要 bash。
+        
+        Args:
+            image: 镜像名称
+            app_path: 项目路径
+            
+        Returns:
+            {"node_json": 解析后的 node.json, "description": help.md 内容}
+        """
+        app_path = app_path.rstrip("/") or "/"
+        container_obj = self.client.containers.create(image, command=["true"])
+        try:
+            node_json_bytes = self.read_container_file(container_obj, f"{app_path}/node.json")
+            if node_json_bytes is None:
+                raise FileNotFoundError(f"{app_path}/node.json not found in {image}")
+            description_bytes = self.read_container_file(container_obj, f"{app_path}/help.md")
+        finally:
+            container_obj.remove(force=True)
+        
+        return {
+            "node_json": json.loads(node_json_bytes.decode('utf-8')),
+            "description": description_bytes.decode('utf-8') if description_bytes else '',
+        }
+
+    def get_node_metadata(self, image: str, app_path: str) -> Dict[str, Any]:
+        """获取节点元数据，按镜像摘要和项目路径缓存
+        
+        镜像未变化时直接使用本地缓存，无需创建容器。
+        
+        Args:
+            image: 镜像名称
+            app_path: 项目路径
+            
+        Returns:
+            {"node_json": 解析后的 node.json, "description": help.md 内容}
+        """
+        image_id = self.get_image_id(image)
+        if image_id is None:
+            raise docker.errors.ImageNotFound(f"image {image} not found")
+        cache_name = node_metadata_cache_name(image_id, app_path)
+        metadata = load_json_cache(cache_name)
+        if metadata is None:
+            metadata = self.read_node_metadata(image, app_path)
+            save_json_cache(cache_name, metadata)
+        else:
+            logger.info(f"使用缓存的节点元数据: {image} ({image_id})")
+        return metadata
+
     def get_node_description(self, image: str, app_path: str) -> str:
         """获取节点描述"""
-        container = None
         try:
-            container = self.client.containers.run(image, command=f"bash -c 'cd {app_path} && cat help.md'", detach=False, remove=True)
-            description = container.decode('utf-8')
+            description = self.get_node_metadata(image, app_path)["description"]
             print(f"description: \n{description}\n")
             return description
         except Exception as e:
             logger.error(f"get node description failed: {e}")
-            self.remove_failed_containers()
             return ''
 
-    def get_node_json(self, image: str, app_path: str) -> dict:
-        """获取节点JSON"""
-        container = None
+    def get_node_json(
+        self, image: str, app_path: str, show_description: bool = True
+    ) -> dict:
+        """获取节点JSON
+
+        Args:
+            image: 镜像名称
+            app_path: 项目路径
+            show_description: 是否打印 help.md 内容，并发读取时应关闭以免输出交错
+        """
         try:
-            container = self.client.containers.run(image, command=f"bash -c 'cd {app_path} && cat node.json'", detach=False, remove=True)
-            node_json_str = container.decode('utf-8')
-            node_json = json.loads(node_json_str)
-            node_json['description'] = self.get_node_description(image, app_path)
+            metadata = self.get_node_metadata(image, app_path)
+            node_json = metadata["node_json"]
+            node_json['description'] = metadata["description"]
+            if show_description:
+                print(f"description: \n{metadata['description']}\n")
             return node_json
         except Exception as e:
             logger.error(f"read node.json failed: {e}")
-            self.remove_failed_containers()
             return None
 
     def list_containers(self, all_containers: bool = True) -> List[dict]:
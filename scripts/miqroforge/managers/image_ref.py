@@ -0,0 +1,41 @@
+"""镜像引用规范化
+
+Docker 与 containerd 对同一镜像的写法不同（例如 ubuntu、ubuntu:latest、
+docker.io/library/ubuntu:latest），比较前统一规范化为完整引用。
+"""
+
+DEFAULT_REGISTRY = "docker.io"
+DEFAULT_TAG = "latest"
+
+
+def normalize_image_ref(ref: str) -> str:
+    """将镜像引用规范化为 registry/repository:tag 或 registry/repository@digest
+
+    Args:
+        ref: 镜像引用，例如 ubuntu、miqroera01/app:v1、repo@sha256:...
+
+    Returns:
+        规范化后的完整引用，例如 docker.io/library/ubuntu:latest
+    """
+    ref = ref.strip()
+    name, _, digest = ref.partition("@")
+
+    # 标签在最后一个 / 之后的冒号后面，避免把 registry 端口当成标签
+    tag = ""
+    last_slash = name.rfind("/")
+    colon = name.rfind(":")
+    if colon > last_slash:
+        name, tag = name[:colon], name[colon + 1:]
+
+    first, _, rest = name.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        registry, repository = first, rest
+    else:
+        registry, repository = DEFAULT_REGISTRY, name
+    if registry == DEFAULT_REGISTRY and "/" not in repository:
+        repository = f"library/{repository}"
+
+    normalized = f"{registry}/{repository}"
+    if digest:
+        return f"{normalized}:{tag}@{digest}" if tag else f"{normalized}@{digest}"
+    return f"{normalized}:{tag or DEFAULT_TAG}"
@@ -3,8 +3,8 @@
 提供对Kubernetes集群的基本连接接口。
 """
 
-from kubernetes import client, config
-from typing import Optional
+from kubernetes import client, config, watch
+from typing import Any, Iterator, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -61,3 +61,54 @@ class KubernetesManager:
         except Exception as e:
             logger.error(f"Kubernetes连接测试失败: {e}")
             return False
+
+    def ping(self, timeout: Optional[float] = None) -> None:
+        """向 API Server 发起一次轻量请求（/version），失败时抛出异常
+        
+        Args:
+            timeout: 请求超时时间（秒）
+        """
+        client.VersionApi(self.v1.api_client).get_code(_request_timeout=timeout)
+
+    def _list_func(self, kind: str):
+        """获取指定资源类型的 list 接口"""
+        list_funcs = {
+            "node": self.v1.list_node,
+            "pod": self.v1.list_pod_for_all_namespaces,
+        }
+        if kind not in list_funcs:
+            raise ValueError(f"不支持的资源类型: {kind}")
+        return list_funcs[kind]
+
+    def list_resources(self, kind: str) -> Tuple[List[Any], str]:
+        """全量列出指定类型的资源
+        
+        Args:
+            kind: 资源类型，node 或 pod
+            
+        Returns:
+            (资源对象列表, 列表的 resourceVersion)，用于之后从该版本开始 watch
+        """
+        result = self._list_func(kind)()
+        return result.items, result.metadata.resource_version
+
+    def watch_resources(self, kind: str, resource_version: str,
+                        timeout_seconds: int = 300) -> Iterator[Tuple[str, Any]]:
+        """从指定版本开始监听资源变化，服务端只推送增量事件
+        
+        resourceVersion 过期时抛出 status 为 410 的 ApiException，调用方需要重新 list。
+        
+        Args:
+            kind: 资源类型，node 或 pod
+            resource_version: 开始监听的 resourceVersion
+            timeout_seconds: 单次 watch 请求的超时时间，超时后迭代正常结束
+            
+        Returns:
+            (事件类型, 资源对象) 的迭代器，事件类型为 ADDED/MODIFIED/DELETED/BOOKMARK
+        """
+        w = watch.Watch()
+        for event in w.stream(self._list_func(kind),
+                              resource_version=resource_version,
+                              timeout_seconds=timeout_seconds,
+                              allow_watch_bookmarks=True):
+            yield event["type"], event["object"]
@@ -5,19 +5,215 @@
 
 import mysql.connector
 from mysql.connector import Error
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 import logging
+import threading
+import time
+import weakref
 from urllib.parse import quote_plus
 
+from ..profiling import span, trace_cursor
+
 logger = logging.getLogger(__name__)
 
+# 连接池大小上限（与 mysql.connector 自带连接池的上限一致）
+POOL_MAX_SIZE = 32
+
+# 连接池注册表：连接参数相同的 MySQLManager 共享同一个连接池
+_pools: Dict[Tuple, "ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+
+
+class PoolError(Error):
+    """连接池耗尽或已关闭"""
+
+
+def _release_unclosed(pool: "ConnectionPool", connection) -> None:
+    """借出后未 close() 的连接被回收时归还连接池，避免名额永久占用"""
+    logger.warning("MySQL连接借出后未归还，被回收时归还连接池")
+    pool.release(connection)
+
+
+class PooledConnection:
+    """从连接池借出的连接，属性和方法转发给底层连接，close() 时归还连接池
+    
+    未 close() 就被回收（例如异常路径上丢失引用）时由终结器归还。
+    """
+    
+    def __init__(self, pool: "ConnectionPool", connection):
+        object.__setattr__(self, "_connection", connection)
+        finalizer = weakref.finalize(self, _release_unclosed, pool, connection)
+        # 解释器退出时不再归还，进程结束时连接随之断开
+        finalizer.atexit = False
+        object.__setattr__(self, "_finalizer", finalizer)
+    
+    def __getattr__(self, name: str):
+        if self._connection is None:
+            raise PoolError("连接已归还连接池")
+        return getattr(self._connection, name)
+    
+    def __setattr__(self, name: str, value) -> None:
+        if self._connection is None:
+            raise PoolError("连接已归还连接池")
+        setattr(self._connection, name, value)
+    
+    def close(self) -> None:
+        """归还连接池（不断开连接）"""
+        # 取消终结器后再归还，close() 与回收只会归还一次
+        detached = self._finalizer.detach()
+        if detached is not None:
+            object.__setattr__(self, "_connection", None)
+            _, _, (pool, connection), _ = detached
+            pool.release(connection)
+
+
+class ConnectionPool:
+    """有界连接池
+    
+    按需建立连接，最多 size 个；记录全部已建立的连接，
+    close() 时断开空闲连接，仍被借出的连接在归还时断开。
+    """
+    
+    def __init__(self, size: int, **connect_args):
+        self.size = size
+        self.connect_args = connect_args
+        self.closed = False
+        self._idle: List = []
+        self._connections: List = []
+        self._opening = 0
+        self._condition = threading.Condition()
+    
+    def get_connection(self, timeout: float) -> PooledConnection:
+        """借出一个连接，没有空闲连接且已达上限时最多等待 timeout 秒"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self.closed:
+                    raise PoolError("连接池已关闭")
+                if self._idle:
+                    return PooledConnection(self, self._idle.pop())
+                if len(self._connections) + self._opening < self.size:
+                    self._opening += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolError(f"连接池已耗尽（{self.size} 个连接都已借出）")
+                self._condition.wait(remaining)
+        
+        # 在锁外建立连接，失败时释放名额
+        try:
+            connection = mysql.connector.connect(**self.connect_args)
+        except BaseException:
+            with self._condition:
+                self._opening -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opening -= 1
+            self._connections.append(connection)
+        return PooledConnection(self, connection)
+    
+    def release(self, connection) -> None:
+        """归还连接：重置会话状态后放回空闲列表，重置失败或连接池已关闭时断开"""
+        keep = not self.closed
+        if keep:
+            try:
+                connection.reset_session()
+            except Error as e:
+                logger.warning(f"重置MySQL会话失败，断开该连接: {e}")
+                keep = False
+        with self._condition:
+            if keep and not self.closed:
+                self._idle.append(connection)
+                self._condition.notify()
+                return
+            self._connections.remove(connection)
+            self._condition.notify()
+        self._disconnect(connection)
+    
+    def close(self) -> None:
+        """关闭连接池：断开全部空闲连接，仍被借出的连接在归还时断开"""
+        with self._condition:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            for connection in idle:
+                self._connections.remove(connection)
+            self._condition.notify_all()
+        for connection in idle:
+            self._disconnect(connection)
+    
+    @staticmethod
+    def _disconnect(connection) -> None:
+        try:
+            connection.close()
+        except Error as e:
+            logger.error(f"关闭MySQL连接失败: {e}")
+
+
+def get_pool(host: str, port: int, user: str, password: str, database: str,
+             pool_size: int = 5) -> ConnectionPool:
+    """获取（必要时创建）指定连接参数的连接池
+    
+    Args:
+        host: 数据库主机地址
+        port: 端口号
+        user: 用户名
+        password: 密码
+        database: 数据库名
+        pool_size: 连接池大小，不超过 POOL_MAX_SIZE
+        
+    Returns:
+        连接池实例
+    """
+    key = (host, port, user, password, database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool_size = max(1, min(int(pool_size), POOL_MAX_SIZE))
+            pool = ConnectionPool(
+                pool_size,
+                host=host,
+                port=port,
+                user=user,
+                password=password,
+                database=database,
+            )
+            _pools[key] = pool
+            logger.info(f"MySQL连接池创建成功 (host: {host}, size: {pool_size})")
+        return pool
+
+
+def supports_row_alias(connection) -> bool:
+    """INSERT 是否支持行别名（VALUES (...) AS new / new.列名）
+
+    MySQL 8.0.19 起支持，VALUES(列名) 自 8.0.20 起弃用；
+    MariaDB 和更早的 MySQL 只支持 VALUES()。
+    """
+    if "MariaDB" in connection.get_server_info():
+        return False
+    return connection.get_server_version() >= (8, 0, 19)
+
+
+def close_pools() -> None:
+    """关闭所有连接池：立即断开空闲连接，仍被借出的连接在归还时断开
+    
+    之后的 get_pool 会创建新的连接池。
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
 
 class MySQLManager:
     """MySQL数据库管理器"""
     
     def __init__(self, host: Optional[str] = None, user: Optional[str] = None, 
                  password: Optional[str] = None, database: Optional[str] = None, 
-                 port: Optional[int] = None, config_manager=None):
+                 port: Optional[int] = None, config_manager=None,
+                 pooled: Optional[bool] = None, pool_size: Optional[int] = None,
+                 pool_timeout: Optional[float] = None):
         """初始化MySQL连接参数
         
         Args:
@@ -27,6 +223,10 @@ class MySQLManager:
             database: 数据库名，如果为None则自动从配置管理器读取
             port: 端口号，如果为None则自动从配置管理器读取
             config_manager: 配置管理器实例，如果为None则使用默认配置
+            pooled: 是否从连接池获取连接，如果为None则从配置管理器读取；
+                连接参数全部显式给出时不读取配置，默认不使用连接池
+            pool_size: 连接池大小，如果为None则同 pooled 从配置管理器读取或默认为5
+            pool_timeout: 连接池耗尽时等待连接的秒数，如果为None则同 pooled 从配置管理器读取或默认为10
         """
         # 如果没有提供参数，从配置管理器读取
         if any(param is None for param in [host, user, password, database, port]):
@@ -45,15 +245,47 @@ class MySQLManager:
                 database = mysql_config.get("database", "miqroforge")
             if port is None:
                 port = mysql_config.get("port", 3306)
+            if pooled is None:
+                pooled = bool(mysql_config.get("pool", False))
+            if pool_size is None:
+                pool_size = mysql_config.get("pool_size", 5)
+            if pool_timeout is None:
+                pool_timeout = mysql_config.get("pool_timeout", 10)
+        
+        # 显式给出全部连接参数的调用方不读取配置文件
+        if pooled is None:
+            pooled = False
+        if pool_size is None:
+            pool_size = 5
+        if pool_timeout is None:
+            pool_timeout = 10
         
         self.host = host
         self.user = user
         self.password = password
         self.database = database
         self.port = port
+        self.pooled = pooled
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
         self.connection = None
         self.cursor = None
     
+    def __enter__(self) -> "MySQLManager":
+        """获取连接（连接池模式下从池中借出）"""
+        if not self.connect():
+            raise RuntimeError("无法连接到数据库")
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """归还连接，发生异常时回滚未提交的事务"""
+        if exc_type is not None and self.connection is not None:
+            try:
+                self.connection.rollback()
+            except Error as e:
+                logger.error(f"MySQL事务回滚失败: {e}")
+        self.disconnect()
+    
     def connect(self) -> bool:
         """建立数据库连接
         
@@ -61,26 +293,50 @@ class MySQLManager:
             连接是否成功
         """
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                port=self.port
-            )
-            self.cursor = self.connection.cursor()
+            with span("mysql.connect", "sql", pooled=bool(self.pooled)):
+                if self.pooled:
+                    self.connection = self._checkout()
+                else:
+                    self.connection = mysql.connector.connect(
+                        host=self.host,
+                        user=self.user,
+                        password=self.password,
+                        database=self.database,
+                        port=self.port
+                    )
+            self.cursor = trace_cursor(self.connection.cursor())
             logger.info("MySQL连接成功")
             return True
         except Error as e:
             logger.error(f"MySQL连接失败: {e}")
             return False
     
+    def _checkout(self):
+        """从连接池借出一个连接，池耗尽时等待，借出后做健康检查
+        
+        Returns:
+            池化连接，close() 时归还连接池
+        """
+        pool = get_pool(self.host, self.port, self.user, self.password,
+                        self.database, self.pool_size)
+        connection = pool.get_connection(self.pool_timeout)
+        
+        try:
+            # 空闲连接可能已被服务端断开，必要时重连
+            connection.ping(reconnect=True, attempts=2, delay=0)
+        except Error:
+            connection.close()
+            raise
+        return connection
+    
     def disconnect(self):
-        """断开数据库连接"""
+        """断开数据库连接（连接池模式下归还连接）"""
         if self.cursor:
             self.cursor.close()
         if self.connection:
             self.connection.close()
+        self.cursor = None
+        self.connection = None
         logger.info("MySQL连接已断开")
     
     def is_connected(self) -> bool:
@@ -91,6 +347,44 @@ class MySQLManager:
         """
         return self.connection is not None and self.connection.is_connected()
 
+    def ping(self) -> None:
+        """在当前连接上执行一次服务端往返（COM_PING），失败时抛出异常"""
+        if self.connection is None:
+            raise RuntimeError("数据库未连接")
+        self.connection.ping(reconnect=False)
+
+    def stream(self, query: str, params: Sequence = (), 
+               batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        """使用非缓冲（服务端）游标分批读取查询结果
+        
+        结果集由服务端逐批下发，客户端内存占用只与 batch_size 有关，
+        适合遍历大表。迭代未结束前不能在同一连接上执行其它查询。
+        
+        Args:
+            query: SQL语句
+            params: SQL参数
+            batch_size: 每批读取的行数
+            
+        Returns:
+            按批返回行列表的迭代器
+        """
+        if self.connection is None:
+            raise RuntimeError("数据库未连接")
+        
+        cursor = trace_cursor(self.connection.cursor(buffered=False))
+        try:
+            cursor.execute(query, tuple(params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # 提前结束迭代时丢弃剩余结果，保证连接可以继续使用
+            if self.connection.unread_result:
+                self.connection.consume_results()
+            cursor.close()
+
 
 class SQLAlchemyManager:
     """SQLAlchemy数据库管理器"""
@@ -149,4 +443,12 @@ class SQLAlchemyManager:
         """
         return self.engine is not None
 
+    def ping(self) -> None:
+        """通过连接池中的连接执行 SELECT 1，失败时抛出异常"""
+        if self.engine is None:
+            raise RuntimeError("数据库未连接")
+        from sqlalchemy import text
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
 
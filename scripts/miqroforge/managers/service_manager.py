@@ -3,11 +3,81 @@
 提供对Kubernetes、Docker、MySQL等服务的统一管理接口。
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional, Union
 import logging
+import threading
+import time
+
+from ..profiling import span
 
 logger = logging.getLogger(__name__)
 
+# 受管理的服务名称
+SERVICE_NAMES = ["kubernetes", "docker", "mysql", "sqlalchemy"]
+
+# 服务名称到 ServiceManager 属性名的映射
+SERVICE_ATTRS = {
+    "kubernetes": "k8s",
+    "docker": "docker",
+    "mysql": "mysql",
+    "sqlalchemy": "sqlalchemy",
+}
+
+# 每个服务初始化（含首次往返）的默认期限（秒）
+DEFAULT_SERVICE_TIMEOUT = 5.0
+
+
+def run_with_deadlines(funcs: Dict[str, Callable[[], Any]], timeouts: Dict[str, float],
+                       on_abandoned: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Dict[str, Any]]:
+    """在守护线程中并发执行多个函数，每个函数有独立的期限
+    
+    超时的线程无法被强制终止，会在后台继续运行直到返回，其结果被丢弃，
+    返回值交给 on_abandoned 做清理（例如关闭迟到的连接）。
+    
+    Args:
+        funcs: 名称到无参函数的映射
+        timeouts: 名称到期限秒数的映射
+        on_abandoned: 超时函数最终返回时的清理回调，参数为 (名称, 返回值)
+        
+    Returns:
+        名称到结果的映射，结果包含 ok、value、error、elapsed、timed_out
+    """
+    lock = threading.Lock()
+    outcomes = {name: {"ok": False, "value": None, "error": None, "elapsed": None, "timed_out": False}
+                for name in funcs}
+    
+    def run(name: str, func: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        try:
+            value, error = func(), None
+        except Exception as e:
+            value, error = None, e
+        with lock:
+            outcome = outcomes[name]
+            if outcome["timed_out"]:
+                abandoned = True
+            else:
+                abandoned = False
+                outcome.update(ok=error is None, value=value, error=error,
+                               elapsed=time.perf_counter() - start)
+        if abandoned and value is not None and on_abandoned is not None:
+            on_abandoned(name, value)
+    
+    threads = {}
+    start = time.monotonic()
+    for name, func in funcs.items():
+        thread = threading.Thread(target=run, args=(name, func), name=f"service-{name}", daemon=True)
+        thread.start()
+        threads[name] = thread
+    
+    for name, thread in threads.items():
+        thread.join(max(start + timeouts[name] - time.monotonic(), 0))
+        with lock:
+            if thread.is_alive() and outcomes[name]["elapsed"] is None:
+                outcomes[name]["timed_out"] = True
+                outcomes[name]["error"] = TimeoutError(f"超过 {timeouts[name]:g} 秒未完成")
+    return outcomes
+
 
 class ServiceManager:
     """综合服务管理器"""
@@ -23,6 +93,7 @@ class ServiceManager:
         self.docker = None
         self.mysql = None
         self.sqlalchemy = None
+        self.init_results: Dict[str, Dict[str, Any]] = {}
     
     def init_kubernetes(self, config_file: Optional[str] = None, 
                        context: Optional[str] = None) -> bool:
@@ -127,32 +198,129 @@ class ServiceManager:
             logger.error(f"SQLAlchemy初始化失败: {e}")
             return False
     
-    def init_all_services(self) -> bool:
-        """初始化所有服务（使用默认配置）
+    def _service_timeouts(self, timeout: Union[None, float, Dict[str, float]]) -> Dict[str, float]:
+        """解析各服务的期限：参数优先，其次为配置 services.timeout，最后为默认值"""
+        if isinstance(timeout, dict):
+            return {name: float(timeout.get(name, DEFAULT_SERVICE_TIMEOUT)) for name in SERVICE_NAMES}
+        if timeout is None:
+            config_manager = self.config_manager
+            if config_manager is None:
+                from ..config import config as config_manager
+            services_config = config_manager.get("services") or {}
+            timeout = services_config.get("timeout")
+        return {name: float(timeout or DEFAULT_SERVICE_TIMEOUT) for name in SERVICE_NAMES}
+    
+    def _traced_connect(self, name: str) -> Any:
+        with span(f"service.connect.{name}", "service"):
+            return self._connect_service(name)
+
+    def _connect_service(self, name: str) -> Any:
+        """创建服务客户端并完成一次往返，失败时抛出异常（不修改自身状态）"""
+        if name == "kubernetes":
+            from .k8s_manager import KubernetesManager
+            manager = KubernetesManager(config_manager=self.config_manager)
+        elif name == "docker":
+            from .docker_manager import DockerManager
+            manager = DockerManager(config_manager=self.config_manager)
+        elif name == "mysql":
+            from .mysql_manager import MySQLManager
+            manager = MySQLManager(config_manager=self.config_manager)
+            if not manager.connect():
+                raise RuntimeError("MySQL连接失败")
+        elif name == "sqlalchemy":
+            from .mysql_manager import SQLAlchemyManager
+            manager = SQLAlchemyManager(config_manager=self.config_manager)
+            if not manager.connect():
+                raise RuntimeError("SQLAlchemy连接失败")
+        else:
+            raise ValueError(f"未知的服务: {name}")
+        
+        # 客户端构造不一定访问网络，用一次往返确认服务可达
+        try:
+            manager.ping()
+        except Exception:
+            self._release_client(name, manager)
+            raise
+        return manager
+    
+    @staticmethod
+    def _release_client(name: str, manager: Any) -> None:
+        """释放不再使用的客户端"""
+        if name == "mysql":
+            manager.disconnect()
+        elif name == "sqlalchemy" and manager.engine is not None:
+            manager.engine.dispose()
+    
+    def init_services(self, names: Optional[List[str]] = None,
+                      timeout: Union[None, float, Dict[str, float]] = None) -> Dict[str, Dict[str, Any]]:
+        """并发初始化指定服务，每个服务有独立期限
         
+        Args:
+            names: 要初始化的服务名称，默认为全部服务
+            timeout: 期限秒数，或服务名称到期限的映射；默认读取配置 services.timeout
+            
         Returns:
-            是否全部初始化成功
+            服务名称到结果的映射，结果包含 ok、error、elapsed（连接耗时）、timed_out
         """
-        success_count = 0
+        names = names or SERVICE_NAMES
+        timeouts = self._service_timeouts(timeout)
+        outcomes = run_with_deadlines(
+            {name: (lambda name=name: self._traced_connect(name)) for name in names},
+            timeouts,
+            on_abandoned=self._release_client,
+        )
         
-        # 初始化Kubernetes
-        if self.init_kubernetes():
-            success_count += 1
+        for name, outcome in outcomes.items():
+            manager = outcome.pop("value")
+            if outcome["ok"]:
+                setattr(self, SERVICE_ATTRS[name], manager)
+                logger.info(f"{name} 初始化成功，耗时 {outcome['elapsed'] * 1000:.0f}ms")
+            else:
+                setattr(self, SERVICE_ATTRS[name], None)
+                logger.error(f"{name} 初始化失败: {outcome['error']}")
+        self.init_results = outcomes
+        return outcomes
+    
+    def init_all_services(self, timeout: Union[None, float, Dict[str, float]] = None) -> bool:
+        """并发初始化所有服务（使用默认配置），单个服务不可达不会阻塞其它服务
         
-        # 初始化Docker
-        if self.init_docker():
-            success_count += 1
+        Args:
+            timeout: 每个服务的期限秒数，或服务名称到期限的映射
+            
+        Returns:
+            是否全部初始化成功
+        """
+        outcomes = self.init_services(SERVICE_NAMES, timeout)
+        success_count = sum(1 for outcome in outcomes.values() if outcome["ok"])
         
-        # 初始化MySQL
-        if self.init_mysql():
-            success_count += 1
+        logger.info(f"服务初始化完成: {success_count}/{len(SERVICE_NAMES)} 个服务连接成功")
+        return success_count == len(SERVICE_NAMES)
+    
+    def probe_services(self, count: int = 5,
+                       timeout: Union[None, float, Dict[str, float]] = None) -> Dict[str, Dict[str, Any]]:
+        """对已连接的服务并发做 count 次往返探测
         
-        # 初始化SQLAlchemy
-        if self.init_sqlalchemy():
-            success_count += 1
+        Args:
+            count: 每个服务的探测次数
+            timeout: 每个服务全部探测的期限秒数，或服务名称到期限的映射
+            
+        Returns:
+            服务名称到结果的映射，value 为各次往返耗时（秒）列表
+        """
+        def probe(manager: Any) -> List[float]:
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                manager.ping()
+                latencies.append(time.perf_counter() - start)
+            return latencies
         
-        logger.info(f"服务初始化完成: {success_count}/4 个服务连接成功")
-        return success_count == 4
+        funcs = {}
+        for name in SERVICE_NAMES:
+            manager = getattr(self, SERVICE_ATTRS[name])
+            if manager is not None:
+                funcs[name] = lambda manager=manager: probe(manager)
+        return run_with_deadlines(funcs, self._service_timeouts(timeout))
     
     def get_service_status(self) -> Dict[str, Any]:
         """获取各服务连接状态
@@ -199,6 +367,7 @@ class ServiceManager:
             self.mysql = None
         
         if self.sqlalchemy:
+            self._release_client("sqlalchemy", self.sqlalchemy)
             self.sqlalchemy = None
         
         self.k8s = None
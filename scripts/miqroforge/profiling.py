@@ -0,0 +1,275 @@
+"""运行时性能剖析（--profile / MIQROFORGE_TRACE）
+
+span() 记录一段代码的耗时，traced() 以装饰器的形式记录整个函数，
+trace_cursor() 包装数据库游标，记录每条 SQL 的耗时和行数。
+未启用时 span() 返回共享的空上下文管理器，trace_cursor() 原样返回游标，
+开销只有一次全局变量判断。
+
+启用后在进程退出时写出 Chrome trace-event 格式的 JSON
+（可在 chrome://tracing 或 https://ui.perfetto.dev 中打开），
+并向标准错误输出按名称汇总的耗时表。
+"""
+
+import atexit
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+# 启用剖析的环境变量，值为 trace 文件路径
+TRACE_ENV = "MIQROFORGE_TRACE"
+
+# 未指定路径时的 trace 文件名
+DEFAULT_TRACE_PATH = "miqroforge-trace.json"
+
+# 汇总表显示的最大行数
+SUMMARY_LIMIT = 30
+
+# SQL 在 span 名称中保留的最大长度
+SQL_NAME_LENGTH = 80
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _NullSpan:
+    """未启用剖析时使用的空 span。"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        return None
+
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一段被计时的代码，退出时记录为一个 trace 事件。"""
+
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.category, self.start, end, self.args)
+
+    def set(self, **args: Any) -> None:
+        """附加参数，例如行数；rows 会在汇总表中累计。"""
+        self.args.update(args)
+
+
+class Tracer:
+    """线程安全地收集 trace 事件。"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.origin = time.perf_counter_ns()
+        self.events: List[Dict[str, Any]] = []
+        self.threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, category: str, start: int, end: int, args: Dict[str, Any]) -> None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+            self.threads.setdefault(thread.ident, thread.name)
+
+    def write(self) -> None:
+        """写出 Chrome trace-event 格式的 JSON。"""
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"},
+                      f, ensure_ascii=False, default=str)
+
+    def summary_rows(self) -> List[List[Any]]:
+        """按名称汇总：次数、总耗时、平均、最大（毫秒）和累计行数，按总耗时降序。"""
+        totals: Dict[str, List[float]] = defaultdict(list)
+        rows: Dict[str, int] = defaultdict(int)
+        with self._lock:
+            for event in self.events:
+                totals[event["name"]].append(event["dur"] / 1000)
+                count = event["args"].get("rows")
+                if isinstance(count, int) and count > 0:
+                    rows[event["name"]] += count
+        result = []
+        for name, durations in sorted(totals.items(), key=lambda item: sum(item[1]), reverse=True):
+            result.append([
+                name,
+                len(durations),
+                f"{sum(durations):.1f}",
+                f"{sum(durations) / len(durations):.1f}",
+                f"{max(durations):.1f}",
+                rows[name] if name in rows else "-",
+            ])
+        return result
+
+    def print_summary(self) -> None:
+        from tabulate import tabulate
+
+        rows = self.summary_rows()
+        if not rows:
+            return
+        print(f"\n性能剖析汇总（共 {len(self.events)} 个事件，trace 已写入 {self.path}）:", file=sys.stderr)
+        print(tabulate(
+            rows[:SUMMARY_LIMIT],
+            headers=["名称", "次数", "总耗时(ms)", "平均(ms)", "最大(ms)", "行数"],
+            tablefmt="grid",
+            numalign="left",
+            stralign="left",
+            disable_numparse=True
+        ), file=sys.stderr)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enable(path: Optional[str] = None) -> Tracer:
+    """启用剖析，进程退出时写出 trace 文件并打印汇总。重复调用返回同一个 Tracer。"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path or DEFAULT_TRACE_PATH)
+        atexit.register(_finish)
+    return _tracer
+
+
+def enable_from_env() -> Optional[Tracer]:
+    """环境变量 MIQROFORGE_TRACE 非空时启用剖析。"""
+    path = os.environ.get(TRACE_ENV)
+    return enable(path) if path else None
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def _finish() -> None:
+    tracer = _tracer
+    if tracer is None:
+        return
+    try:
+        tracer.write()
+        tracer.print_summary()
+    except Exception as e:
+        print(f"写出性能剖析结果失败: {e}", file=sys.stderr)
+
+
+def span(name: str, category: str = "app", **args: Any):
+    """记录一段代码的耗时：
+
+        with span("docker.pull", image=image) as s:
+            ...
+            s.set(rows=count)
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return Span(_tracer, name, category, args)
+
+
+def traced(name: str, category: str = "app") -> Callable:
+    """记录整个函数调用耗时的装饰器（不适用于生成器函数）。"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with Span(_tracer, name, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def sql_name(operation: Any) -> str:
+    """将 SQL 压缩为单行，作为 span 名称（相同语句在汇总表中合并）。"""
+    text = _WHITESPACE.sub(" ", str(operation)).strip()
+    if len(text) > SQL_NAME_LENGTH:
+        text = text[:SQL_NAME_LENGTH - 3] + "..."
+    return f"sql: {text}"
+
+
+class TracedCursor:
+    """记录 execute/executemany 耗时与影响行数、fetch* 耗时与返回行数的游标包装。"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, *args, **kwargs):
+        with span(sql_name(operation), "sql") as s:
+            result = self._cursor.execute(operation, *args, **kwargs)
+            s.set(rows=self._cursor.rowcount)
+        return result
+
+    def executemany(self, operation, *args, **kwargs):
+        with span(sql_name(operation), "sql", many=True) as s:
+            result = self._cursor.executemany(operation, *args, **kwargs)
+            s.set(rows=self._cursor.rowcount)
+        return result
+
+    def fetchone(self):
+        with span("sql.fetchone", "sql") as s:
+            row = self._cursor.fetchone()
+            s.set(rows=0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        with span("sql.fetchmany", "sql") as s:
+            rows = self._cursor.fetchmany(*args, **kwargs)
+            s.set(rows=len(rows))
+        return rows
+
+    def fetchall(self):
+        with span("sql.fetchall", "sql") as s:
+            rows = self._cursor.fetchall()
+            s.set(rows=len(rows))
+        return rows
+
+
+def trace_cursor(cursor):
+    """启用剖析时包装游标，否则原样返回。"""
+    if _tracer is None or cursor is None:
+        return cursor
+    return TracedCursor(cursor)
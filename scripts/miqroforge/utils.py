@@ -0,0 +1,42 @@
+"""MiqroForge 通用辅助函数"""
+
+import re
+from typing import Optional
+
+# 时间长度单位到秒数的映射
+DURATION_UNITS = {
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 604800,
+}
+
+_DURATION_PATTERN = re.compile(r"^\s*(\d+)\s*([smhdw]?)\s*$", re.IGNORECASE)
+
+
+def parse_duration(value: str) -> int:
+    """解析时间长度字符串为秒数
+
+    Args:
+        value: 时间长度，例如 30s、15m、12h、7d、2w，不带单位时按天计算
+
+    Returns:
+        秒数
+    """
+    match = _DURATION_PATTERN.match(str(value))
+    if not match:
+        raise ValueError(f"无效的时间长度: {value}，示例: 30m、12h、7d、2w")
+    amount, unit = match.groups()
+    seconds = int(amount) * DURATION_UNITS[(unit or "d").lower()]
+    if seconds <= 0:
+        raise ValueError(f"时间长度必须大于0: {value}")
+    return seconds
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    """格式化秒数为 HH:MM:SS"""
+    if seconds is None:
+        return "-"
+    seconds = max(int(round(float(seconds))), 0)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
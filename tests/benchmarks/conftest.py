@@ -0,0 +1,522 @@
+"""性能基准的公共夹具
+
+- 合成数据：按 task / task_node / task_node_params / node 表的列顺序生成行；
+- FakeCursor / FakeMySQLManager：在进程内代替 MySQL，支持 execute/fetch*/stream；
+- FakeDockerClient：在进程内代替 Docker，容器文件以 tar 归档返回；
+- 参考实现：改为编译格式化器之前按 dict(zip(FIELDS, row)) 逐行取值的格式化函数；
+- bench 夹具：测量吞吐量（行/秒，多轮取最好）和 tracemalloc 峰值内存，与 baseline.json 比较。
+  吞吐量不按绝对值比较，而是换算为相对值：每轮与固定的纯 Python 校准负载交替运行，
+  relative 为吞吐量与校准负载速度之比；传入 reference 时还与参考实现交替运行，
+  speedup 为参考实现耗时与被测函数耗时之比。relative 或 speedup 低于基线、
+  峰值内存高于基线超过容差时失败；baseline.json 中没有对应的基线时同样失败。
+  基线覆盖 1000、100000 和 1000000 行，make bench 运行前两档，make bench-full 运行全部三档。
+
+吞吐量和峰值内存与机器相关，使用 bench 夹具或标记为 benchmark 的测试默认跳过，
+只在 make bench / make bench-full（MIQROFORGE_BENCH=1）时运行。
+
+环境变量：
+- MIQROFORGE_BENCH=1：运行使用 bench 夹具或标记为 benchmark 的基准；
+- MIQROFORGE_BENCH_ROWS：逗号分隔的行数，默认 1000,100000，make bench-full 为 1000,100000,1000000；
+- MIQROFORGE_BENCH_TOLERANCE：与基线比较的相对容差，默认 0.3；
+- MIQROFORGE_BENCH_MIN_SPEEDUP：test_formatters.py 中按列格式化相对参考实现的最低加速比，默认 5；
+- MIQROFORGE_BENCH_UPDATE_BASELINE=1：用本次结果更新基线，不做比较。
+"""
+
+import gc
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from miqroforge.handle import show  # noqa: E402
+
+# 基线文件
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# 是否用本次结果更新基线
+BENCH_UPDATE_BASELINE = os.environ.get("MIQROFORGE_BENCH_UPDATE_BASELINE", "") not in ("", "0")
+
+# 是否运行使用 bench 夹具的基准（更新基线时总是运行）
+BENCH_ENABLED = BENCH_UPDATE_BASELINE or os.environ.get("MIQROFORGE_BENCH", "") not in ("", "0")
+
+# 测量的行数
+BENCH_ROWS = [
+    int(value) for value in os.environ.get("MIQROFORGE_BENCH_ROWS", "1000,100000").split(",") if value.strip()
+]
+
+# 容差：relative 和 speedup 可低于基线 30%，峰值内存可高于基线 30%
+BENCH_TOLERANCE = float(os.environ.get("MIQROFORGE_BENCH_TOLERANCE", "0.3"))
+
+# 峰值内存比较时允许的绝对浮动（字节），避免小数据量下的噪声
+PEAK_MEMORY_SLACK = 64 * 1024
+
+# 计时轮数：小数据量多测几轮取最好，大数据量只测一轮
+BENCH_ROUNDS_SMALL = 10
+BENCH_ROUNDS_LARGE = 1
+BENCH_LARGE_ROWS = 100000
+
+# 校准负载每轮的迭代次数
+CALIBRATION_LOOPS = 100000
+
+# 合成数据的起始时间
+BENCH_EPOCH = datetime(2025, 1, 1, 8, 0, 0)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: 与机器速度相关的性能基准，只在 MIQROFORGE_BENCH=1 时运行")
+
+
+def pytest_collection_modifyitems(config, items):
+    if BENCH_ENABLED:
+        return
+    skip = pytest.mark.skip(reason="性能基准默认跳过，运行 make bench 或设置 MIQROFORGE_BENCH=1")
+    for item in items:
+        if "bench" in getattr(item, "fixturenames", ()) or item.get_closest_marker("benchmark"):
+            item.add_marker(skip)
+
+
+def pytest_generate_tests(metafunc):
+    if "bench_rows" in metafunc.fixturenames:
+        metafunc.parametrize("bench_rows", BENCH_ROWS, ids=[f"{value}rows" for value in BENCH_ROWS])
+
+
+# ---------------------------------------------------------------------------
+# 合成数据
+# ---------------------------------------------------------------------------
+
+def make_task_rows(count: int) -> List[Tuple]:
+    """按 TASK_DISPLAY_FIELDS 的顺序生成任务行。"""
+    rows = []
+    for i in range(count):
+        created = BENCH_EPOCH + timedelta(seconds=i * 7)
+        finished = i % 3 != 0
+        rows.append((
+            count - i,
+            f"qsci-sweep-{i:07d}",
+            (i % 6) + 1,
+            created + timedelta(seconds=3),
+            created + timedelta(seconds=120 + i % 600) if finished else None,
+            created,
+            None if i % 5 else f"job {i} failed: exit code 137 (OOMKilled) while running vqe step",
+        ))
+    return rows
+
+
+def make_node_rows(count: int) -> List[Tuple]:
+    """按 NODE_DISPLAY_FIELDS 的顺序生成任务节点行。"""
+    return [
+        (
+            i + 1,
+            i // 8 + 1,
+            f"量子化学计算节点{i % 8}",
+            f"qchem_node_{i % 8}",
+            (i % 6) + 1,
+            f"/data/tasks/{i // 8 + 1}/nodes/{i + 1}",
+            i % 16,
+            BENCH_EPOCH + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def make_param_rows(count: int) -> List[Tuple]:
+    """按 NODE_PARAMS_DISPLAY_FIELDS 的顺序生成节点参数行。"""
+    return [
+        (
+            i + 1,
+            i // 40 + 1,
+            i // 5 + 1,
+            i % 2,
+            f"参数{i % 5}",
+            f"param_{i % 5}",
+            f"p{i % 5}",
+            json.dumps({"basis": "sto-3g", "shots": 1000 + i % 7, "theta": [0.1 * (i % 9)] * 4}),
+        )
+        for i in range(count)
+    ]
+
+
+# node 表的列
+NODE_TABLE_COLUMNS = [
+    "id", "type", "name", "description", "version", "color", "tag", "input", "output",
+    "performance_config_path", "example_config_path", "contact", "execution_command", "image",
+    "created_time", "updated_time",
+]
+
+
+def make_node_json(index: int, web_items: int = 8) -> Dict[str, Any]:
+    """生成一个 node.json，ui 字段混合字符串、字典和非法值。"""
+    def port(kind: str) -> Dict[str, Any]:
+        return {
+            "web": [
+                {"code": f"{kind}{j}", "ui": ["input", {"select": ""}, 3, None][j % 4]}
+                for j in range(web_items)
+            ],
+        }
+
+    return {
+        "id": f"node-{index:08d}",
+        "name": {"cn": f"节点{index}", "en": f"node {index}"},
+        "description": "benchmark node",
+        "version": "1.0.0",
+        "input": port("in"),
+        "output": port("out"),
+    }
+
+
+def make_catalog_rows(count: int) -> List[Tuple]:
+    """按 NODE_TABLE_COLUMNS 的顺序生成节点模板行，input/output 为较长的 JSON。"""
+    rows = []
+    for i in range(count):
+        node_json = make_node_json(i)
+        created = BENCH_EPOCH + timedelta(minutes=i)
+        rows.append((
+            node_json["id"], "C", json.dumps(node_json["name"], ensure_ascii=False),
+            "benchmark node", "1.0.0", "#3366ff", "qchem",
+            json.dumps(node_json["input"]), json.dumps(node_json["output"]),
+            None, None, "{}", "python main.py", f"registry.local/qchem:{i % 10}",
+            created, created,
+        ))
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# 参考实现
+# ---------------------------------------------------------------------------
+
+def reference_param_type_str(type_code: int) -> str:
+    # 改为编译格式化器之前的 get_param_type_str，每次调用都构造映射表
+    param_type_map = {
+        0: "输入参数",
+        1: "输出参数"
+    }
+    return param_type_map.get(type_code, "未知类型")
+
+
+def reference_task_row(row: Tuple) -> List:
+    row_dict = dict(zip(show.TASK_DISPLAY_FIELDS, row))
+    return [
+        show.safe_int(row_dict["id"]),
+        str(row_dict["name"] or ""),
+        show.get_task_status_str(show.safe_int(row_dict["status"])),
+        show.format_datetime(row_dict["start_time"]),
+        show.format_datetime(row_dict["end_time"]),
+        show.format_datetime(row_dict["created_time"]),
+        show.format_error_message(row_dict["error_message"]),
+    ]
+
+
+def reference_node_row(row: Tuple) -> List:
+    row_dict = dict(zip(show.NODE_DISPLAY_FIELDS, row))
+    return [
+        show.safe_int(row_dict["id"]),
+        show.safe_int(row_dict["task_id"]),
+        str(row_dict["name_cn"] or ""),
+        str(row_dict["name_en"] or ""),
+        show.get_node_status_str(show.safe_int(row_dict["status"])),
+        str(row_dict["data_dir"] or ""),
+        str(row_dict["job_num"] or ""),
+        show.format_datetime(row_dict["created_time"]),
+    ]
+
+
+def reference_node_params_row(row: Tuple) -> List:
+    row_dict = dict(zip(show.NODE_PARAMS_DISPLAY_FIELDS, row))
+    value = str(row_dict["value"] or "")
+    if len(row) > len(show.NODE_PARAMS_DISPLAY_FIELDS):
+        length = show.safe_int(row[len(show.NODE_PARAMS_DISPLAY_FIELDS)])
+        if length > len(value):
+            value = f"{value}... (共 {length} 字符)"
+    return [
+        show.safe_int(row_dict["id"]),
+        show.safe_int(row_dict["task_id"]),
+        show.safe_int(row_dict["node_id"]),
+        reference_param_type_str(show.safe_int(row_dict["type"])),
+        str(row_dict["name_cn"] or ""),
+        str(row_dict["name_en"] or ""),
+        str(row_dict["param_code"] or ""),
+        value,
+    ]
+
+
+# ---------------------------------------------------------------------------
+# 进程内替身
+# ---------------------------------------------------------------------------
+
+class FakeCursor:
+    """按预置结果集返回数据的游标，忽略 SQL 内容。"""
+
+    def __init__(self, rows: Sequence[Tuple], columns: Optional[Sequence[str]] = None):
+        self._rows = rows
+        self._position = 0
+        self.description = [(name,) for name in columns] if columns else None
+        self.rowcount = -1
+        self.executed: List[Tuple[str, Any]] = []
+
+    def execute(self, operation: str, params: Any = None) -> None:
+        self.executed.append((operation, params))
+        self._position = 0
+        self.rowcount = len(self._rows)
+
+    def fetchone(self) -> Optional[Tuple]:
+        if self._position >= len(self._rows):
+            return None
+        row = self._rows[self._position]
+        self._position += 1
+        return row
+
+    def fetchmany(self, size: int = 1) -> List[Tuple]:
+        batch = list(self._rows[self._position:self._position + size])
+        self._position += len(batch)
+        return batch
+
+    def fetchall(self) -> List[Tuple]:
+        rows = list(self._rows[self._position:])
+        self._position = len(self._rows)
+        return rows
+
+    def close(self) -> None:
+        pass
+
+
+class FakeMySQLManager:
+    """MySQLManager 的进程内替身，stream 按批返回预置结果集。"""
+
+    def __init__(self, rows: Sequence[Tuple], columns: Optional[Sequence[str]] = None):
+        self.cursor = FakeCursor(rows, columns)
+        self.connection = None
+
+    def stream(self, query: str, params: Sequence = (), batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        cursor = FakeCursor(self.cursor._rows)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+    def connect(self) -> bool:
+        return True
+
+    def disconnect(self) -> None:
+        pass
+
+
+def make_tar(path: str, content: bytes) -> bytes:
+    """生成只包含一个文件的 tar 归档（docker get_archive 的返回格式）。"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        info = tarfile.TarInfo(os.path.basename(path))
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class FakeContainer:
+    def __init__(self, files: Dict[str, bytes]):
+        self._files = files
+
+    def get_archive(self, path: str):
+        import docker
+
+        if path not in self._files:
+            raise docker.errors.NotFound(f"{path} not found")
+        return iter([self._files[path]]), {"name": os.path.basename(path)}
+
+    def remove(self, force: bool = False) -> None:
+        pass
+
+
+class FakeContainers:
+    def __init__(self, files: Dict[str, bytes]):
+        self._files = files
+        self.created = 0
+
+    def create(self, image: str, command=None, **kwargs) -> FakeContainer:
+        self.created += 1
+        return FakeContainer(self._files)
+
+
+class FakeImage:
+    def __init__(self, image: str):
+        self.id = "sha256:" + format(abs(hash(image)), "064x")[:64]
+        self.tags = [image]
+        self.attrs = {"Size": 0}
+
+
+class FakeImages:
+    def get(self, image: str) -> FakeImage:
+        return FakeImage(image)
+
+
+class FakeDockerClient:
+    """docker.DockerClient 的进程内替身：镜像总是存在，容器内有 node.json 和 help.md。"""
+
+    def __init__(self, app_path: str = "/opt/app"):
+        files = {
+            f"{app_path}/node.json": make_tar("node.json", json.dumps(make_node_json(0)).encode("utf-8")),
+            f"{app_path}/help.md": make_tar("help.md", "# benchmark node\n".encode("utf-8") * 64),
+        }
+        self.containers = FakeContainers(files)
+        self.images = FakeImages()
+
+    def ping(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def fake_docker_manager():
+    """使用 FakeDockerClient 的 DockerManager，不连接 Docker 守护进程。"""
+    from miqroforge.managers.docker_manager import DockerManager
+
+    manager = DockerManager.__new__(DockerManager)
+    manager.client = FakeDockerClient()
+    return manager
+
+
+class NullWriter(io.TextIOBase):
+    """丢弃写入内容的文本流，避免输出缓冲计入峰值内存。"""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+# ---------------------------------------------------------------------------
+# 测量与基线
+# ---------------------------------------------------------------------------
+
+_results: Dict[str, Dict[str, float]] = {}
+
+
+def load_baseline() -> Dict[str, Dict[str, float]]:
+    if not BASELINE_PATH.exists():
+        return {}
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def calibration_workload() -> None:
+    """固定的纯 Python 校准负载：构造 dict、按键取值、格式化字符串。"""
+    for i in range(CALIBRATION_LOOPS):
+        row = {"id": i, "name": "node"}
+        f"{row['id']:08d}-{row['name']}"
+
+
+def measure_times(runs: Sequence[Tuple[Callable[..., Any], Optional[Callable[[], tuple]]]],
+                  rounds: int) -> List[float]:
+    """每轮依次运行各个 (func, setup)，返回每个 func 最好一轮的耗时秒数。setup 不计入测量。
+
+    交替运行让机器负载的波动同时作用于各个函数，它们的耗时之比比单独测量稳定。
+    与 timeit 一样，计时期间关闭垃圾回收：分代回收的时机取决于 setup 留下的对象，
+    会让同一函数的耗时在两次运行之间相差数倍。
+    """
+    best = [float("inf")] * len(runs)
+    for _ in range(rounds):
+        for index, (func, setup) in enumerate(runs):
+            args = setup() if setup else ()
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                func(*args)
+                best[index] = min(best[index], time.perf_counter() - start)
+            finally:
+                gc.enable()
+    return best
+
+
+def measure_peak(func: Callable[..., Any], setup: Optional[Callable[[], tuple]]) -> int:
+    """返回运行一次 func 的 tracemalloc 峰值字节数。setup 不计入测量。"""
+    args = setup() if setup else ()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def significant(value: float, digits: int = 4) -> float:
+    return float(f"{value:.{digits}g}")
+
+
+@pytest.fixture
+def bench():
+    """bench(name, rows, func, setup=None, reference=None)：测量并与基线比较。
+
+    reference 是同一批数据的参考实现，给出时结果和基线中带有 speedup。
+    """
+    tolerance = BENCH_TOLERANCE
+
+    def run(name: str, rows: int, func: Callable[..., Any],
+            setup: Optional[Callable[[], tuple]] = None,
+            reference: Optional[Callable[..., Any]] = None) -> Dict[str, float]:
+        rounds = BENCH_ROUNDS_LARGE if rows >= BENCH_LARGE_ROWS else BENCH_ROUNDS_SMALL
+        runs = [(func, setup), (calibration_workload, None)] + ([(reference, setup)] if reference else [])
+        elapsed, calibration_elapsed, *reference_elapsed = measure_times(runs, rounds)
+        rows_per_sec = rows / elapsed if elapsed > 0 else float("inf")
+        key = f"{name}[{rows}]"
+        result = {
+            "rows_per_sec": round(rows_per_sec, 1),
+            "relative": significant(rows_per_sec * calibration_elapsed / CALIBRATION_LOOPS),
+            "peak_bytes": measure_peak(func, setup),
+        }
+        if reference_elapsed:
+            result["speedup"] = significant(reference_elapsed[0] / elapsed, 3)
+        _results[key] = result
+        if BENCH_UPDATE_BASELINE:
+            return result
+
+        baseline = load_baseline().get(key)
+        if baseline is None:
+            pytest.fail(f"{key} 没有基线，请设置 MIQROFORGE_BENCH_UPDATE_BASELINE=1 "
+                        f"和 MIQROFORGE_BENCH_ROWS={rows} 运行一次并提交 baseline.json")
+        for metric in ("relative", "speedup"):
+            if metric in baseline:
+                assert result[metric] >= baseline[metric] * (1 - tolerance), (
+                    f"{key} {metric} {result[metric]} 低于基线 {baseline[metric]}（容差 {tolerance:.0%}）"
+                )
+        max_peak = baseline["peak_bytes"] * (1 + tolerance) + PEAK_MEMORY_SLACK
+        assert result["peak_bytes"] <= max_peak, (
+            f"{key} 峰值内存 {result['peak_bytes']} 字节 高于基线 "
+            f"{baseline['peak_bytes']} 字节（容差 {tolerance:.0%}）"
+        )
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    terminalreporter.section("miqroforge benchmarks")
+    width = max(len(key) for key in _results)
+    for key in sorted(_results):
+        result = _results[key]
+        speedup = f"{result['speedup']:>6.3g}x" if "speedup" in result else f"{'-':>7}"
+        terminalreporter.write_line(
+            f"{key:<{width}}  {result['rows_per_sec']:>14,.0f} rows/s  {result['relative']:>10.4g} rel"
+            f"  {speedup}  {result['peak_bytes'] / 1024:>12,.1f} KiB")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results or not BENCH_UPDATE_BASELINE:
+        return
+    baseline = load_baseline()
+    baseline.update(_results)
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(baseline.items())), f, indent=2)
+        f.write("\n")
@@ -0,0 +1,130 @@
+"""按列格式化与逐行格式化的比较
+
+参考实现见 conftest.py，是改为编译格式化器之前按 dict(zip(FIELDS, row)) 逐行取值的格式化函数。
+输出一致性测试总是运行；加速比在同一进程内测量，不依赖机器的绝对速度，
+与其他基准一样只在 make bench（MIQROFORGE_BENCH=1）时运行。
+每轮测量前清空日期时间缓存，合成数据的时间戳互不相同，缓存不会因重复格式化同一批行而预热。
+格式化吞吐量见 test_render_throughput.py 中的基准。
+"""
+
+import os
+import random
+import timeit
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from conftest import (
+    make_node_rows,
+    make_param_rows,
+    make_task_rows,
+    reference_node_params_row,
+    reference_node_row,
+    reference_task_row,
+)
+from miqroforge.handle import formatters, show
+
+# 按列格式化相对参考实现的最低加速比
+MIN_SPEEDUP = float(os.environ.get("MIQROFORGE_BENCH_MIN_SPEEDUP", "5"))
+
+# 测量加速比时的行数
+SPEEDUP_ROWS = 20000
+
+# 测量加速比的轮数，参考实现和按列格式化交替测量，各取最好一轮
+SPEEDUP_REPEAT = 7
+
+# 混入随机行的各种边界值
+EDGE_VALUES = [
+    None, 0, 1, True, False, 3, 7, Decimal("3"), Decimal("3.7"), 3.0, "3", "", "x" * 40, "short",
+    datetime(2025, 1, 2, 3, 4, 5), datetime(2025, 1, 2, 3, 4, 5, 123456), datetime(999, 1, 1),
+    datetime(2025, 1, 1, tzinfo=timezone.utc), date(2025, 1, 1), -1,
+]
+
+
+# 各列表：(合成数据, 参考实现, 按列格式化, 行宽列表)，参数行可能附加 CHAR_LENGTH(value) 列
+CASES = {
+    "task": (make_task_rows, reference_task_row, show.format_task_columns,
+             [len(show.TASK_DISPLAY_FIELDS)]),
+    "node": (make_node_rows, reference_node_row, show.format_node_columns,
+             [len(show.NODE_DISPLAY_FIELDS)]),
+    "node_params": (make_param_rows, reference_node_params_row, show.format_node_params_columns,
+                    [len(show.NODE_PARAMS_DISPLAY_FIELDS), len(show.NODE_PARAMS_DISPLAY_FIELDS) + 1]),
+}
+
+
+def edge_rows(width, count=2000, seed=1):
+    rng = random.Random(seed)
+    return [tuple(rng.choice(EDGE_VALUES) for _ in range(width)) for _ in range(count)]
+
+
+def as_rows(columns):
+    return [list(row) for row in zip(*columns)]
+
+
+@pytest.mark.parametrize("kind", sorted(CASES))
+def test_format_columns_matches_reference(kind):
+    make_rows, reference, format_columns, widths = CASES[kind]
+    for rows in [make_rows(500)] + [edge_rows(width, seed=width) for width in widths]:
+        expected = [reference(row) for row in rows]
+        actual = as_rows(format_columns(rows))
+        assert actual == expected
+        assert [list(map(type, row)) for row in actual] == [list(map(type, row)) for row in expected]
+    assert format_columns([]) == [()] * widths[0]
+
+
+def test_datetime_cache_matches_scalar():
+    # 不同时区的同一时刻相等，但显示不同，不能共用缓存
+    utc = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+    shifted = utc.astimezone(timezone(timedelta(hours=1)))
+    values = [
+        None, datetime(2025, 1, 2, 3, 4, 5, 123456), datetime(999, 1, 1),
+        datetime(1, 1, 1), datetime(9999, 12, 31, 23, 59, 59, 999999),
+        utc, shifted, date(2025, 1, 1), 0, True,
+    ]
+    formatters._datetime_cache.clear()
+    for _ in range(2):
+        assert [formatters.format_datetime_cached(value) for value in values] == \
+            [show.format_datetime(value) for value in values]
+
+
+def test_datetime_column_matches_scalar():
+    rng = random.Random(7)
+    moments = [
+        None, datetime(2025, 1, 2, 3, 4, 5, 123456), datetime(999, 1, 1),
+        datetime(1, 1, 1), datetime(9999, 12, 31, 23, 59, 59, 999999),
+        datetime(2000, 1, 1), datetime(1999, 12, 31, 23, 59, 59),
+    ]
+    start, span = datetime(1970, 1, 1), datetime(2100, 1, 1) - datetime(1970, 1, 1)
+    values = [
+        rng.choice(moments) if rng.random() < 0.2 else start + rng.random() * span
+        for _ in range(1000)
+    ]
+    aware = values + [datetime(2025, 1, 1, tzinfo=timezone.utc)]
+    mixed = values + [date(2025, 1, 1), 0]
+    for column in (values, aware, mixed, [value for value in values if value is not None]):
+        clear_datetime_caches()
+        expected = [show.format_datetime(value) for value in column]
+        assert formatters.DATETIME.column(column) == expected
+
+
+def clear_datetime_caches():
+    formatters._datetime_cache.clear()
+    formatters._date_prefix_cache.clear()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("kind", sorted(CASES))
+def test_columnar_speedup(kind):
+    make_rows, reference, format_columns, _ = CASES[kind]
+    rows = make_rows(SPEEDUP_ROWS)
+    reference_time = columnar_time = float("inf")
+    for _ in range(SPEEDUP_REPEAT):
+        reference_time = min(reference_time, timeit.timeit(
+            lambda: [reference(row) for row in rows], setup=clear_datetime_caches, number=1))
+        columnar_time = min(columnar_time, timeit.timeit(
+            lambda: format_columns(rows), setup=clear_datetime_caches, number=1))
+    speedup = reference_time / columnar_time
+    assert speedup >= MIN_SPEEDUP, (
+        f"{kind} 按列格式化加速比 {speedup:.1f}x 低于 {MIN_SPEEDUP:.1f}x"
+    )
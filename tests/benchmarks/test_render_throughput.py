@@ -0,0 +1,152 @@
+"""列表格式化与渲染热点路径的吞吐量和峰值内存基准
+
+数据来自进程内的合成行、FakeMySQLManager 和 FakeDockerClient，不需要 MySQL 或 Docker。
+结果与 baseline.json 比较，见 conftest.py；格式化基准同时测量相对参考实现的加速比。
+"""
+
+import copy
+from contextlib import redirect_stdout
+
+from conftest import (
+    NODE_TABLE_COLUMNS,
+    FakeMySQLManager,
+    NullWriter,
+    make_catalog_rows,
+    make_node_json,
+    make_node_rows,
+    make_param_rows,
+    make_task_rows,
+    reference_node_params_row,
+    reference_node_row,
+    reference_task_row,
+)
+from miqroforge.handle import show
+from miqroforge.handle.node import fetch_node, fix_node_json, fix_ui, get_column_names, print_node_vertical
+
+# 每次读取元数据相当于的行数（每个节点镜像一次容器创建和两次 get_archive）
+METADATA_READ_ROW_RATIO = 10
+
+# 每个节点 JSON 文档相当于的行数（一个文档含 input 和 output 两份参数定义，
+# 1000000 行时逐个深拷贝的文档会占满内存）
+NODE_JSON_ROW_RATIO = 10
+
+
+def quiet(func):
+    """丢弃 func 打印到标准输出的内容。"""
+    def wrapper(*args):
+        with redirect_stdout(NullWriter()):
+            return func(*args)
+    return wrapper
+
+
+def test_format_task_rows(bench, bench_rows):
+    rows = make_task_rows(bench_rows)
+    bench("format_task_row_data", bench_rows,
+          lambda: [show.format_task_row_data(row) for row in rows],
+          reference=lambda: [reference_task_row(row) for row in rows])
+
+
+def test_format_node_rows(bench, bench_rows):
+    rows = make_node_rows(bench_rows)
+    bench("format_node_row_data", bench_rows,
+          lambda: [show.format_node_row_data(row) for row in rows],
+          reference=lambda: [reference_node_row(row) for row in rows])
+
+
+def test_format_node_params_rows(bench, bench_rows):
+    rows = make_param_rows(bench_rows)
+    bench("format_node_params_row_data", bench_rows,
+          lambda: [show.format_node_params_row_data(row) for row in rows],
+          reference=lambda: [reference_node_params_row(row) for row in rows])
+
+
+def test_format_task_columns(bench, bench_rows):
+    rows = make_task_rows(bench_rows)
+    bench("format_task_columns", bench_rows, lambda: show.format_task_columns(rows),
+          reference=lambda: [reference_task_row(row) for row in rows])
+
+
+def test_format_node_columns(bench, bench_rows):
+    rows = make_node_rows(bench_rows)
+    bench("format_node_columns", bench_rows, lambda: show.format_node_columns(rows),
+          reference=lambda: [reference_node_row(row) for row in rows])
+
+
+def test_format_node_params_columns(bench, bench_rows):
+    rows = make_param_rows(bench_rows)
+    bench("format_node_params_columns", bench_rows, lambda: show.format_node_params_columns(rows),
+          reference=lambda: [reference_node_params_row(row) for row in rows])
+
+
+def test_print_task_table(bench, bench_rows):
+    columns = show.format_task_columns(make_task_rows(bench_rows))
+    bench("print_task_table", bench_rows, quiet(lambda: show.print_task_table(columns)))
+
+
+def test_print_node_table(bench, bench_rows):
+    columns = show.format_node_columns(make_node_rows(bench_rows))
+    bench("print_node_table", bench_rows, quiet(lambda: show.print_node_table(columns)))
+
+
+def test_print_node_params_table(bench, bench_rows):
+    columns = show.format_node_params_columns(make_param_rows(bench_rows))
+    bench("print_node_params_table", bench_rows, quiet(lambda: show.print_node_params_table(columns)))
+
+
+def test_print_task_pages_from_cursor(bench, bench_rows):
+    mysql_manager = FakeMySQLManager(make_task_rows(bench_rows))
+
+    def run():
+        total, _ = show.print_task_pages(show.iter_task_pages(mysql_manager, limit=bench_rows))
+        assert total == bench_rows
+
+    bench("print_task_pages", bench_rows, quiet(run))
+
+
+def test_fix_node_json(bench, bench_rows):
+    template = make_node_json(0)
+    document_count = max(bench_rows // NODE_JSON_ROW_RATIO, 1)
+
+    def setup():
+        return ([copy.deepcopy(template) for _ in range(document_count)],)
+
+    def run(documents):
+        for document in documents:
+            fix_node_json(document["input"], "upstream")
+            fix_node_json(document["output"], "downstream")
+
+    bench("fix_node_json", document_count, run, setup)
+
+
+def test_fix_ui(bench, bench_rows):
+    template = make_node_json(0)["input"]
+
+    def setup():
+        return ([copy.deepcopy(template) for _ in range(bench_rows)],)
+
+    def run(items):
+        for item in items:
+            fix_ui(item)
+
+    bench("fix_ui", bench_rows, run, setup)
+
+
+def test_print_node_vertical(bench, bench_rows):
+    mysql_manager = FakeMySQLManager(make_catalog_rows(bench_rows), NODE_TABLE_COLUMNS)
+
+    def run():
+        nodes = fetch_node(mysql_manager)
+        print_node_vertical(nodes, get_column_names(mysql_manager))
+
+    bench("print_node_vertical", bench_rows, quiet(run))
+
+
+def test_read_node_metadata(bench, bench_rows, fake_docker_manager):
+    reads = max(bench_rows // METADATA_READ_ROW_RATIO, 1)
+
+    def run():
+        for i in range(reads):
+            metadata = fake_docker_manager.read_node_metadata(f"registry.local/qchem:{i % 10}", "/opt/app")
+            assert metadata["node_json"]["id"]
+
+    bench("read_node_metadata", reads, run)
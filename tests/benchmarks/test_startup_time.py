@@ -0,0 +1,90 @@
+"""命令行冷启动耗时基准
+
+通过 ``python -X importtime`` 测量 ``miqroforge`` 入口的导入耗时，
+超过预算（默认 50ms，可用环境变量 MIQROFORGE_STARTUP_BUDGET_MS 调整）时失败，
+并检查构建命令行解析器时没有加载任何重量级客户端库。
+
+耗时预算与机器相关，标记为 benchmark，只在 make bench 时运行；
+重量级模块检查不依赖机器速度，默认运行。
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+
+# 冷启动导入耗时预算（毫秒）
+STARTUP_BUDGET_MS = float(os.environ.get("MIQROFORGE_STARTUP_BUDGET_MS", "50"))
+
+# 测量次数，取最小值以降低机器抖动的影响
+STARTUP_RUNS = 5
+
+# 不允许在 --help 等路径上加载的模块
+HEAVY_MODULES = [
+    "tabulate",
+    "mysql.connector",
+    "docker",
+    "kubernetes",
+    "requests",
+    "yaml",
+    "sqlalchemy",
+    "miqroforge.config",
+    "miqroforge.managers.mysql_manager",
+]
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SCRIPTS_DIR), env.get("PYTHONPATH")]))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def measure_import_ms() -> float:
+    """返回导入 miqroforge.cli 并构建解析器的累计导入耗时（毫秒）"""
+    result = run_python(
+        "-X", "importtime", "-c",
+        "import miqroforge.cli; miqroforge.cli.build_parser()",
+    )
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # 只统计由 miqroforge 顶层触发的导入，嵌套导入已包含在 cumulative 中
+        if name.startswith(" miqroforge") and cumulative.strip().isdigit():
+            total_us += int(cumulative.strip())
+    return total_us / 1000
+
+
+def test_parser_does_not_load_heavy_modules():
+    result = run_python(
+        "-c",
+        "import sys, miqroforge.cli; miqroforge.cli.build_parser(); "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_help_exits_cleanly():
+    result = run_python("-m", "miqroforge.cli", "--help")
+    assert "miqroforge" in result.stdout
+
+
+@pytest.mark.benchmark
+def test_cold_startup_within_budget():
+    best_ms = min(measure_import_ms() for _ in range(STARTUP_RUNS))
+    assert best_ms > 0
+    assert best_ms <= STARTUP_BUDGET_MS, (
+        f"miqroforge 冷启动导入耗时 {best_ms:.1f}ms 超过预算 {STARTUP_BUDGET_MS:.0f}ms"
+    )
@@ -0,0 +1,24 @@
+"""命令行解析器测试"""
+
+from miqroforge.cli import build_parser
+
+
+def test_profile_does_not_swallow_subcommand():
+    args = build_parser().parse_args(["--profile", "status"])
+    assert args.profile is True
+    assert args.profile_file is None
+    assert args.command == "status"
+    assert hasattr(args, "func")
+
+
+def test_profile_file_option():
+    args = build_parser().parse_args(["--profile-file", "trace.json", "task", "--limit", "5"])
+    assert args.profile_file == "trace.json"
+    assert args.command == "task"
+    assert args.limit == 5
+
+
+def test_profile_disabled_by_default():
+    args = build_parser().parse_args(["task"])
+    assert args.profile is False
+    assert args.profile_file is None
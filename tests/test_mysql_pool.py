@@ -0,0 +1,110 @@
+"""MySQL 连接池的测试
+
+mysql.connector.connect 替换为返回假连接的函数，不需要 MySQL。
+"""
+
+import gc
+import itertools
+
+import pytest
+
+from miqroforge.managers import mysql_manager
+from miqroforge.managers.mysql_manager import ConnectionPool, PoolError
+
+# get_pool 的连接参数
+POOL_ARGS = ("localhost", 3306, "root", "", "miqroforge")
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.resets = 0
+
+    def reset_session(self):
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """记录建立的全部假连接"""
+    opened = []
+    numbers = itertools.count(1)
+
+    def connect(**kwargs):
+        connection = FakeConnection(next(numbers))
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(mysql_manager.mysql.connector, "connect", connect)
+    monkeypatch.setattr(mysql_manager, "_pools", {})
+    return opened
+
+
+def test_checkout_and_return(connections):
+    pool = ConnectionPool(2, host="localhost")
+    first = pool.get_connection(timeout=0)
+    assert first.number == 1
+
+    first.close()
+    assert connections[0].resets == 1
+    assert not connections[0].closed
+    with pytest.raises(PoolError):
+        first.number
+
+
+def test_size_bound(connections):
+    pool = ConnectionPool(2, host="localhost")
+    borrowed = [pool.get_connection(timeout=0), pool.get_connection(timeout=0)]
+    with pytest.raises(PoolError):
+        pool.get_connection(timeout=0.01)
+
+    borrowed[0].close()
+    assert pool.get_connection(timeout=0).number == 1
+    assert len(connections) == 2
+
+
+def test_reuse_after_close(connections):
+    pool = ConnectionPool(2, host="localhost")
+    connection = pool.get_connection(timeout=0)
+    connection.close()
+    connection.close()
+
+    again = pool.get_connection(timeout=0)
+    assert again.number == 1
+    other = pool.get_connection(timeout=0)
+    assert other.number == 2
+    assert len(connections) == 2
+
+
+def test_unclosed_connection_returns_when_collected(connections):
+    pool = ConnectionPool(1, host="localhost")
+    connection = pool.get_connection(timeout=0)
+    del connection
+    gc.collect()
+
+    # 名额已归还，借出的是同一个底层连接
+    assert pool.get_connection(timeout=0).number == 1
+    assert len(connections) == 1
+
+
+def test_close_pools(connections):
+    pool = mysql_manager.get_pool(*POOL_ARGS, pool_size=2)
+    assert mysql_manager.get_pool(*POOL_ARGS) is pool
+    idle = pool.get_connection(timeout=0)
+    borrowed = pool.get_connection(timeout=0)
+    idle.close()
+
+    mysql_manager.close_pools()
+    assert connections[0].closed
+    assert not connections[1].closed
+    with pytest.raises(PoolError):
+        pool.get_connection(timeout=0)
+
+    # 关闭后归还的连接直接断开，之后的 get_pool 创建新的连接池
+    borrowed.close()
+    assert connections[1].closed
+    assert mysql_manager.get_pool(*POOL_ARGS) is not pool
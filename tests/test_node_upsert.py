@@ -0,0 +1,78 @@
+"""节点 upsert 写入结果的测试"""
+
+from miqroforge.handle import node
+from miqroforge.handle.node import node_content_hash, node_values, upsert_nodes
+
+
+def make_values(version):
+    return node_values({"id": "vqe", "input": {}, "output": {}, "version": version}, "registry.local/vqe:1")
+
+
+class FakeCursor:
+    """按 MySQL 的影响行数语义执行单条 upsert：插入 1、更新 2、未变化 0"""
+
+    def __init__(self, table):
+        self.table = table
+        self.rowcount = -1
+        self.queries = []
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        if "MD5" in query:
+            self.result = [(node_id, node_content_hash(values)) for node_id, values in self.table.items()
+                           if node_id in params]
+            return
+        node_id, values = params[0], tuple(params[1:])
+        if node_id not in self.table:
+            self.table[node_id] = values
+            self.rowcount = 1
+        elif "id = id" in query or self.table[node_id] == values:
+            self.rowcount = 0
+        else:
+            self.table[node_id] = values
+            self.rowcount = 2
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def get_server_info(self):
+        return "8.0.36"
+
+    def get_server_version(self):
+        return (8, 0, 36)
+
+
+class FakeMySQLManager:
+    def __init__(self, table):
+        self.cursor = FakeCursor(table)
+        self.connection = FakeConnection()
+
+
+def test_actions_come_from_affected_rows_without_pre_read():
+    table = {"a": make_values("1"), "b": make_values("1")}
+    manager = FakeMySQLManager(table)
+    actions = upsert_nodes(manager, [("a", make_values("1")), ("b", make_values("2")),
+                                     ("c", make_values("1"))], update=True)
+    assert actions == {"a": "unchanged", "b": "updated", "c": "inserted"}
+    assert not any("MD5" in query for query in manager.cursor.queries)
+
+
+def test_no_update_keeps_existing_rows():
+    table = {"a": make_values("1")}
+    manager = FakeMySQLManager(table)
+    actions = upsert_nodes(manager, [("a", make_values("2")), ("c", make_values("1"))], update=False)
+    assert actions == {"a": "skipped", "c": "inserted"}
+    assert table["a"] == make_values("1")
+    assert not any("MD5" in query for query in manager.cursor.queries)
+
+
+def test_interactive_confirms_only_changed_nodes(monkeypatch):
+    table = {"a": make_values("1"), "b": make_values("1")}
+    asked = []
+    monkeypatch.setattr(node, "confirm_update", lambda node_ids: asked.append(node_ids) or False)
+    actions = upsert_nodes(FakeMySQLManager(table), [("a", make_values("1")), ("b", make_values("2"))],
+                           update=None)
+    assert asked == [["b"]]
+    assert actions == {"a": "unchanged", "b": "skipped"}
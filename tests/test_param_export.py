@@ -0,0 +1,67 @@
+"""show --param 导出完整参数值的测试"""
+
+from argparse import Namespace
+
+import pytest
+
+from miqroforge.handle.show import export_param_value
+
+VALUE = "x" * 5000
+
+
+class FakeCursor:
+    """按 SUBSTRING 返回参数值，超过 truncate_at 字符的块返回 NULL"""
+
+    def __init__(self, truncate_at=None):
+        self.truncate_at = truncate_at
+        self.result = None
+
+    def execute(self, query, params=()):
+        if "CHAR_LENGTH" in query:
+            self.result = [(1, 1, len(VALUE))]
+        elif "max_allowed_packet" in query:
+            self.result = [(8192,)]
+        else:
+            start, size, _ = params
+            if self.truncate_at is not None and start > self.truncate_at:
+                self.result = [(None,)]
+            else:
+                self.result = [(VALUE[start - 1:start - 1 + size],)]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeMySQLManager:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+
+def export_args(output):
+    return Namespace(node_id=1, param="xyz", param_type=None, output=str(output))
+
+
+def test_export_writes_complete_value(tmp_path):
+    output = tmp_path / "value.txt"
+    export_param_value(export_args(output), FakeMySQLManager(FakeCursor()))
+    assert output.read_text(encoding="utf-8") == VALUE
+    assert list(tmp_path.iterdir()) == [output]
+
+
+def test_short_read_leaves_no_partial_file(tmp_path):
+    output = tmp_path / "value.txt"
+    with pytest.raises(RuntimeError, match="5000"):
+        export_param_value(export_args(output), FakeMySQLManager(FakeCursor(truncate_at=2000)))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_short_read_keeps_previous_file(tmp_path):
+    output = tmp_path / "value.txt"
+    output.write_text("previous", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        export_param_value(export_args(output), FakeMySQLManager(FakeCursor(truncate_at=2000)))
+    assert output.read_text(encoding="utf-8") == "previous"
+    assert list(tmp_path.iterdir()) == [output]
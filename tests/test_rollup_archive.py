@@ -0,0 +1,178 @@
+"""rollup refresh 与 db archive 交替执行的测试
+
+用 sqlite 内存库模拟 MySQL：执行前把本项目用到的 MySQL 语法改写为 sqlite 语法，
+NOW() 由测试控制。服务器分别报告为 MySQL 8.0 和 MariaDB，覆盖行别名和 VALUES() 两种 upsert。汇总表与作业表在 sqlite 中预先建好，MySQL 建表语句直接忽略。
+"""
+
+import re
+import sqlite3
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+from miqroforge import cache
+from miqroforge.handle import db, rollup
+from miqroforge.handle.job import JOB_STATUS_SUCCESS
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATETIME_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+JOB_COLUMNS = """task_id INTEGER, node_id INTEGER, name TEXT, ns TEXT, image TEXT, command TEXT,
+    args TEXT, sort INTEGER, data_dir TEXT, status INTEGER, created_time TEXT, finished_time TEXT,
+    retry_count INTEGER, cost_time INTEGER, msg TEXT, node_type TEXT, cpu INTEGER, memory INTEGER"""
+
+SCHEMA = f"""
+    CREATE TABLE job (id INTEGER PRIMARY KEY, {JOB_COLUMNS});
+    CREATE TABLE job_history (id INTEGER PRIMARY KEY, job_id INTEGER, {JOB_COLUMNS});
+    CREATE TABLE task (id INTEGER PRIMARY KEY, status INTEGER, created_time TEXT, start_time TEXT,
+        end_time TEXT, updated_time TEXT, cost_time INTEGER);
+    CREATE TABLE activity_rollup_hourly (source TEXT, bucket TEXT, node_type TEXT,
+        submitted INTEGER, started INTEGER, succeeded INTEGER, failed INTEGER,
+        cost_time INTEGER, cpu INTEGER, memory INTEGER, PRIMARY KEY (source, bucket, node_type));
+    CREATE TABLE rollup_state (name TEXT PRIMARY KEY, watermark TEXT, open_min_id INTEGER, updated_time TEXT);
+"""
+
+# (MySQL 写法, sqlite 写法)
+REWRITES = [
+    (re.compile(r"(\w+) - INTERVAL \(MINUTE\(\1\) \* 60 \+ SECOND\(\1\)\) SECOND"), r"HOUR_BUCKET(\1)"),
+    (re.compile(r"NOW\(\) - INTERVAL %s SECOND"), "SUB_SECONDS(NOW(), %s)"),
+    (re.compile(r"ON DUPLICATE KEY UPDATE"), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"VALUES\((\w+)\)"), r"excluded.\1"),
+    (re.compile(r"(VALUES \([^)]*\)) AS new"), r"\1"),
+    (re.compile(r"\bnew\.(\w+?)(_delta)?\b"), r"excluded.\1"),
+    (re.compile(r"FOR UPDATE"), ""),
+    (re.compile(r"%s"), "?"),
+]
+
+
+def to_sqlite(value):
+    return value.strftime(DATETIME_FORMAT) if isinstance(value, datetime) else value
+
+
+def from_sqlite(value):
+    if isinstance(value, str) and DATETIME_PATTERN.fullmatch(value):
+        return datetime.strptime(value, DATETIME_FORMAT)
+    return value
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self._cursor = connection.cursor()
+        self.rowcount = -1
+
+    def execute(self, query, params=()):
+        if "ENGINE = InnoDB" in query:
+            return
+        for pattern, replacement in REWRITES:
+            query = pattern.sub(replacement, query)
+        self._cursor.execute(query, tuple(map(to_sqlite, params)))
+        self.rowcount = self._cursor.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else tuple(map(from_sqlite, row))
+
+    def fetchall(self):
+        return [tuple(map(from_sqlite, row)) for row in self._cursor.fetchall()]
+
+
+class FakeConnection:
+    def __init__(self, clock, server):
+        self.autocommit = True
+        self._server_info, self._server_version = server
+        self._connection = sqlite3.connect(":memory:", isolation_level=None)
+        self._connection.create_function("NOW", 0, lambda: clock["now"].strftime(DATETIME_FORMAT))
+        self._connection.create_function("SUB_SECONDS", 2, lambda text, seconds: (
+            datetime.strptime(text, DATETIME_FORMAT) - timedelta(seconds=seconds)).strftime(DATETIME_FORMAT))
+        self._connection.create_function("HOUR_BUCKET", 1, lambda text: text and text[:13] + ":00:00")
+        self._connection.executescript(SCHEMA)
+
+    def cursor(self):
+        return FakeCursor(self._connection)
+
+    def get_server_info(self):
+        return self._server_info
+
+    def get_server_version(self):
+        return self._server_version
+
+    def start_transaction(self):
+        self._connection.execute("BEGIN")
+
+    def commit(self):
+        if self._connection.in_transaction:
+            self._connection.execute("COMMIT")
+
+    def rollback(self):
+        if self._connection.in_transaction:
+            self._connection.execute("ROLLBACK")
+
+
+@pytest.fixture
+def clock():
+    return {"now": datetime(2025, 3, 1, 0, 0, 0)}
+
+
+@pytest.fixture(params=[("8.0.36", (8, 0, 36)), ("10.11.6-MariaDB", (10, 11, 6))],
+                ids=["mysql", "mariadb"])
+def mysql_manager(request, clock, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(rollup, "get_rollup_lag", lambda: 60)
+    connection = FakeConnection(clock, request.param)
+    return types.SimpleNamespace(connection=connection, cursor=connection.cursor(),
+                                 host="localhost", port=3306, database="miqroforge")
+
+
+def insert_job(mysql_manager, job_id, status, created_time, finished_time=None):
+    mysql_manager.cursor.execute(
+        "INSERT INTO job (id, task_id, node_id, name, image, command, args, sort, status, "
+        "created_time, finished_time, node_type) VALUES (%s, 1, 1, 'job', 'img', 'run', '', 1, %s, %s, %s, 'calc')",
+        (job_id, status, created_time, finished_time))
+
+
+def archive(mysql_manager):
+    args = types.SimpleNamespace(older_than="30d", chunk_size=100, sleep=0, reset=True, dry_run=False)
+    db.handle_db_archive(args, mysql_manager)
+
+
+def job_ids(mysql_manager, table, column="id"):
+    mysql_manager.cursor.execute(f"SELECT {column} FROM {table} ORDER BY {column}")
+    return [row[0] for row in mysql_manager.cursor.fetchall()]
+
+
+def rolled_up_finished(mysql_manager):
+    mysql_manager.cursor.execute(
+        "SELECT SUM(succeeded) + SUM(failed) FROM activity_rollup_hourly WHERE source = 'job'")
+    return mysql_manager.cursor.fetchone()[0] or 0
+
+
+def test_archive_between_refreshes_keeps_finish_events(mysql_manager, clock):
+    # 早已创建、尚未结束的作业，以及早已结束的作业
+    insert_job(mysql_manager, 1, 1, datetime(2025, 1, 1))
+    insert_job(mysql_manager, 2, JOB_STATUS_SUCCESS, datetime(2025, 1, 2), datetime(2025, 1, 2, 1))
+    rollup.refresh_rollup(mysql_manager)
+    assert rolled_up_finished(mysql_manager) == 1
+
+    # 作业 1 在水位之后结束，随后执行归档
+    clock["now"] = datetime(2025, 3, 1, 1, 0, 0)
+    mysql_manager.cursor.execute("UPDATE job SET status = %s, finished_time = %s WHERE id = 1",
+                                 (JOB_STATUS_SUCCESS, datetime(2025, 3, 1, 0, 10)))
+    archive(mysql_manager)
+    assert job_ids(mysql_manager, "job") == [1]
+    assert job_ids(mysql_manager, "job_history", "job_id") == [2]
+
+    # 增量刷新计入作业 1 的结束事件后，再归档时作业 1 也被迁移
+    rollup.refresh_rollup(mysql_manager)
+    assert rolled_up_finished(mysql_manager) == 2
+    archive(mysql_manager)
+    assert job_ids(mysql_manager, "job") == []
+    assert job_ids(mysql_manager, "job_history", "job_id") == [1, 2]
+    assert rolled_up_finished(mysql_manager) == 2
+
+
+def test_archive_without_rollup_state(mysql_manager, clock):
+    insert_job(mysql_manager, 1, JOB_STATUS_SUCCESS, datetime(2025, 1, 1), datetime(2025, 2, 28))
+    archive(mysql_manager)
+    assert job_ids(mysql_manager, "job") == []
+    assert job_ids(mysql_manager, "job_history", "job_id") == [1]
@@ -0,0 +1,34 @@
+"""task compare 参数摘要分组的测试"""
+
+from miqroforge.handle.task_compare import find_differences, group_param_digests
+
+
+def digest_row(param_id, task_id, node_id, param_code, digest, node_code="vqe"):
+    return (param_id, task_id, node_id, node_code, param_code, 0, digest, 8)
+
+
+def test_duplicate_param_rows_are_numbered():
+    rows = [
+        digest_row(1, 1, 10, "basis", "a"),
+        digest_row(2, 1, 10, "basis", "b"),
+        digest_row(3, 2, 20, "basis", "a"),
+        digest_row(4, 2, 20, "basis", "a"),
+    ]
+    digests = group_param_digests(rows)
+    assert sorted(digests) == [("vqe", "basis", 0), ("vqe", "basis#2", 0)]
+
+    # 任务 1 的第二行与任务 2 不同，不能被第一行覆盖后判为一致
+    assert find_differences(digests, [1, 2]) == {
+        ("vqe", "basis#2", 0): {1: "A", 2: "B"},
+    }
+
+
+def test_duplicate_node_codes_are_numbered():
+    rows = [
+        digest_row(1, 1, 10, "basis", "a"),
+        digest_row(2, 1, 11, "basis", "a"),
+        digest_row(3, 2, 20, "basis", "a"),
+    ]
+    assert find_differences(group_param_digests(rows), [1, 2]) == {
+        ("vqe#2", "basis", 0): {1: "A", 2: None},
+    }
@@ -0,0 +1,66 @@
+"""task --watch 增量水位的测试"""
+
+from datetime import datetime, timedelta
+
+from miqroforge.handle.task_watch import TaskWatchState, WATCH_LAG_SECONDS, fetch_changed_tasks
+
+START = datetime(2025, 3, 1, 12, 0, 0)
+
+
+def task_row(task_id, status, updated_time):
+    return (task_id, f"task-{task_id}", status, None, None, START, None, updated_time)
+
+
+class FakeCursor:
+    """按状态值和水位过滤任务行的游标替身"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = []
+
+    def execute(self, query, params=()):
+        if "DISTINCT status" in query:
+            self.result = [(status,) for status in sorted({row[2] for row in self.rows})]
+        else:
+            *statuses, since = params
+            self.result = [row for row in self.rows if row[2] in statuses and row[7] >= since]
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeMySQLManager:
+    def __init__(self, rows):
+        self.cursor = FakeCursor(rows)
+
+
+def test_changed_tasks_include_unmapped_status():
+    # 状态码 9 不在 TASK_STATUS_MAP 中，变化的行同样要被读到
+    rows = [task_row(1, 3, START), task_row(2, 9, START + timedelta(seconds=1))]
+    changed = fetch_changed_tasks(FakeMySQLManager(rows), START + timedelta(seconds=1))
+    assert [row[0] for row in changed] == [2]
+
+
+def test_watermark_lags_behind_server_time():
+    state = TaskWatchState(limit=10)
+    state.load([task_row(1, 2, START), task_row(2, 2, START)], START)
+
+    # 任务 2 的更新先被读到，水位不会越过 now - 滞后时间
+    now = START + timedelta(seconds=5)
+    assert state.apply([task_row(2, 3, now)], now) == 1
+    assert state.watermark == now - timedelta(seconds=WATCH_LAG_SECONDS)
+
+    # 时间戳更早、提交更晚的任务 1 的更新仍在重叠窗口内，下次轮询可以读到
+    late = START + timedelta(seconds=2)
+    assert state.watermark <= late
+    now += timedelta(seconds=5)
+    assert state.apply([task_row(1, 3, late), task_row(2, 3, START + timedelta(seconds=5))], now) == 1
+    assert state.rows[1][2] == 3
+
+
+def test_watermark_does_not_move_backwards():
+    state = TaskWatchState(limit=10)
+    state.load([], START)
+    watermark = state.watermark
+    assert state.apply([], START - timedelta(seconds=30)) == 0
+    assert state.watermark == watermark